@@ -33,6 +33,10 @@ class ErrorMessages:
 
     Slippage = make("Slippage")
 
+    NoQuote = make("No_Quote")
+
+    RepeatedExchange = make("Repeated_Exchange")
+
 class Balance_of:
     def request_type():
         return sp.TRecord(
@@ -194,24 +198,24 @@ class ContractLibrary(sp.Contract, ErrorMessages,Balance_of):
 
 class Router(ContractLibrary):
 
-    def __init__(self,_adminAddress, _ctezTokenAddress, _ctezFlatCurve):
+    def __init__(self,_adminAddress, _ctezTokenAddress, _ctezFlatCurve, _volatileFactory, _stableFactory):
 
         self.init(
             adminAddress = sp.set([_adminAddress]),
             ctezTokenAddress = _ctezTokenAddress,
             ctezFlatCurve = _ctezFlatCurve,
             paused = False,
-            Lock = False,
-            recipient = sp.none,
-            Registry = sp.big_map(
-                tvalue = sp.TRecord(token1Address = sp.TAddress, token2Address = sp.TAddress, token1Id = sp.TNat, token2Id = sp.TNat, token1Type = sp.TBool, token2Type = sp.TBool ),
+            pendingBalance = sp.set_type_expr(sp.none, sp.TOption(sp.TRecord(tokenAddress = sp.TAddress, tokenId = sp.TOption(sp.TNat), amount = sp.TNat))),
+            volatileFactory = sp.some(_volatileFactory),
+            stableFactory = sp.some(_stableFactory),
+            approvals = sp.big_map(
+                tvalue = sp.TMap(sp.TPair(sp.TAddress, sp.TNat), sp.TBool),
                 tkey = sp.TAddress
             ),
-            Route = sp.map(
-                tvalue = sp.TRecord(exchangeAddress = sp.TAddress, requiredTokenAddress = sp.TAddress, requiredTokenId = sp.TNat,minimumOutput = sp.TNat),
-                tkey = sp.TNat
-            ),
-            counter = sp.nat(0)
+            delistedExchanges = sp.big_map(
+                tvalue = sp.TUnit,
+                tkey = sp.TAddress
+            )
         )
     
     @sp.entry_point
@@ -228,29 +232,32 @@ class Router(ContractLibrary):
 
         sp.verify(~ self.data.paused, ErrorMessages.Paused)
 
-        sp.verify(~ self.data.Lock, ErrorMessages.BadState)
-
         sp.verify(sp.len(params.Route) > 0, ErrorMessages.SmallRoute)
 
-        # Changing State
+        # Call Swap Function, the rest of the route travels in the continuation
 
-        self.data.Lock = True 
+        self.Swap(params.Route, sp.nat(0), params.SwapAmount, params.recipient)
 
-        self.data.Route = params.Route
 
-        self.data.recipient = sp.some(params.recipient)
+    def Swap(self, Route, counter, swapAmount, recipient):
+        """Runs hop counter of the route
 
-        # Call Swap Function 
-        
-        self.Swap(self.data.Route[self.data.counter].exchangeAddress, params.SwapAmount, 
-        self.data.Route[self.data.counter].requiredTokenAddress,self.data.Route[self.data.counter].requiredTokenId, self.data.Route[self.data.counter].minimumOutput)
+        An intermediate hop swaps to the router, requests the router balance of the required token and 
+        then calls continueRoute with the route, so no route state is kept in storage. The token expected 
+        from the balance callback travels in the continueRoute parameter as the required token of the hop
 
+        Args:
+            Route: hops of the route
+            counter: index of the hop to run
+            swapAmount: amount of tokens swapped in this hop
+            recipient: address receiving the output of the last hop
+        """
 
-    def Swap(self,exchangeAddress, swapAmount, requiredTokenAddress, requiredTokenId, minimumOutput):
+        hop = Route[counter]
 
-        sp.if exchangeAddress == self.data.ctezFlatCurve:
+        sp.if hop.exchangeAddress == self.data.ctezFlatCurve:
 
-            sp.if requiredTokenAddress == self.data.ctezTokenAddress:
+            sp.if hop.requiredTokenAddress == self.data.ctezTokenAddress:
 
                 sp.verify(sp.utils.nat_to_mutez(swapAmount) == sp.amount)
 
@@ -260,34 +267,28 @@ class Router(ContractLibrary):
                     "tez_to_ctez"
                 ).open_some()
 
-                sp.if self.data.counter + 1 == sp.len(self.data.Route):
+                sp.if counter + 1 == sp.len(Route):
 
-                    contractData = sp.record(minCashBought = minimumOutput, recipient = self.data.recipient.open_some())
+                    contractData = sp.record(minCashBought = hop.minimumOutput, recipient = recipient)
 
                     sp.transfer(contractData, sp.utils.nat_to_mutez(swapAmount), contractHandle)
 
-                    self.data.Lock = False
-
-                    self.data.Route = sp.map()
-
-                    self.data.recipient = sp.none
-
-                    self.data.counter = 0
-
                 sp.else:
 
-                    contractData = sp.record(minCashBought = minimumOutput, recipient = sp.self_address)
+                    contractData = sp.record(minCashBought = hop.minimumOutput, recipient = sp.self_address)
 
                     sp.transfer(contractData, sp.utils.nat_to_mutez(swapAmount), contractHandle)
 
-                    ContractLibrary.getBalance(requiredTokenAddress,requiredTokenId, False)
+                    ContractLibrary.getBalance(hop.requiredTokenAddress, hop.requiredTokenId, False)
+
+                    self.continueRoute(Route, counter + 1, recipient)
 
             sp.else:
 
                 contractData = sp.record(
                     cashSold = swapAmount,
-                    minTezBought = minimumOutput,
-                    recipient = self.data.recipient.open_some())
+                    minTezBought = hop.minimumOutput,
+                    recipient = recipient)
 
                 contractHandle = sp.contract(
                     sp.TRecord(cashSold = sp.TNat, minTezBought = sp.TNat, recipient = sp.TAddress),
@@ -297,144 +298,681 @@ class Router(ContractLibrary):
 
                 sp.transfer(contractData, sp.mutez(0), contractHandle)
 
-                sp.verify(self.data.counter + 1 == sp.len(self.data.Route))
+                sp.verify(counter + 1 == sp.len(Route))
+
+        sp.else:
+
+            pair = sp.local('pair', self.getExchange(hop.exchangeAddress))
+
+            tokenType = sp.local('tokenType', pair.value.token2Type)
+
+            self.approveHopInput(hop.exchangeAddress, pair.value, hop.requiredTokenAddress, hop.requiredTokenId, tokenType)
+
+            sp.if counter + 1 == sp.len(Route):
+
+                self.callSwap(hop.exchangeAddress, swapAmount, hop.minimumOutput, recipient, hop.requiredTokenAddress, hop.requiredTokenId)
+
+            sp.else:
+
+                self.callSwap(hop.exchangeAddress, swapAmount, hop.minimumOutput, sp.self_address, hop.requiredTokenAddress, hop.requiredTokenId)
+
+                ContractLibrary.getBalance(hop.requiredTokenAddress, hop.requiredTokenId, tokenType.value)
+
+                self.continueRoute(Route, counter + 1, recipient)
+
+    def continueRoute(self, Route, counter, recipient):
+        """Calls continueRoute on the router, executed after the balance callback of the previous hop
+        """
+
+        sp.transfer(
+            sp.record(Route = Route, counter = counter, recipient = recipient), 
+            sp.mutez(0), 
+            sp.self_entry_point(entry_point = "continueRoute")
+        )
+
+    def getExchange(self, exchangeAddress):
+        """Reads the pair metadata of an exchange through the getExchange view of the factories
+
+        Args:
+            exchangeAddress: exchange to be looked up, first in the volatile and then in the stable factory, 
+                a factory which is not set or does not answer is skipped
+        Returns:
+            sp.TRecord: pair metadata of the exchange, fails if neither factory registers it or it is delisted
+        """
+
+        sp.verify(~ self.data.delistedExchanges.contains(exchangeAddress), ErrorMessages.InvalidExchange)
+
+        exchangeType = sp.TOption(sp.TRecord(
+            token1Address = sp.TAddress, token2Address = sp.TAddress, lpTokenAddress = sp.TAddress,
+            token1Id = sp.TNat, token2Id = sp.TNat,
+            token1Type = sp.TBool, token2Type = sp.TBool, stablePair = sp.TBool
+        ))
+
+        exchange = sp.local('exchange', sp.set_type_expr(sp.none, exchangeType))
+
+        sp.if self.data.volatileFactory.is_some():
+
+            volatileResult = sp.local('volatileResult', sp.view("getExchange", self.data.volatileFactory.open_some(), exchangeAddress, t = exchangeType))
+
+            sp.if volatileResult.value.is_some():
+
+                exchange.value = volatileResult.value.open_some()
+
+        sp.if exchange.value.is_none() & self.data.stableFactory.is_some():
+
+            stableResult = sp.local('stableResult', sp.view("getExchange", self.data.stableFactory.open_some(), exchangeAddress, t = exchangeType))
+
+            sp.if stableResult.value.is_some():
+
+                exchange.value = stableResult.value.open_some()
 
-                # Reset Lock
+        return exchange.value.open_some(ErrorMessages.InvalidExchange)
 
-                self.data.Lock = False
+    def approveToken(self, exchangeAddress, tokenAddress, tokenId, tokenType):
+        """Approves the exchange to spend a token of the router on its first use, recorded in approvals
+        """
+
+        sp.if ~ self.data.approvals.contains(exchangeAddress):
+
+            self.data.approvals[exchangeAddress] = sp.map()
+
+        sp.if ~ self.data.approvals[exchangeAddress].contains(sp.pair(tokenAddress, tokenId)):
+
+            sp.if tokenType:
+
+                ContractLibrary.updateFaTwo(sp.self_address, exchangeAddress, tokenAddress, tokenId, True)
+
+            sp.else:
+
+                ContractLibrary.approveCall(tokenAddress, CONSTANT, exchangeAddress)
+
+            self.data.approvals[exchangeAddress][sp.pair(tokenAddress, tokenId)] = tokenType
+
+    def approveHopInput(self, exchangeAddress, pair, requiredTokenAddress, requiredTokenId, tokenType):
+        """Approves the input token of a hop, the pair token which is not required
+
+        Args:
+            exchangeAddress: exchange of the hop
+            pair: pair metadata returned by getExchange
+            requiredTokenAddress: contract address of the token returned by the exchange
+            requiredTokenId: id of the token returned by the exchange
+            tokenType: local set to the type of the required token
+        """
 
-                self.data.Route = sp.map()
+        sp.if (pair.token1Address == requiredTokenAddress) & (pair.token1Id == requiredTokenId):
 
-                self.data.recipient = sp.none
+            tokenType.value = pair.token1Type
 
-                self.data.counter = 0
+            self.approveToken(exchangeAddress, pair.token2Address, pair.token2Id, pair.token2Type)
 
         sp.else:
 
-            sp.verify(self.data.Registry.contains(exchangeAddress), ErrorMessages.InvalidExchange)
+            self.approveToken(exchangeAddress, pair.token1Address, pair.token1Id, pair.token1Type)
+
+    def quoteSwap(self, exchangeAddress, stablePair, swapAmount, requiredTokenAddress, requiredTokenId):
+        """Quotes the output of a Swap on a registered exchange through its onchain views
+        
+        Args:
+            exchangeAddress: registered exchange to be quoted
+            stablePair: True if the exchange is a FlatCurve pair
+            swapAmount: amount of tokens swapped in
+            requiredTokenAddress: contract address of the token returned by the exchange
+            requiredTokenId: id of the token returned by the exchange
+        Returns:
+            sp.TNat: amount of required tokens the Swap returns in the current state
+        """
+
+        quote = sp.local('quote', sp.nat(0))
+
+        quoteParams = sp.record(tokenAmountIn = swapAmount, requiredTokenAddress = requiredTokenAddress, requiredTokenId = requiredTokenId)
 
-            tokenType = sp.local('tokenType',sp.bool(False))
+        sp.if stablePair:
 
-            sp.if (self.data.Registry[exchangeAddress].token1Address == requiredTokenAddress) & (self.data.Registry[exchangeAddress].token1Id == requiredTokenId) :
+            quote.value = sp.view("get_dy", exchangeAddress, quoteParams, t = sp.TNat).open_some(ErrorMessages.NoQuote)
 
-                tokenType.value = self.data.Registry[exchangeAddress].token1Type
+        sp.else:
 
-            sp.if (self.data.Registry[exchangeAddress].token2Address == requiredTokenAddress) & (self.data.Registry[exchangeAddress].token2Id == requiredTokenId):
+            quote.value = sp.view("getAmountOut", exchangeAddress, quoteParams, t = sp.TNat).open_some(ErrorMessages.NoQuote)
 
-                tokenType.value = self.data.Registry[exchangeAddress].token2Type
+        return quote.value
 
-            SwapData = sp.record(
+    def quoteSwapIn(self, exchangeAddress, stablePair, tokenAmountOut, requiredTokenAddress, requiredTokenId):
+        """Quotes the input a SwapExactOut on a registered exchange takes through its onchain views
+        
+        Args:
+            exchangeAddress: registered exchange to be quoted
+            stablePair: True if the exchange is a FlatCurve pair
+            tokenAmountOut: exact amount of tokens swapped out
+            requiredTokenAddress: contract address of the token returned by the exchange
+            requiredTokenId: id of the token returned by the exchange
+        Returns:
+            sp.TNat: amount of tokens the SwapExactOut takes in the current state
+        """
+
+        quote = sp.local('quoteIn', sp.nat(0))
+
+        quoteParams = sp.record(tokenAmountOut = tokenAmountOut, requiredTokenAddress = requiredTokenAddress, requiredTokenId = requiredTokenId)
+
+        sp.if stablePair:
+
+            quote.value = sp.view("get_dx", exchangeAddress, quoteParams, t = sp.TNat).open_some(ErrorMessages.NoQuote)
+
+        sp.else:
+
+            quote.value = sp.view("getAmountIn", exchangeAddress, quoteParams, t = sp.TNat).open_some(ErrorMessages.NoQuote)
+
+        return quote.value
+
+    def callSwap(self, exchangeAddress, swapAmount, minimumOutput, recipient, requiredTokenAddress, requiredTokenId):
+        """Calls Swap on a registered exchange, the input is taken from the router
+        """
+
+        SwapHandle = sp.contract(
+            sp.TRecord(tokenAmountIn = sp.TNat, MinimumTokenOut = sp.TNat, recipient = sp.TAddress, requiredTokenAddress = sp.TAddress, requiredTokenId = sp.TNat),
+            exchangeAddress,
+            "Swap"
+        ).open_some()
+
+        sp.transfer(
+            sp.record(
                 tokenAmountIn = swapAmount,
                 MinimumTokenOut = minimumOutput,
-                recipient = sp.self_address,
+                recipient = recipient,
                 requiredTokenAddress = requiredTokenAddress,
                 requiredTokenId = requiredTokenId
+            ), 
+            sp.mutez(0), 
+            SwapHandle
+        )
+
+    @sp.entry_point
+    def routerSwapQuoted(self,params):
+        """Multi hop swap priced through the exchange views instead of balance callbacks
+
+        Every hop is quoted upfront in order and all the Swap calls are sent in one batch, each with its 
+        quoted output as MinimumTokenOut, so the route needs no callbacks and no route storage. A hop 
+        returning less than quoted fails the whole route, the last one acting as the final min-out check. 
+        Exchanges can not repeat within a route as their quotes would be stale, and ctez hops are not 
+        supported as the ctez exchange has no quote view
+
+        Args:
+            recipient: address receiving the output of the last hop
+            SwapAmount: amount of tokens, held by the router, swapped in the first hop
+            Route: hops in order with the minimum output expected from each of them
+        """
+
+        sp.set_type(params, sp.TRecord(
+            recipient = sp.TAddress,
+            SwapAmount = sp.TNat,
+            Route = sp.TMap(
+                sp.TNat,
+                sp.TRecord(exchangeAddress = sp.TAddress, requiredTokenAddress = sp.TAddress, requiredTokenId = sp.TNat,minimumOutput = sp.TNat)
             )
+        ))
 
-            SwapHandle = sp.contract(
-                sp.TRecord(tokenAmountIn = sp.TNat, MinimumTokenOut = sp.TNat, recipient = sp.TAddress, requiredTokenAddress = sp.TAddress, requiredTokenId = sp.TNat),
-                exchangeAddress,
-                "Swap"
-            ).open_some()
+        sp.verify(~ self.data.paused, ErrorMessages.Paused)
 
-            sp.if self.data.counter + 1 == sp.len(self.data.Route):
+        sp.verify(sp.len(params.Route) > 0, ErrorMessages.SmallRoute)
 
-                SwapData = sp.record(
-                    tokenAmountIn = swapAmount,
-                    MinimumTokenOut = minimumOutput,
-                    recipient = self.data.recipient.open_some(),
-                    requiredTokenAddress = requiredTokenAddress,
-                    requiredTokenId = requiredTokenId
-                )
+        exchanges = sp.local('exchanges', sp.set(t = sp.TAddress))
 
-                SwapData.recipient = self.data.recipient.open_some()
+        routeOutput = sp.local('routeOutput', self.executeQuotedRoute(params.Route, params.SwapAmount, params.recipient, exchanges))
 
-                sp.transfer(SwapData, sp.mutez(0), SwapHandle)
+        sp.emit(
+            sp.record(
+                recipient = params.recipient,
+                SwapAmount = params.SwapAmount,
+                tokenAmountOut = routeOutput.value
+            ),
+            tag = "routerSwapQuoted"
+        )
 
-                # Reset Params
+    @sp.entry_point
+    def batchRouterSwap(self,params):
+        """Runs many independent routed swaps within one operation
 
-                self.data.Lock = False
+        Every job is quoted and executed inline as in routerSwapQuoted, with its minimum output checked 
+        against the quoted output of its last hop, and reports that output through a batchRouterSwap event. 
+        As all the quotes are taken before any Swap executes, no exchange can appear twice across the jobs
 
-                self.data.Route = sp.map()
+        Args:
+            params: list of jobs, each with the route, the amount held by the router to be swapped, the 
+                recipient and the minimum output of the job
+        """
 
-                self.data.recipient = sp.none
+        sp.set_type(params, sp.TList(sp.TRecord(
+            recipient = sp.TAddress,
+            SwapAmount = sp.TNat,
+            minimumOutput = sp.TNat,
+            Route = sp.TMap(
+                sp.TNat,
+                sp.TRecord(exchangeAddress = sp.TAddress, requiredTokenAddress = sp.TAddress, requiredTokenId = sp.TNat,minimumOutput = sp.TNat)
+            )
+        )))
 
-                self.data.counter = 0
+        sp.verify(~ self.data.paused, ErrorMessages.Paused)
 
-            sp.else:
+        exchanges = sp.local('exchanges', sp.set(t = sp.TAddress))
+
+        sp.for job in params:
+
+            sp.verify(sp.len(job.Route) > 0, ErrorMessages.SmallRoute)
+
+            jobOutput = sp.local('jobOutput', self.executeQuotedRoute(job.Route, job.SwapAmount, job.recipient, exchanges))
+
+            sp.verify(jobOutput.value >= job.minimumOutput, ErrorMessages.Slippage)
+
+            sp.emit(
+                sp.record(
+                    recipient = job.recipient,
+                    SwapAmount = job.SwapAmount,
+                    tokenAmountOut = jobOutput.value
+                ),
+                tag = "batchRouterSwap"
+            )
+
+    @sp.entry_point
+    def routerSplitSwap(self,params):
+        """Swap split across several weighted routes sharing one input and one aggregate minimum output
+
+        Each route receives SwapAmount * weight / total weight of the input, the last one the remainder, 
+        and is executed as in routerSwapQuoted. A route whose share rounds down to zero is skipped. All 
+        routes must start from the same token, the one of their first hop's pair which is not required, 
+        and end in the same token, and no exchange can appear twice across them, so every quote holds 
+        when the batch executes
 
-                SwapData = sp.record(
-                    tokenAmountIn = swapAmount,
-                    MinimumTokenOut = minimumOutput,
-                    recipient = sp.self_address,
-                    requiredTokenAddress = requiredTokenAddress,
-                    requiredTokenId = requiredTokenId
+        Args:
+            recipient: address receiving the output of every route
+            SwapAmount: amount of tokens, held by the router, split across the routes
+            minimumOutput: minimum total output of all routes
+            Routes: routes with their weight
+        """
+
+        sp.set_type(params, sp.TRecord(
+            recipient = sp.TAddress,
+            SwapAmount = sp.TNat,
+            minimumOutput = sp.TNat,
+            Routes = sp.TList(sp.TRecord(
+                weight = sp.TNat,
+                Route = sp.TMap(
+                    sp.TNat,
+                    sp.TRecord(exchangeAddress = sp.TAddress, requiredTokenAddress = sp.TAddress, requiredTokenId = sp.TNat,minimumOutput = sp.TNat)
                 )
+            ))
+        ))
+
+        sp.verify(~ self.data.paused, ErrorMessages.Paused)
+
+        sp.verify(sp.len(params.Routes) > 0, ErrorMessages.SmallRoute)
+
+        sp.verify(params.SwapAmount > 0, ErrorMessages.ZeroBalance)
+
+        totalWeight = sp.local('totalWeight', sp.nat(0))
+
+        inputToken = sp.local('inputToken', sp.set_type_expr(sp.none, sp.TOption(sp.TPair(sp.TAddress, sp.TNat))))
+
+        sp.for route in params.Routes:
+
+            sp.verify(route.weight > 0, ErrorMessages.ZeroBalance)
+
+            sp.verify(sp.len(route.Route) > 0, ErrorMessages.SmallRoute)
+
+            totalWeight.value += route.weight
+
+            firstHop = route.Route[0]
+
+            sp.verify(firstHop.exchangeAddress != self.data.ctezFlatCurve, ErrorMessages.NoQuote)
+
+            firstPair = sp.local('firstPair', self.getExchange(firstHop.exchangeAddress))
+
+            routeInput = sp.local('routeInput', sp.pair(firstPair.value.token1Address, firstPair.value.token1Id))
+
+            sp.if (firstPair.value.token1Address == firstHop.requiredTokenAddress) & (firstPair.value.token1Id == firstHop.requiredTokenId):
+
+                routeInput.value = sp.pair(firstPair.value.token2Address, firstPair.value.token2Id)
+
+            sp.if inputToken.value.is_some():
+
+                sp.verify(inputToken.value.open_some() == routeInput.value, ErrorMessages.InvalidExchange)
+
+            inputToken.value = sp.some(routeInput.value)
+
+        exchanges = sp.local('exchanges', sp.set(t = sp.TAddress))
+
+        remainingAmount = sp.local('remainingAmount', params.SwapAmount)
+
+        remainingWeight = sp.local('remainingWeight', totalWeight.value)
+
+        totalOutput = sp.local('totalOutput', sp.nat(0))
+
+        outputToken = sp.local('outputToken', sp.none)
+
+        sp.for route in params.Routes:
+
+            lastHop = route.Route[sp.as_nat(sp.len(route.Route) - 1)]
+
+            sp.if outputToken.value.is_some():
+
+                sp.verify(outputToken.value.open_some() == (lastHop.requiredTokenAddress, lastHop.requiredTokenId), ErrorMessages.InvalidExchange)
+
+            outputToken.value = sp.some((lastHop.requiredTokenAddress, lastHop.requiredTokenId))
+
+            routeAmount = sp.local('routeAmount', remainingAmount.value)
+
+            sp.if remainingWeight.value != route.weight:
+
+                routeAmount.value = (params.SwapAmount * route.weight) / totalWeight.value
+
+            remainingAmount.value = sp.as_nat(remainingAmount.value - routeAmount.value)
+
+            remainingWeight.value = sp.as_nat(remainingWeight.value - route.weight)
+
+            sp.if routeAmount.value > 0:
+
+                totalOutput.value += self.executeQuotedRoute(route.Route, routeAmount.value, params.recipient, exchanges)
+
+        sp.verify(totalOutput.value >= params.minimumOutput, ErrorMessages.Slippage)
+
+        sp.emit(
+            sp.record(
+                recipient = params.recipient,
+                SwapAmount = params.SwapAmount,
+                tokenAmountOut = totalOutput.value
+            ),
+            tag = "routerSplitSwap"
+        )
+
+    def executeQuotedRoute(self, Route, routeAmount, recipient, exchanges):
+        """Quotes every hop of a route and sends its Swap calls, each with the quoted output as minimum
+
+        Args:
+            Route: hops in order with the minimum output expected from each of them
+            routeAmount: amount of tokens, held by the router, swapped in the first hop
+            recipient: address receiving the output of the last hop
+            exchanges: local set of the exchanges already used by the batch
+        Returns:
+            sp.TNat: quoted output of the last hop
+        """
+
+        swapAmount = sp.local('swapAmount', routeAmount)
+
+        sp.for hopIndex in sp.range(0, sp.len(Route)):
+
+            hop = Route[hopIndex]
+
+            sp.verify(hop.exchangeAddress != self.data.ctezFlatCurve, ErrorMessages.NoQuote)
 
-                sp.transfer(SwapData, sp.mutez(0), SwapHandle)
+            sp.verify(~ exchanges.value.contains(hop.exchangeAddress), ErrorMessages.RepeatedExchange)
 
-                ContractLibrary.getBalance(requiredTokenAddress,requiredTokenId, tokenType.value)
+            exchanges.value.add(hop.exchangeAddress)
 
+            pair = sp.local('hopPair', self.getExchange(hop.exchangeAddress))
+
+            quote = sp.local('hopQuote', self.quoteSwap(hop.exchangeAddress, pair.value.stablePair, swapAmount.value, hop.requiredTokenAddress, hop.requiredTokenId))
+
+            sp.verify(quote.value > 0, ErrorMessages.ZeroBalance)
+
+            sp.verify(quote.value >= hop.minimumOutput, ErrorMessages.Slippage)
+
+            hopRecipient = sp.local('hopRecipient', sp.self_address)
+
+            sp.if hopIndex + 1 == sp.len(Route):
+
+                hopRecipient.value = recipient
+
+            tokenType = sp.local('hopTokenType', pair.value.token2Type)
+
+            self.approveHopInput(hop.exchangeAddress, pair.value, hop.requiredTokenAddress, hop.requiredTokenId, tokenType)
+
+            self.callSwap(hop.exchangeAddress, swapAmount.value, quote.value, hopRecipient.value, hop.requiredTokenAddress, hop.requiredTokenId)
+
+            swapAmount.value = quote.value
+
+        return swapAmount.value
 
     @sp.entry_point
-    def faOneCallBack(self,tokenAmount):
+    def routerSwapExactOut(self,params):
+        """Multi hop swap for an exact amount of the final token
 
-        sp.set_type(tokenAmount,sp.TNat)
+        The route is walked backwards with the reverse quote views of the exchanges, getAmountIn and 
+        get_dx, to find the input every hop takes. Only the input of the first hop is pulled from the 
+        sender, capped by maxAmountIn, and every hop is then sent as a SwapExactOut with its quoted 
+        input as maxTokenIn. A FlatCurve hop whose get_dx solve does not converge fails the route with 
+        Plenty_Network_No_Convergence rather than being priced from an overshooting quote. Exchanges can 
+        not repeat within a route and ctez hops are not supported as the ctez exchange has no quote view
+
+        Args:
+            recipient: address receiving tokenAmountOut of the final token
+            tokenAmountOut: exact amount of tokens returned by the last hop
+            maxAmountIn: maximum amount of tokens pulled from the sender for the first hop
+            Route: hops in order
+        """
+
+        sp.set_type(params, sp.TRecord(
+            recipient = sp.TAddress,
+            tokenAmountOut = sp.TNat,
+            maxAmountIn = sp.TNat,
+            Route = sp.TMap(
+                sp.TNat,
+                sp.TRecord(exchangeAddress = sp.TAddress, requiredTokenAddress = sp.TAddress, requiredTokenId = sp.TNat)
+            )
+        ))
 
         sp.verify(~ self.data.paused, ErrorMessages.Paused)
 
-        sp.verify( self.data.Lock, ErrorMessages.BadState)
+        sp.verify(sp.len(params.Route) > 0, ErrorMessages.SmallRoute)
+
+        sp.verify(params.tokenAmountOut > 0, ErrorMessages.ZeroBalance)
+
+        exchanges = sp.local('exchanges', sp.set(t = sp.TAddress))
+
+        hops = sp.local('hops', sp.map(tkey = sp.TNat))
+
+        routeAmount = sp.local('routeAmount', params.tokenAmountOut)
+
+        # Walk the route backwards, the input of a hop is the output of the previous one
+        sp.for step in sp.range(0, sp.len(params.Route)):
+
+            backwardIndex = sp.local('backwardIndex', sp.as_nat(sp.len(params.Route) - 1 - step))
+
+            hop = params.Route[backwardIndex.value]
+
+            sp.verify(hop.exchangeAddress != self.data.ctezFlatCurve, ErrorMessages.NoQuote)
+
+            sp.verify(~ exchanges.value.contains(hop.exchangeAddress), ErrorMessages.RepeatedExchange)
+
+            exchanges.value.add(hop.exchangeAddress)
+
+            pair = sp.local('hopPair', self.getExchange(hop.exchangeAddress))
+
+            amountIn = sp.local('amountIn', self.quoteSwapIn(hop.exchangeAddress, pair.value.stablePair, routeAmount.value, hop.requiredTokenAddress, hop.requiredTokenId))
+
+            sp.verify(amountIn.value > 0, ErrorMessages.ZeroBalance)
+
+            hops.value[backwardIndex.value] = sp.record(pair = pair.value, tokenAmountIn = amountIn.value, tokenAmountOut = routeAmount.value)
+
+            routeAmount.value = amountIn.value
+
+        sp.verify(routeAmount.value <= params.maxAmountIn, ErrorMessages.Slippage)
+
+        # Pull the input of the first hop from the sender
+        firstHop = hops.value[0]
+
+        sp.if (firstHop.pair.token1Address == params.Route[0].requiredTokenAddress) & (firstHop.pair.token1Id == params.Route[0].requiredTokenId):
+
+            ContractLibrary.TransferToken(sp.sender, sp.self_address, routeAmount.value, firstHop.pair.token2Address, firstHop.pair.token2Id, firstHop.pair.token2Type)
+
+        sp.else:
+
+            ContractLibrary.TransferToken(sp.sender, sp.self_address, routeAmount.value, firstHop.pair.token1Address, firstHop.pair.token1Id, firstHop.pair.token1Type)
+
+        sp.for hopIndex in sp.range(0, sp.len(params.Route)):
 
-        sp.verify(tokenAmount > 0, ErrorMessages.ZeroBalance)
+            hop = params.Route[hopIndex]
 
-        sp.verify(sp.sender == self.data.Route[self.data.counter].requiredTokenAddress)
+            tokenType = sp.local('hopTokenType', hops.value[hopIndex].pair.token2Type)
 
-        sp.verify(tokenAmount >= self.data.Route[self.data.counter].minimumOutput, ErrorMessages.Slippage)
+            self.approveHopInput(hop.exchangeAddress, hops.value[hopIndex].pair, hop.requiredTokenAddress, hop.requiredTokenId, tokenType)
 
-        self.data.counter += 1 
+            hopRecipient = sp.local('hopRecipient', sp.self_address)
 
-        # Call Swap 
+            sp.if hopIndex + 1 == sp.len(params.Route):
 
-        self.Swap(
-            self.data.Route[self.data.counter].exchangeAddress, tokenAmount,
-            self.data.Route[self.data.counter].requiredTokenAddress,self.data.Route[self.data.counter].requiredTokenId, self.data.Route[self.data.counter].minimumOutput)
+                hopRecipient.value = params.recipient
+
+            SwapHandle = sp.contract(
+                sp.TRecord(tokenAmountOut = sp.TNat, maxTokenIn = sp.TNat, recipient = sp.TAddress, requiredTokenAddress = sp.TAddress, requiredTokenId = sp.TNat),
+                hop.exchangeAddress,
+                "SwapExactOut"
+            ).open_some()
+
+            sp.transfer(
+                sp.record(
+                    tokenAmountOut = hops.value[hopIndex].tokenAmountOut,
+                    maxTokenIn = hops.value[hopIndex].tokenAmountIn,
+                    recipient = hopRecipient.value,
+                    requiredTokenAddress = hop.requiredTokenAddress,
+                    requiredTokenId = hop.requiredTokenId
+                ), 
+                sp.mutez(0), 
+                SwapHandle
+            )
+
+        sp.emit(
+            sp.record(
+                recipient = params.recipient,
+                tokenAmountIn = routeAmount.value,
+                tokenAmountOut = params.tokenAmountOut
+            ),
+            tag = "routerSwapExactOut"
+        )
+
+    @sp.onchain_view()
+    def quoteRoute(self,params):
+        """View function to quote a route by chaining the quote views of its exchanges
+
+        Hops are quoted in order against the current state, the output of a hop being the input of 
+        the next one. Exchanges can not repeat within a route as their quotes would be stale, and 
+        ctez hops fail as the ctez exchange has no quote view
+
+        Args:
+            SwapAmount: amount of tokens swapped in the first hop
+            Route: hops in order, as taken by routerSwap, the minimum outputs are not checked
+        Returns:
+            sp.TRecord: output of every hop and output of the last hop
+        """
+
+        sp.set_type(params, sp.TRecord(
+            SwapAmount = sp.TNat,
+            Route = sp.TMap(
+                sp.TNat,
+                sp.TRecord(exchangeAddress = sp.TAddress, requiredTokenAddress = sp.TAddress, requiredTokenId = sp.TNat,minimumOutput = sp.TNat)
+            )
+        ))
+
+        sp.verify(sp.len(params.Route) > 0, ErrorMessages.SmallRoute)
+
+        exchanges = sp.local('exchanges', sp.set(t = sp.TAddress))
+
+        hopOutputs = sp.local('hopOutputs', sp.map(tkey = sp.TNat, tvalue = sp.TNat))
+
+        swapAmount = sp.local('swapAmount', params.SwapAmount)
+
+        sp.for hopIndex in sp.range(0, sp.len(params.Route)):
+
+            hop = params.Route[hopIndex]
+
+            sp.verify(hop.exchangeAddress != self.data.ctezFlatCurve, ErrorMessages.NoQuote)
+
+            sp.verify(~ exchanges.value.contains(hop.exchangeAddress), ErrorMessages.RepeatedExchange)
+
+            exchanges.value.add(hop.exchangeAddress)
+
+            pair = sp.local('hopPair', self.getExchange(hop.exchangeAddress))
+
+            swapAmount.value = self.quoteSwap(hop.exchangeAddress, pair.value.stablePair, swapAmount.value, hop.requiredTokenAddress, hop.requiredTokenId)
+
+            hopOutputs.value[hopIndex] = swapAmount.value
+
+        sp.result(sp.record(hopOutputs = hopOutputs.value, tokenAmountOut = swapAmount.value))
 
     @sp.entry_point
-    def faTwoCallBack(self,params):
+    def faOneCallBack(self,tokenAmount):
+        """Records the balance reported by an FA1.2 token for the continueRoute call that follows it
 
-        sp.set_type(params, Balance_of.response_type())
+        The reporting token is checked by continueRoute against the token it expects, so a stray 
+        callback only leaves a value the next balance callback of a route overwrites
+        """
+
+        sp.set_type(tokenAmount,sp.TNat)
 
         sp.verify(~ self.data.paused, ErrorMessages.Paused)
 
-        sp.verify( self.data.Lock, ErrorMessages.BadState)
+        self.data.pendingBalance = sp.some(sp.record(tokenAddress = sp.sender, tokenId = sp.none, amount = tokenAmount))
 
-        sp.verify(sp.sender == self.data.Route[self.data.counter].requiredTokenAddress)
+    @sp.entry_point
+    def faTwoCallBack(self,params):
+        """Records the balance reported by an FA2 token for the continueRoute call that follows it, as faOneCallBack
+        """
+
+        sp.set_type(params, Balance_of.response_type())
+
+        sp.verify(~ self.data.paused, ErrorMessages.Paused)
 
         sp.verify(sp.len(params) == 1, message = "Invalid Length")
-        
-        balance = sp.local('balance', sp.nat(0))
 
         sp.for response in params: 
 
             sp.verify(response.request.owner == sp.self_address)
 
-            sp.verify(response.request.token_id == self.data.Route[self.data.counter].requiredTokenId)
+            self.data.pendingBalance = sp.some(sp.record(tokenAddress = sp.sender, tokenId = sp.some(response.request.token_id), amount = response.balance))
+
+    @sp.entry_point
+    def continueRoute(self,params):
+        """Runs the next hop of a route with the balance reported by the previous hop's token
+
+        Only callable by the router itself, the balance callback of the previous hop is consumed here and 
+        must come from the token the previous hop returns, so the storage is left as before the route
+
+        Args:
+            Route: hops of the route
+            counter: index of the hop to run
+            recipient: address receiving the output of the last hop
+        """
+
+        sp.set_type(params, sp.TRecord(
+            Route = sp.TMap(
+                sp.TNat,
+                sp.TRecord(exchangeAddress = sp.TAddress, requiredTokenAddress = sp.TAddress, requiredTokenId = sp.TNat,minimumOutput = sp.TNat)
+            ),
+            counter = sp.TNat,
+            recipient = sp.TAddress
+        ))
+
+        sp.verify(sp.sender == sp.self_address, ErrorMessages.BadState)
 
-            balance.value = response.balance
+        sp.verify(~ self.data.paused, ErrorMessages.Paused)
 
-        sp.verify(balance.value > 0, ErrorMessages.ZeroBalance)
+        pending = sp.local('pending', self.data.pendingBalance.open_some(ErrorMessages.BadState))
 
-        sp.verify(balance.value >= self.data.Route[self.data.counter].minimumOutput, ErrorMessages.Slippage)
+        self.data.pendingBalance = sp.none
 
-        self.data.counter += 1
+        previousHop = params.Route[sp.as_nat(params.counter - 1)]
 
-        self.Swap(
-            self.data.Route[self.data.counter].exchangeAddress, balance.value,
-            self.data.Route[self.data.counter].requiredTokenAddress,self.data.Route[self.data.counter].requiredTokenId,self.data.Route[self.data.counter].minimumOutput
-        )
+        sp.verify(pending.value.tokenAddress == previousHop.requiredTokenAddress, ErrorMessages.BadState)
+
+        sp.if pending.value.tokenId.is_some():
+
+            sp.verify(pending.value.tokenId.open_some() == previousHop.requiredTokenId, ErrorMessages.BadState)
+
+        sp.verify(pending.value.amount > 0, ErrorMessages.ZeroBalance)
+
+        sp.verify(pending.value.amount >= previousHop.minimumOutput, ErrorMessages.Slippage)
 
+        self.Swap(params.Route, params.counter, pending.value.amount, params.recipient)
 
-    @sp.entry_point 
+
+    @sp.entry_point(lazify = True)
     def ChangeState(self):
 
         """Admin function to toggle contract state
@@ -448,7 +986,7 @@ class Router(ContractLibrary):
 
         self.data.paused = ~ self.data.paused
 
-    @sp.entry_point
+    @sp.entry_point(lazify = True)
     def adminOperation(self,params):
 
         sp.set_type(params, sp.TRecord(
@@ -467,10 +1005,31 @@ class Router(ContractLibrary):
 
             self.data.adminAddress.remove(params.address)
 
-    @sp.entry_point
+    @sp.entry_point(lazify = True)
+    def changeVolatileFactory(self, newVolatileFactory):
+
+        sp.set_type(newVolatileFactory, sp.TAddress)
+
+        sp.verify(self.data.adminAddress.contains(sp.sender), ErrorMessages.NotAdmin)
+
+        self.data.volatileFactory = sp.some(newVolatileFactory)
+
+    @sp.entry_point(lazify = True)
+    def changeStableFactory(self, newStableFactory):
+
+        sp.set_type(newStableFactory, sp.TAddress)
+
+        sp.verify(self.data.adminAddress.contains(sp.sender), ErrorMessages.NotAdmin)
+
+        self.data.stableFactory = sp.some(newStableFactory)
+
+    @sp.entry_point(lazify = True)
     def AddExchange(self,params): 
         """
-            Admin Function to add Exchange Address to the Router Contract 
+            Admin Function called by the factories to seed the initial liquidity of an Exchange through the Router
+
+            Pair metadata is not stored by the Router, swaps read it through the getExchange view of the factories
+            The tokens are approved only when liquidity is seeded, otherwise on the first swap through the exchange
 
             Args: 
                 exchangeAddress : Exchange Address to be included in the Router 
@@ -491,32 +1050,11 @@ class Router(ContractLibrary):
 
         sp.verify(self.data.adminAddress.contains(sp.sender), ErrorMessages.NotAdmin)
 
-        sp.verify(self.data.Registry.contains(params.exchangeAddress) == False)
-
-        self.data.Registry[params.exchangeAddress] = sp.record(
-            token1Address = params.token1Address, token2Address = params.token2Address,
-            token1Id  = params.token1Id, token2Id = params.token2Id,
-            token1Type = params.token1Type, token2Type = params.token2Type
-        )
-
-        # Add approve for FA2 Right Away
-        sp.if params.token1Type: 
-
-            ContractLibrary.updateFaTwo(sp.self_address, params.exchangeAddress, params.token1Address, params.token1Id,True)
-
-        sp.else:
-
-            ContractLibrary.approveCall(params.token1Address, CONSTANT, params.exchangeAddress)
-
-        sp.if params.token2Type: 
-
-            ContractLibrary.updateFaTwo(sp.self_address, params.exchangeAddress, params.token2Address, params.token2Id,True)
-
-        sp.else:
+        sp.if ((params.token1Amount > sp.nat(0)) & (params.token2Amount > sp.nat(0))):
 
-            ContractLibrary.approveCall(params.token2Address, CONSTANT, params.exchangeAddress)
+            self.approveToken(params.exchangeAddress, params.token1Address, params.token1Id, params.token1Type)
 
-        sp.if ((params.token1Amount > sp.nat(0)) & (params.token2Amount > sp.nat(0))):
+            self.approveToken(params.exchangeAddress, params.token2Address, params.token2Id, params.token2Type)
 
             operationData = sp.record(
                 token1_max = params.token1Amount, token2_max = params.token2Amount, recipient = params.userAddress
@@ -542,10 +1080,42 @@ class Router(ContractLibrary):
 
                 sp.transfer(operationData, sp.mutez(0), addLiquidityHandle)
 
-    @sp.entry_point
+    @sp.entry_point(lazify = True)
+    def AddMultiExchange(self,params): 
+        """
+            Admin Function called by the stable factory to seed the initial liquidity of a MultiCurve pool through the Router
+
+            Args: 
+                exchangeAddress : MultiCurve pool Address
+                tokens : tokens of the pool by index
+                tokenAmounts : amount of every token added, by index
+                userAddress : address receiving the LP tokens
+        """
+
+        sp.set_type(params, sp.TRecord(
+            exchangeAddress = sp.TAddress,
+            tokens = sp.TMap(sp.TNat, sp.TRecord(tokenAddress = sp.TAddress, tokenId = sp.TNat, tokenType = sp.TBool, tokenPrecision = sp.TNat)),
+            tokenAmounts = sp.TMap(sp.TNat, sp.TNat), userAddress = sp.TAddress
+        ))
+
+        sp.verify(self.data.adminAddress.contains(sp.sender), ErrorMessages.NotAdmin)
+
+        sp.for token in params.tokens.values():
+
+            self.approveToken(params.exchangeAddress, token.tokenAddress, token.tokenId, token.tokenType)
+
+        addLiquidityHandle = sp.contract(
+            sp.TRecord(tokenMax = sp.TMap(sp.TNat, sp.TNat), recipient = sp.TAddress),
+            params.exchangeAddress,
+            "add_liquidity"
+        ).open_some()
+
+        sp.transfer(sp.record(tokenMax = params.tokenAmounts, recipient = params.userAddress), sp.mutez(0), addLiquidityHandle)
+
+    @sp.entry_point(lazify = True)
     def DeleteExchange(self,exchangeAddress): 
         """
-            Admin Function to remove Exchange Address from the Router Contract 
+            Admin Function to remove Exchange Address from the Router Contract, until it is listed again through relistExchange
 
             Args: 
                 exchangeAddress : Exchange Address to be included in the Router  
@@ -558,27 +1128,42 @@ class Router(ContractLibrary):
 
         sp.verify(self.data.adminAddress.contains(sp.sender), ErrorMessages.NotAdmin)
 
-        # Remove Operator
-        sp.if self.data.Registry[exchangeAddress].token1Type:
-            
-            ContractLibrary.updateFaTwo(sp.self_address, exchangeAddress, self.data.Registry[exchangeAddress].token1Address, self.data.Registry[exchangeAddress].token1Id,False) 
-        
-        sp.else:
+        # Remove Operator for every token approved on first use
+        sp.if self.data.approvals.contains(exchangeAddress):
 
-            ContractLibrary.approveCall(self.data.Registry[exchangeAddress].token1Address, sp.nat(0), exchangeAddress)
-        
-        sp.if self.data.Registry[exchangeAddress].token2Type: 
+            sp.for token in self.data.approvals[exchangeAddress].items():
 
-            ContractLibrary.updateFaTwo(sp.self_address, exchangeAddress, self.data.Registry[exchangeAddress].token2Address, self.data.Registry[exchangeAddress].token2Id,False) 
+                sp.if token.value:
 
-        sp.else:
+                    ContractLibrary.updateFaTwo(sp.self_address, exchangeAddress, sp.fst(token.key), sp.snd(token.key), False)
 
-            ContractLibrary.approveCall(self.data.Registry[exchangeAddress].token2Address, sp.nat(0), exchangeAddress)
+                sp.else:
 
-        del self.data.Registry[exchangeAddress]
+                    ContractLibrary.approveCall(sp.fst(token.key), sp.nat(0), exchangeAddress)
 
+            del self.data.approvals[exchangeAddress]
 
-    @sp.entry_point
+        # Delisted exchanges do not resolve through the factories anymore
+        self.data.delistedExchanges[exchangeAddress] = sp.unit
+
+    @sp.entry_point(lazify = True)
+    def relistExchange(self,exchangeAddress): 
+        """
+            Admin Function to list again an Exchange removed through DeleteExchange
+
+            Args: 
+                exchangeAddress : Exchange Address to be listed again, its tokens are approved again on the first swap
+        """
+
+        sp.set_type(exchangeAddress, sp.TAddress)
+
+        sp.verify(self.data.adminAddress.contains(sp.sender), ErrorMessages.NotAdmin)
+
+        sp.verify(self.data.delistedExchanges.contains(exchangeAddress), ErrorMessages.InvalidExchange)
+
+        del self.data.delistedExchanges[exchangeAddress]
+
+    @sp.entry_point(lazify = True)
     def approveExchangeToken(self,params):
 
         sp.set_type(params, sp.TRecord(
@@ -590,30 +1175,22 @@ class Router(ContractLibrary):
 
         sp.verify(self.data.adminAddress.contains(sp.sender), ErrorMessages.NotAdmin)
 
-        sp.verify(
-            (
-               (params.exchangeAddress == self.data.ctezFlatCurve) &
-               (params.tokenAddress == self.data.ctezTokenAddress)
-           ) |
-            (self.data.Registry.contains(params.exchangeAddress))
-        )
+        sp.if (params.exchangeAddress != self.data.ctezFlatCurve) | (params.tokenAddress != self.data.ctezTokenAddress):
 
-        sp.verify(
-            (
-                    (params.exchangeAddress == self.data.ctezFlatCurve) &
-                    (params.tokenAddress == self.data.ctezTokenAddress)
-            )  |
-            (
-                (params.tokenAddress == self.data.Registry[params.exchangeAddress].token1Address)
-                                    &
-                (params.tokenId == self.data.Registry[params.exchangeAddress].token1Id)
-            ) |
-            (
-                (params.tokenAddress == self.data.Registry[params.exchangeAddress].token2Address)
-                                    &
-                (params.tokenId == self.data.Registry[params.exchangeAddress].token2Id)
+            pair = sp.local('pair', self.getExchange(params.exchangeAddress))
+
+            sp.verify(
+                (
+                    (params.tokenAddress == pair.value.token1Address)
+                                        &
+                    (params.tokenId == pair.value.token1Id)
+                ) |
+                (
+                    (params.tokenAddress == pair.value.token2Address)
+                                        &
+                    (params.tokenId == pair.value.token2Id)
+                )
             )
-        )
 
         ContractLibrary.approveCall(params.tokenAddress, params.amount, params.exchangeAddress)           
 
@@ -629,8 +1206,13 @@ if "templates" not in __name__:
         adminAddress = sp.test_account("adminAddress")
         ctezTokenAddress = sp.test_account("ctezTokenContract")
         ctezFlatCurveAddress = sp.test_account("ctezFlatCurveContract")
+        volatileFactoryAddress = sp.test_account("volatileFactoryContract")
+        stableFactoryAddress = sp.test_account("stableFactoryContract")
 
-        swapRouter = Router(adminAddress.address, ctezTokenAddress.address, ctezFlatCurveAddress.address)
+        swapRouter = Router(
+            adminAddress.address, ctezTokenAddress.address, ctezFlatCurveAddress.address,
+            volatileFactoryAddress.address, stableFactoryAddress.address
+        )
         scenario += swapRouter
 
         # token1Amount = 10**18
@@ -660,5 +1242,8 @@ if "templates" not in __name__:
 
         sp.add_compilation_target(
             "PLYRouter",
-            Router(adminAddress.address, ctezTokenAddress.address, ctezFlatCurveAddress.address)
+            Router(
+                adminAddress.address, ctezTokenAddress.address, ctezFlatCurveAddress.address,
+                volatileFactoryAddress.address, stableFactoryAddress.address
+            )
         )
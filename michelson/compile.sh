@@ -0,0 +1,19 @@
+#!/usr/bin/env bash
+# Regenerates the compiled michelson of every compilation target, run from the repository root
+# Needs the SmartPy CLI (legacy syntax), its location can be set through SMARTPY
+set -e
+
+SMARTPY=${SMARTPY:-~/smartpy-cli/SmartPy.sh}
+OUT=$(mktemp -d)
+
+compile() {
+    "$SMARTPY" compile "$1" "$OUT"
+    cp "$OUT/$2/step_000_cont_0_contract.tz" "michelson/$3.tz"
+}
+
+compile Router.py PLYRouter Router
+compile volatileSwapDeployer/volatileDeployer.py volatileDeployer volatileDeployer
+compile stableSwapDeployer/stableDeployer.py stableDeployer stableDeployer
+compile tokenDeployer/tokenDeployer.py tokenDeployer tokenDeployer
+
+rm -rf "$OUT"
@@ -0,0 +1,79 @@
+import smartpy as sp 
+
+TokenFactory = sp.io.import_script_from_url("file:./tokenDeployer/tokenDeployer.py")
+
+StableFactory = sp.io.import_script_from_url("file:./stableSwapDeployer/stableDeployer.py")
+
+@sp.add_test(name = "Plenty Network Stable Multi Pool Deployment")
+def factoryContractTesting():
+
+    scenario = sp.test_scenario()
+
+    scenario.table_of_contents()
+
+    # Deployment Accounts 
+    adminAddress = sp.test_account("adminAddress")
+
+    VolatileContractMetaData = sp.utils.bytes_of_string('ipfs://bafkreignt37tgycplcq6vc4krbdopflxdczt5e447mylyfnai5jmjtfs6i')
+    stableContractMetadata = sp.utils.bytes_of_string('ipfs://bafkreiaqibm3yowmk3cww2m6iw72qkqj276hyw4sa2z262sjb2xuihalya')
+
+    tokenIcon = sp.utils.bytes_of_string('https://ipfs.io/ipfs/bafybeifxsyike6qcdkcaautusuyazv47mijpeiktwngjbsgwtehdq74xiy')
+    tokenSymbol = sp.utils.bytes_of_string("PNLP") 
+    tokenDecimal = sp.utils.bytes_of_string("18")
+
+    USDT = sp.test_account("USDT")
+    USDC = sp.test_account("USDC")
+    DAI = sp.test_account("DAI")
+
+    # Contract Deployments
+    tokenDeployer = TokenFactory.tokenDeployer(adminAddress.address, VolatileContractMetaData, stableContractMetadata, tokenIcon, tokenSymbol, tokenDecimal)
+    scenario += tokenDeployer
+
+    stableDeployer = StableFactory.stableFactoryContract(adminAddress.address)
+    scenario += stableDeployer
+
+    # Setting Smart Contracts
+
+    tokenDeployer.modifyStableDeployer(stableDeployer.address).run(sender = adminAddress)
+
+    stableDeployer.changeLpDeployer(tokenDeployer.address).run(sender = adminAddress)
+
+    # Deploying Stable Pool
+
+    tokenDeployer.deployStablePool(
+        tokens = {
+            0 : sp.record(tokenAddress = USDT.address, tokenId = 0, tokenType = False, tokenPrecision = 10**12),
+            1 : sp.record(tokenAddress = USDC.address, tokenId = 0, tokenType = False, tokenPrecision = 10**12),
+            2 : sp.record(tokenAddress = DAI.address, tokenId = 0, tokenType = False, tokenPrecision = 1)
+        },
+        amplification = 100,
+        tokenName = sp.utils.bytes_of_string('USDT-USDC-DAI PNLP'),
+        tokenAmounts = {},
+        userAddress = adminAddress.address
+    ).run(sender = adminAddress)
+
+    # Same token set in another order
+    tokenDeployer.deployStablePool(
+        tokens = {
+            0 : sp.record(tokenAddress = DAI.address, tokenId = 0, tokenType = False, tokenPrecision = 1),
+            1 : sp.record(tokenAddress = USDT.address, tokenId = 0, tokenType = False, tokenPrecision = 10**12),
+            2 : sp.record(tokenAddress = USDC.address, tokenId = 0, tokenType = False, tokenPrecision = 10**12)
+        },
+        amplification = 100,
+        tokenName = sp.utils.bytes_of_string('DAI-USDT-USDC PNLP'),
+        tokenAmounts = {},
+        userAddress = adminAddress.address
+    ).run(sender = adminAddress, valid = False, exception = "PoolExist")
+
+    # Repeated token
+    tokenDeployer.deployStablePool(
+        tokens = {
+            0 : sp.record(tokenAddress = USDT.address, tokenId = 0, tokenType = False, tokenPrecision = 10**12),
+            1 : sp.record(tokenAddress = USDT.address, tokenId = 0, tokenType = False, tokenPrecision = 10**12),
+            2 : sp.record(tokenAddress = DAI.address, tokenId = 0, tokenType = False, tokenPrecision = 1)
+        },
+        amplification = 100,
+        tokenName = sp.utils.bytes_of_string('USDT-USDT-DAI PNLP'),
+        tokenAmounts = {},
+        userAddress = adminAddress.address
+    ).run(sender = adminAddress, valid = False, exception = "RepeatedToken")
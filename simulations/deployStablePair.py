@@ -40,7 +40,9 @@ def factoryContractTesting():
     stableDeployer = StableFactory.stableFactoryContract(adminAddress.address)
     scenario += stableDeployer
 
-    swapRouter = Router.Router(adminAddress.address, ctezTokenAddress.address, ctezFlatCurveAddress.address)
+    volatileFactoryAddress = sp.test_account("volatileFactoryContract")
+
+    swapRouter = Router.Router(adminAddress.address, ctezTokenAddress.address, ctezFlatCurveAddress.address, volatileFactoryAddress.address, stableDeployer.address)
     scenario += swapRouter
 
     # Setting Smart Contracts
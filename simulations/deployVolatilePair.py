@@ -42,7 +42,9 @@ def factoryContractTesting():
     scenario += volatileDeployer
 
 
-    swapRouter = Router.Router(adminAddress.address, ctezTokenAddress.address, ctezFlatCurveAddress.address)
+    stableFactoryAddress = sp.test_account("stableFactoryContract")
+
+    swapRouter = Router.Router(adminAddress.address, ctezTokenAddress.address, ctezFlatCurveAddress.address, volatileDeployer.address, stableFactoryAddress.address)
     scenario += swapRouter
 
     # Setting Smart Contracts
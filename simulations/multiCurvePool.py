@@ -0,0 +1,399 @@
+import smartpy as sp
+
+Token = sp.io.import_script_from_url("file:./tokenDeployer/tokenContract.py")
+
+Swap = sp.io.import_script_from_url("file:./stableSwapDeployer/stableSwap.py")
+
+FA2 = sp.io.import_template("FA2.py")
+
+LP_FEE = 2000
+
+AMPLIFICATION = 100
+
+MAX_NEWTON_ROUNDS = 32
+
+INITIAL_LIQUIDITY = 1000
+
+# Two 6 decimal FA1.2 tokens around an 18 decimal FA2 token
+TOKEN_PRECISIONS = [10**12, 1, 10**12]
+
+TOKEN_POOLS = [10**12, 10**24, 10**12]
+
+USER_BALANCE = 10**27
+
+def getD(xp, ann):
+    """Mirrors MultiCurve.get_D
+    """
+    n = len(xp)
+    S = sum(xp)
+    D = S
+    converged = S == 0
+    rounds = 0
+    while not converged and rounds < MAX_NEWTON_ROUNDS:
+        D_P = D
+        for x in xp:
+            D_P = D_P * D // (x * n)
+        D_prev = D
+        D = (ann * S + D_P * n) * D // ((ann - 1) * D + (n + 1) * D_P)
+        converged = abs(D - D_prev) <= 1
+        rounds += 1
+    return D
+
+def getY(i, j, x, xp, D, ann):
+    """Mirrors MultiCurve.get_y
+    """
+    n = len(xp)
+    c = D
+    S_ = 0
+    for k in range(n):
+        if k != j:
+            x_k = x if k == i else xp[k]
+            S_ += x_k
+            c = c * D // (x_k * n)
+    c = c * D // (ann * n)
+    b = S_ + D // ann
+    y = D
+    converged = False
+    rounds = 0
+    while not converged and rounds < MAX_NEWTON_ROUNDS:
+        y_prev = y
+        y = (y * y + c) // (2 * y + b - D)
+        converged = abs(y - y_prev) <= 1
+        rounds += 1
+    return y
+
+def amplificationFactor(n):
+    return AMPLIFICATION * n**n
+
+def normalized(pools):
+    return [pool * precision for pool, precision in zip(pools, TOKEN_PRECISIONS)]
+
+def quoteOut(tokenIn, tokenOut, tokenAmountIn, pools):
+    """Mirrors MultiCurve.quoteDxToDy
+
+    Returns:
+        normalized output, normalized lp fee and amount of tokens bought net of the fee
+    """
+    xp = normalized(pools)
+    ann = amplificationFactor(len(xp))
+    D = getD(xp, ann)
+    y = getY(tokenIn, tokenOut, xp[tokenIn] + tokenAmountIn * TOKEN_PRECISIONS[tokenIn], xp, D, ann)
+    dy = xp[tokenOut] - y - 1
+    fee = dy // LP_FEE
+    return dy, fee, (dy - fee) // TOKEN_PRECISIONS[tokenOut]
+
+def makeFA12(scenario, administrator, exchangeAddress):
+    """Originates an FA1.2 token, exchangeAddress is the only account allowed to mint
+    """
+    token = Token.FA12()
+    token.init(
+        ledger = sp.big_map(),
+        metadata = sp.big_map({"": sp.utils.bytes_of_string("ipfs://")}),
+        token_metadata = sp.big_map(),
+        totalSupply = sp.nat(0),
+        securityCheck = False,
+        administrator = administrator,
+        exchangeAddress = exchangeAddress
+    )
+    scenario += token
+    return token
+
+def fa2Balance(token, owner):
+    return token.data.ledger[token.ledger_key.make(owner, 0)].balance
+
+class FeeDistributor(sp.Contract):
+    """Fee distributor, records the fees reported by the last forwardFee
+    """
+
+    def __init__(self):
+        self.init(
+            epoch = sp.nat(0),
+            fees = sp.map(
+                tkey = sp.TVariant(fa12 = sp.TAddress, fa2 = sp.TPair(sp.TAddress, sp.TNat), tez = sp.TUnit),
+                tvalue = sp.TNat
+            )
+        )
+
+    @sp.entry_point
+    def add_fees(self, params):
+        sp.set_type(params, sp.TRecord(
+            epoch = sp.TNat,
+            fees = sp.TMap(sp.TVariant(fa12 = sp.TAddress, fa2 = sp.TPair(sp.TAddress, sp.TNat), tez = sp.TUnit), sp.TNat)
+        ).layout(("epoch", "fees")))
+        self.data.epoch = params.epoch
+        self.data.fees = params.fees
+
+def setupPool(scenario, admin, alice):
+    """Originates a USDT (FA1.2) / DAI (FA2) / USDC (FA1.2) MultiCurve and adds its initial liquidity from alice
+
+    Returns:
+        pool, the three tokens by index and the LP token
+    """
+
+    USDT = makeFA12(scenario, admin.address, admin.address)
+
+    DAI = FA2.FA2(config = FA2.FA2_config(), metadata = sp.utils.metadata_of_url("ipfs://"), admin = admin.address)
+    scenario += DAI
+
+    USDC = makeFA12(scenario, admin.address, admin.address)
+
+    lpToken = makeFA12(scenario, admin.address, admin.address)
+
+    tokens = [USDT, DAI, USDC]
+
+    pool = Swap.MultiCurve()
+    pool.init(
+        tokens = {
+            k : sp.record(
+                tokenAddress = tokens[k].address, tokenId = sp.nat(0), tokenCheck = k == 1,
+                tokenPrecision = sp.nat(TOKEN_PRECISIONS[k]), tokenPool = sp.nat(0), tokenFee = sp.nat(0)
+            )
+            for k in range(3)
+        },
+        amplification = sp.nat(AMPLIFICATION), maxNewtonRounds = sp.nat(MAX_NEWTON_ROUNDS),
+        state = False, voterContract = sp.none,
+        lqtTotal = sp.nat(0), lpFee = sp.nat(LP_FEE), lqtAddress = lpToken.address, admin = admin.address, paused = False
+    )
+    scenario += pool
+
+    lpToken.updateExchangeAddress(pool.address).run(sender = admin)
+
+    # Funding alice
+    USDT.mint(address = alice.address, value = USER_BALANCE).run(sender = admin)
+
+    DAI.mint(
+        address = alice.address, amount = USER_BALANCE, token_id = 0,
+        metadata = FA2.FA2.make_metadata(name = "DAI", decimals = 18, symbol = "DAI")
+    ).run(sender = admin)
+
+    USDC.mint(address = alice.address, value = USER_BALANCE).run(sender = admin)
+
+    USDT.approve(spender = pool.address, value = USER_BALANCE).run(sender = alice)
+
+    USDC.approve(spender = pool.address, value = USER_BALANCE).run(sender = alice)
+
+    DAI.update_operators([
+        sp.variant("add_operator", DAI.operator_param.make(owner = alice.address, operator = pool.address, token_id = 0))
+    ]).run(sender = alice)
+
+    pool.add_liquidity(tokenMax = {k : TOKEN_POOLS[k] for k in range(3)}, recipient = alice.address).run(sender = alice)
+
+    return pool, tokens, lpToken
+
+@sp.add_test(name = "Plenty Network MultiCurve Swap")
+def swapTesting():
+
+    scenario = sp.test_scenario()
+
+    scenario.h1("MultiCurve swaps")
+
+    admin = sp.test_account("adminAddress")
+    alice = sp.test_account("alice")
+    bob = sp.test_account("bob")
+
+    pool, tokens, lpToken = setupPool(scenario, admin, alice)
+
+    USDT, DAI, USDC = tokens
+
+    # The initial LP supply is the invariant of the normalized reserves
+    D = getD(normalized(TOKEN_POOLS), amplificationFactor(3))
+
+    scenario.verify(pool.data.lqtTotal == D)
+
+    scenario.verify(lpToken.data.ledger[alice.address].balance == D - INITIAL_LIQUIDITY)
+
+    # USDT for USDC
+    tokenAmountIn = 10**11
+
+    dy, fee, tokenBought = quoteOut(0, 2, tokenAmountIn, TOKEN_POOLS)
+
+    scenario.verify(pool.get_dy(sp.record(tokenIn = 0, tokenOut = 2, tokenAmountIn = tokenAmountIn)) == tokenBought)
+
+    pool.Swap(
+        tokenIn = 0, tokenOut = 2, tokenAmountIn = tokenAmountIn, MinimumTokenOut = tokenBought + 1, recipient = bob.address
+    ).run(sender = alice, valid = False, exception = "Plenty_Network_Min_Cash_Error")
+
+    pool.Swap(
+        tokenIn = 0, tokenOut = 2, tokenAmountIn = tokenAmountIn, MinimumTokenOut = tokenBought, recipient = bob.address
+    ).run(sender = alice)
+
+    pools = [TOKEN_POOLS[0] + tokenAmountIn, TOKEN_POOLS[1], TOKEN_POOLS[2] - tokenBought]
+
+    scenario.verify(USDC.data.ledger[bob.address].balance == tokenBought)
+
+    scenario.verify(USDT.data.ledger[alice.address].balance == USER_BALANCE - TOKEN_POOLS[0] - tokenAmountIn)
+
+    scenario.verify(pool.data.tokens[0].tokenPool == pools[0])
+
+    scenario.verify(pool.data.tokens[1].tokenPool == pools[1])
+
+    scenario.verify(pool.data.tokens[2].tokenPool == pools[2])
+
+    # DAI for USDT across precisions, against the updated reserves
+    secondAmountIn = 5 * 10**22
+
+    secondDy, secondFee, secondBought = quoteOut(1, 0, secondAmountIn, pools)
+
+    pool.Swap(
+        tokenIn = 1, tokenOut = 0, tokenAmountIn = secondAmountIn, MinimumTokenOut = secondBought, recipient = bob.address
+    ).run(sender = alice)
+
+    scenario.verify(USDT.data.ledger[bob.address].balance == secondBought)
+
+    scenario.verify(pool.data.tokens[0].tokenPool == pools[0] - secondBought)
+
+    scenario.verify(pool.data.tokens[1].tokenPool == pools[1] + secondAmountIn)
+
+    scenario.verify(fa2Balance(DAI, alice.address) == USER_BALANCE - TOKEN_POOLS[1] - secondAmountIn)
+
+    # Unknown or identical indexes are rejected
+    pool.Swap(
+        tokenIn = 0, tokenOut = 0, tokenAmountIn = tokenAmountIn, MinimumTokenOut = 0, recipient = bob.address
+    ).run(sender = alice, valid = False, exception = "Plenty_Network_Invalid_Pair")
+
+    pool.Swap(
+        tokenIn = 0, tokenOut = 3, tokenAmountIn = tokenAmountIn, MinimumTokenOut = 0, recipient = bob.address
+    ).run(sender = alice, valid = False, exception = "Plenty_Network_Invalid_Pair")
+
+    # A single newton round can not solve D once the reserves are unbalanced
+    pool.ModifyNewtonRounds(1).run(sender = bob, valid = False, exception = "Plenty_Network_Not_Admin")
+
+    pool.ModifyNewtonRounds(0).run(sender = admin, valid = False)
+
+    pool.ModifyNewtonRounds(1).run(sender = admin)
+
+    pool.Swap(
+        tokenIn = 1, tokenOut = 0, tokenAmountIn = secondAmountIn, MinimumTokenOut = 0, recipient = bob.address
+    ).run(sender = alice, valid = False, exception = "Plenty_Network_No_Convergence")
+
+    pool.ModifyNewtonRounds(MAX_NEWTON_ROUNDS).run(sender = admin)
+
+@sp.add_test(name = "Plenty Network MultiCurve Liquidity")
+def liquidityTesting():
+
+    scenario = sp.test_scenario()
+
+    scenario.h1("MultiCurve liquidity")
+
+    admin = sp.test_account("adminAddress")
+    alice = sp.test_account("alice")
+    bob = sp.test_account("bob")
+
+    pool, tokens, lpToken = setupPool(scenario, admin, alice)
+
+    USDT, DAI, USDC = tokens
+
+    lqtTotal = getD(normalized(TOKEN_POOLS), amplificationFactor(3))
+
+    # The smallest share sets the LP tokens minted, every amount is rounded up
+    tokenMax = [TOKEN_POOLS[0] // 10, TOKEN_POOLS[1] // 5, TOKEN_POOLS[2] // 10]
+
+    liquidity = min(tokenMax[k] * lqtTotal // TOKEN_POOLS[k] for k in range(3))
+
+    tokenAmounts = [(liquidity * TOKEN_POOLS[k] + lqtTotal - 1) // lqtTotal for k in range(3)]
+
+    pool.add_liquidity(tokenMax = {k : tokenMax[k] for k in range(3)}, recipient = bob.address).run(sender = alice)
+
+    pools = [TOKEN_POOLS[k] + tokenAmounts[k] for k in range(3)]
+
+    lqtTotal += liquidity
+
+    scenario.verify(lpToken.data.ledger[bob.address].balance == liquidity)
+
+    scenario.verify(pool.data.lqtTotal == lqtTotal)
+
+    scenario.verify(pool.data.tokens[0].tokenPool == pools[0])
+
+    scenario.verify(pool.data.tokens[1].tokenPool == pools[1])
+
+    scenario.verify(pool.data.tokens[2].tokenPool == pools[2])
+
+    scenario.verify(fa2Balance(DAI, alice.address) == USER_BALANCE - TOKEN_POOLS[1] - tokenAmounts[1])
+
+    # Withdrawing bob's share pays every reserve pro rata
+    lpAmount = liquidity
+
+    withdrawn = [lpAmount * pools[k] // lqtTotal for k in range(3)]
+
+    pool.remove_liquidity(
+        lpAmount = lpAmount, tokenMin = {0 : withdrawn[0] + 1}, recipient = bob.address
+    ).run(sender = bob, valid = False)
+
+    pool.remove_liquidity(
+        lpAmount = lpAmount, tokenMin = {k : withdrawn[k] for k in range(3)}, recipient = bob.address
+    ).run(sender = bob)
+
+    scenario.verify(USDT.data.ledger[bob.address].balance == withdrawn[0])
+
+    scenario.verify(fa2Balance(DAI, bob.address) == withdrawn[1])
+
+    scenario.verify(USDC.data.ledger[bob.address].balance == withdrawn[2])
+
+    scenario.verify(lpToken.data.ledger[bob.address].balance == 0)
+
+    scenario.verify(pool.data.lqtTotal == lqtTotal - lpAmount)
+
+    scenario.verify(pool.data.tokens[1].tokenPool == pools[1] - withdrawn[1])
+
+    # Adding needs an amount for every token
+    pool.add_liquidity(tokenMax = {0 : tokenMax[0], 1 : tokenMax[1]}, recipient = bob.address).run(
+        sender = alice, valid = False, exception = "Plenty_Network_Invalid_LP_Ratio"
+    )
+
+@sp.add_test(name = "Plenty Network MultiCurve Ve System Fee")
+def feeTesting():
+
+    scenario = sp.test_scenario()
+
+    scenario.h1("MultiCurve fees")
+
+    admin = sp.test_account("adminAddress")
+    alice = sp.test_account("alice")
+    bob = sp.test_account("bob")
+    voter = sp.test_account("voter")
+
+    pool, tokens, lpToken = setupPool(scenario, admin, alice)
+
+    USDT, DAI, USDC = tokens
+
+    feeDistributor = FeeDistributor()
+    scenario += feeDistributor
+
+    pool.forwardFee(feeDistributor = feeDistributor.address, epoch = 1).run(sender = voter, valid = False, exception = "Plenty_Network_Invalid_State")
+
+    pool.ChangeSystem(voter.address).run(sender = admin)
+
+    # In the Ve System the fee leaves the pool into the fee bucket of the bought token
+    tokenAmountIn = 10**11
+
+    dy, fee, tokenBought = quoteOut(0, 2, tokenAmountIn, TOKEN_POOLS)
+
+    pool.Swap(
+        tokenIn = 0, tokenOut = 2, tokenAmountIn = tokenAmountIn, MinimumTokenOut = tokenBought, recipient = bob.address
+    ).run(sender = alice)
+
+    tokenFee = fee // TOKEN_PRECISIONS[2]
+
+    scenario.verify(USDC.data.ledger[bob.address].balance == tokenBought)
+
+    scenario.verify(pool.data.tokens[2].tokenPool == TOKEN_POOLS[2] - dy // TOKEN_PRECISIONS[2])
+
+    scenario.verify(pool.data.tokens[2].tokenFee == tokenFee)
+
+    scenario.verify(pool.data.tokens[0].tokenPool == TOKEN_POOLS[0] + tokenAmountIn)
+
+    pool.forwardFee(feeDistributor = feeDistributor.address, epoch = 1).run(sender = admin, valid = False, exception = "Plenty_Network_Not_Voter")
+
+    pool.forwardFee(feeDistributor = feeDistributor.address, epoch = 1).run(sender = voter)
+
+    scenario.verify(USDC.data.ledger[feeDistributor.address].balance == tokenFee)
+
+    scenario.verify(pool.data.tokens[2].tokenFee == 0)
+
+    scenario.verify(feeDistributor.data.epoch == 1)
+
+    scenario.verify(feeDistributor.data.fees[sp.variant("fa12", USDC.address)] == tokenFee)
+
+    scenario.verify(feeDistributor.data.fees[sp.variant("fa12", USDT.address)] == 0)
+
+    scenario.verify(feeDistributor.data.fees[sp.variant("fa2", (DAI.address, sp.nat(0)))] == 0)
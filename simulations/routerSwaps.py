@@ -0,0 +1,669 @@
+import smartpy as sp
+
+Token = sp.io.import_script_from_url("file:./tokenDeployer/tokenContract.py")
+
+Swap = sp.io.import_script_from_url("file:./volatileSwapDeployer/volatileSwap.py")
+
+StableSwap = sp.io.import_script_from_url("file:./stableSwapDeployer/stableSwap.py")
+
+VolatileFactory = sp.io.import_script_from_url("file:./volatileSwapDeployer/volatileDeployer.py")
+
+StableFactory = sp.io.import_script_from_url("file:./stableSwapDeployer/stableDeployer.py")
+
+Router = sp.io.import_script_from_url("file:./Router.py")
+
+FA2 = sp.io.import_template("FA2.py")
+
+LP_FEE = 1000
+
+STABLE_LP_FEE = 2000
+
+MAX_NEWTON_ROUNDS = 5
+
+USER_BALANCE = 10**15
+
+# PLY / USDT
+POOL1 = (10**12, 2 * 10**12)
+
+# USDT / KUSD
+POOL2 = (2 * 10**12, 4 * 10**12)
+
+# PLY / USDT, a second venue for split routes
+POOL3 = (2 * 10**12, 4 * 10**12)
+
+# PLY / KUSD FlatCurve, registered on the stable factory
+STABLE_POOL = (10**12, 10**12)
+
+def quoteOut(tokenAmountIn, tokenInPool, tokenOutPool):
+    """Mirrors AMM.computeTokenOut
+    """
+    lpfee = tokenAmountIn // LP_FEE
+    return tokenOutPool - (tokenInPool * tokenOutPool) // (tokenInPool + tokenAmountIn - lpfee)
+
+def quoteIn(tokenAmountOut, tokenInPool, tokenOutPool):
+    """Mirrors AMM.computeTokenIn
+    """
+    netAmountIn = (tokenInPool * tokenOutPool) // (tokenOutPool - tokenAmountOut + 1) + 1 - tokenInPool
+    tokenAmountIn = (netAmountIn // (LP_FEE - 1)) * LP_FEE + netAmountIn % (LP_FEE - 1)
+    if netAmountIn % (LP_FEE - 1) == 0:
+        tokenAmountIn -= 1
+    return max(tokenAmountIn, LP_FEE)
+
+def makeFA12(scenario, administrator, exchangeAddress):
+    """Originates an FA1.2 token, exchangeAddress is the only account allowed to mint
+    """
+    token = Token.FA12()
+    token.init(
+        ledger = sp.big_map(),
+        metadata = sp.big_map({"": sp.utils.bytes_of_string("ipfs://")}),
+        token_metadata = sp.big_map(),
+        totalSupply = sp.nat(0),
+        securityCheck = False,
+        administrator = administrator,
+        exchangeAddress = exchangeAddress
+    )
+    scenario += token
+    return token
+
+def fa2Balance(token, owner):
+    return token.data.ledger[token.ledger_key.make(owner, 0)].balance
+
+def makePool(scenario, admin, factory, token1, token1Check, token2, token2Check):
+    """Originates an empty AMM with its LP token and registers it on the volatile factory,
+    through which the Router resolves it
+    """
+
+    lpToken = makeFA12(scenario, admin.address, admin.address)
+
+    pool = Swap.AMM()
+    pool.init(
+        config = sp.big_map(
+            l = {sp.unit : sp.record(admin = admin.address, voterContract = sp.none, lpTokenAddress = lpToken.address)},
+            tkey = sp.TUnit,
+            tvalue = sp.TRecord(admin = sp.TAddress, voterContract = sp.TOption(sp.TAddress), lpTokenAddress = sp.TAddress)
+        ),
+        token1Address = token1.address, token1Id = sp.nat(0), token1Check = token1Check,
+        token2Address = token2.address, token2Id = sp.nat(0), token2Check = token2Check,
+        lpFee = sp.nat(LP_FEE),
+        state = False,
+        token1_pool = sp.nat(0),
+        token2_pool = sp.nat(0),
+        totalSupply = sp.nat(0),
+        paused = False,
+        token1_Fee = sp.nat(0),
+        token2_Fee = sp.nat(0),
+        maxSwapLimit = sp.nat(40),
+        price1CumulativeLast = sp.nat(0),
+        price2CumulativeLast = sp.nat(0),
+        blockTimestampLast = sp.timestamp(0),
+        lazyFee = False,
+        kLast = sp.nat(0)
+    )
+    scenario += pool
+
+    lpToken.updateExchangeAddress(pool.address).run(sender = admin)
+
+    factory.addExistingPair(
+        token1Address = token1.address, token1Id = 0, token1Type = token1Check,
+        token2Address = token2.address, token2Id = 0, token2Type = token2Check,
+        lpTokenAddress = lpToken.address, exchangeAddress = pool.address, routerCall = False
+    ).run(sender = admin)
+
+    return pool
+
+def makeStablePool(scenario, admin, token1, token1Check, token2, token2Check):
+    """Originates an empty FlatCurve of precision 1 for the given tokens along with its LP token
+
+    Returns:
+        pool and LP token
+    """
+
+    lpToken = makeFA12(scenario, admin.address, admin.address)
+
+    pool = StableSwap.FlatCurve()
+    pool.init(
+        token1Pool = sp.nat(0),
+        token2Pool = sp.nat(0),
+        token1Id = sp.nat(0),
+        token2Id = sp.nat(0),
+        token1Check = token1Check, token2Check = token2Check,
+        token1Precision = sp.nat(1), token2Precision = sp.nat(1),
+        token1Address = token1.address, token2Address = token2.address,
+        token1Fee = sp.nat(0), token2Fee = sp.nat(0), state = False, voterContract = sp.none,
+        lqtTotal = sp.nat(0), lpFee = sp.nat(STABLE_LP_FEE), lqtAddress = lpToken.address, admin = admin.address, paused = False,
+        maxNewtonRounds = sp.nat(MAX_NEWTON_ROUNDS), lastNewtonRounds = sp.nat(0),
+        token1PoolNormalized = sp.nat(0), token2PoolNormalized = sp.nat(0), invariant = sp.nat(0)
+    )
+    scenario += pool
+
+    lpToken.updateExchangeAddress(pool.address).run(sender = admin)
+
+    return pool, lpToken
+
+def setupRouter(scenario, admin, alice):
+    """Originates both factories, the Router and three funded AMMs: PLY / USDT, USDT / KUSD and a second PLY / USDT
+
+    Returns:
+        Router, PLY (FA1.2), USDT (FA2), KUSD (FA1.2), the three AMMs and the stable factory, which has no pair
+    """
+
+    ctezTokenAddress = sp.test_account("ctezTokenContract")
+    ctezFlatCurveAddress = sp.test_account("ctezFlatCurveContract")
+
+    factory = VolatileFactory.FactoryContract(admin.address)
+    scenario += factory
+
+    stableFactory = StableFactory.stableFactoryContract(admin.address)
+    scenario += stableFactory
+
+    swapRouter = Router.Router(admin.address, ctezTokenAddress.address, ctezFlatCurveAddress.address, factory.address, stableFactory.address)
+    scenario += swapRouter
+
+    factory.changeRouterAddress(swapRouter.address).run(sender = admin)
+
+    stableFactory.changeRouterAddress(swapRouter.address).run(sender = admin)
+
+    swapRouter.adminOperation(address = factory.address, operation = True).run(sender = admin)
+
+    swapRouter.adminOperation(address = stableFactory.address, operation = True).run(sender = admin)
+
+    PLY = makeFA12(scenario, admin.address, admin.address)
+
+    USDT = FA2.FA2(config = FA2.FA2_config(), metadata = sp.utils.metadata_of_url("ipfs://"), admin = admin.address)
+    scenario += USDT
+
+    KUSD = makeFA12(scenario, admin.address, admin.address)
+
+    pool1 = makePool(scenario, admin, factory, PLY, False, USDT, True)
+
+    pool2 = makePool(scenario, admin, factory, USDT, True, KUSD, False)
+
+    pool3 = makePool(scenario, admin, factory, PLY, False, USDT, True)
+
+    # Funding alice
+    PLY.mint(address = alice.address, value = USER_BALANCE).run(sender = admin)
+
+    USDT.mint(
+        address = alice.address, amount = USER_BALANCE, token_id = 0,
+        metadata = FA2.FA2.make_metadata(name = "USDT", decimals = 6, symbol = "USDT")
+    ).run(sender = admin)
+
+    KUSD.mint(address = alice.address, value = USER_BALANCE).run(sender = admin)
+
+    PLY.approve(spender = pool1.address, value = USER_BALANCE).run(sender = alice)
+
+    PLY.approve(spender = pool3.address, value = USER_BALANCE).run(sender = alice)
+
+    KUSD.approve(spender = pool2.address, value = USER_BALANCE).run(sender = alice)
+
+    USDT.update_operators([
+        sp.variant("add_operator", USDT.operator_param.make(owner = alice.address, operator = pool.address, token_id = 0))
+        for pool in [pool1, pool2, pool3]
+    ]).run(sender = alice)
+
+    pool1.AddLiquidity(token1_max = POOL1[0], token2_max = POOL1[1], recipient = alice.address).run(sender = alice)
+
+    pool2.AddLiquidity(token1_max = POOL2[0], token2_max = POOL2[1], recipient = alice.address).run(sender = alice)
+
+    pool3.AddLiquidity(token1_max = POOL3[0], token2_max = POOL3[1], recipient = alice.address).run(sender = alice)
+
+    return swapRouter, PLY, USDT, KUSD, pool1, pool2, pool3, stableFactory
+
+def hop(exchange, token, minimumOutput = 0):
+    return sp.record(exchangeAddress = exchange.address, requiredTokenAddress = token.address, requiredTokenId = sp.nat(0), minimumOutput = sp.nat(minimumOutput))
+
+@sp.add_test(name = "Plenty Network Router Quoted Swap")
+def routerSwapQuotedTesting():
+
+    scenario = sp.test_scenario()
+
+    scenario.h1("Quoted multi hop swaps")
+
+    admin = sp.test_account("adminAddress")
+    alice = sp.test_account("alice")
+    bob = sp.test_account("bob")
+
+    swapRouter, PLY, USDT, KUSD, pool1, pool2, pool3, stableFactory = setupRouter(scenario, admin, alice)
+
+    SwapAmount = 10**10
+
+    PLY.mint(address = swapRouter.address, value = SwapAmount).run(sender = admin)
+
+    # PLY -> USDT -> KUSD
+    usdtOut = quoteOut(SwapAmount, POOL1[0], POOL1[1])
+
+    kusdOut = quoteOut(usdtOut, POOL2[0], POOL2[1])
+
+    swapRouter.routerSwapQuoted(
+        recipient = bob.address, SwapAmount = SwapAmount,
+        Route = {0: hop(pool1, USDT), 1: hop(pool2, KUSD, kusdOut + 1)}
+    ).run(sender = alice, valid = False, exception = "Plenty_Network_Router_Slippage")
+
+    swapRouter.routerSwapQuoted(
+        recipient = bob.address, SwapAmount = SwapAmount,
+        Route = {0: hop(pool1, USDT), 1: hop(pool1, PLY)}
+    ).run(sender = alice, valid = False, exception = "Plenty_Network_Router_Repeated_Exchange")
+
+    swapRouter.routerSwapQuoted(
+        recipient = bob.address, SwapAmount = SwapAmount,
+        Route = {0: hop(pool1, USDT), 1: hop(pool2, KUSD, kusdOut)}
+    ).run(sender = alice)
+
+    scenario.verify(KUSD.data.ledger[bob.address].balance == kusdOut)
+
+    scenario.verify(PLY.data.ledger[swapRouter.address].balance == 0)
+
+    scenario.verify(fa2Balance(USDT, swapRouter.address) == 0)
+
+    scenario.verify((pool1.data.token1_pool == POOL1[0] + SwapAmount) & (pool1.data.token2_pool == POOL1[1] - usdtOut))
+
+    scenario.verify((pool2.data.token1_pool == POOL2[0] + usdtOut) & (pool2.data.token2_pool == POOL2[1] - kusdOut))
+
+    # Exchanges unknown to the factories are rejected
+    swapRouter.routerSwapQuoted(
+        recipient = bob.address, SwapAmount = SwapAmount,
+        Route = {0: hop(PLY, USDT)}
+    ).run(sender = alice, valid = False, exception = "Plenty_Network_Router_Invalid_Exchange")
+
+@sp.add_test(name = "Plenty Network Router Balance Callbacks")
+def routerSwapTesting():
+
+    scenario = sp.test_scenario()
+
+    scenario.h1("Callback priced multi hop swaps")
+
+    admin = sp.test_account("adminAddress")
+    alice = sp.test_account("alice")
+    bob = sp.test_account("bob")
+
+    swapRouter, PLY, USDT, KUSD, pool1, pool2, pool3, stableFactory = setupRouter(scenario, admin, alice)
+
+    # A stray callback only records a value, which continueRoute never consumes outside of a route
+    swapRouter.faOneCallBack(10**20).run(sender = bob)
+
+    swapRouter.faTwoCallBack([
+        sp.record(request = sp.record(owner = swapRouter.address, token_id = 0), balance = 10**20)
+    ]).run(sender = bob)
+
+    Route = {0: hop(pool1, USDT), 1: hop(pool2, KUSD)}
+
+    swapRouter.continueRoute(Route = Route, counter = 1, recipient = bob.address).run(sender = bob, valid = False, exception = "Plenty_Network_Router_Bad_State")
+
+    # PLY -> USDT -> KUSD, the second hop swaps the USDT balance reported by the FA2 callback
+    SwapAmount = 10**10
+
+    PLY.mint(address = swapRouter.address, value = SwapAmount).run(sender = admin)
+
+    usdtOut = quoteOut(SwapAmount, POOL1[0], POOL1[1])
+
+    kusdOut = quoteOut(usdtOut, POOL2[0], POOL2[1])
+
+    swapRouter.routerSwap(
+        recipient = bob.address, SwapAmount = SwapAmount,
+        Route = {0: hop(pool1, USDT, usdtOut), 1: hop(pool2, KUSD, kusdOut)}
+    ).run(sender = alice)
+
+    scenario.verify(KUSD.data.ledger[bob.address].balance == kusdOut)
+
+    scenario.verify(fa2Balance(USDT, swapRouter.address) == 0)
+
+    # The stray value was overwritten by the USDT callback and consumed by the second hop
+    scenario.verify(swapRouter.data.pendingBalance.is_none())
+
+    # KUSD -> USDT -> PLY, the second hop swaps the USDT balance again and the last hop pays bob
+    KUSD.mint(address = swapRouter.address, value = kusdOut).run(sender = admin)
+
+    usdtBack = quoteOut(kusdOut, POOL2[1] - kusdOut, POOL2[0] + usdtOut)
+
+    plyBack = quoteOut(usdtBack, POOL1[1] - usdtOut, POOL1[0] + SwapAmount)
+
+    swapRouter.routerSwap(
+        recipient = bob.address, SwapAmount = kusdOut,
+        Route = {0: hop(pool2, USDT), 1: hop(pool1, PLY, plyBack)}
+    ).run(sender = alice)
+
+    scenario.verify(PLY.data.ledger[bob.address].balance == plyBack)
+
+    # A routed swap leaves the router storage as it found it
+    scenario.verify(swapRouter.data.pendingBalance.is_none())
+
+@sp.add_test(name = "Plenty Network Router Split Swap")
+def routerSplitSwapTesting():
+
+    scenario = sp.test_scenario()
+
+    scenario.h1("Split route swaps")
+
+    admin = sp.test_account("adminAddress")
+    alice = sp.test_account("alice")
+    bob = sp.test_account("bob")
+
+    swapRouter, PLY, USDT, KUSD, pool1, pool2, pool3, stableFactory = setupRouter(scenario, admin, alice)
+
+    # PLY -> USDT through pool1 and pool3 weighted 1 : 2, pool3 takes the remainder
+    SwapAmount = 3 * 10**10 + 2
+
+    PLY.mint(address = swapRouter.address, value = SwapAmount).run(sender = admin)
+
+    firstAmount = SwapAmount // 3
+
+    secondAmount = SwapAmount - firstAmount
+
+    firstOut = quoteOut(firstAmount, POOL1[0], POOL1[1])
+
+    secondOut = quoteOut(secondAmount, POOL3[0], POOL3[1])
+
+    Routes = [
+        sp.record(weight = 1, Route = {0: hop(pool1, USDT)}),
+        sp.record(weight = 2, Route = {0: hop(pool3, USDT)})
+    ]
+
+    swapRouter.routerSplitSwap(
+        recipient = bob.address, SwapAmount = SwapAmount, minimumOutput = firstOut + secondOut + 1, Routes = Routes
+    ).run(sender = alice, valid = False, exception = "Plenty_Network_Router_Slippage")
+
+    swapRouter.routerSplitSwap(
+        recipient = bob.address, SwapAmount = SwapAmount, minimumOutput = firstOut + secondOut,
+        Routes = [sp.record(weight = 1, Route = {0: hop(pool1, USDT)}), sp.record(weight = 2, Route = {0: hop(pool2, KUSD)})]
+    ).run(sender = alice, valid = False, exception = "Plenty_Network_Router_Invalid_Exchange")
+
+    swapRouter.routerSplitSwap(
+        recipient = bob.address, SwapAmount = SwapAmount, minimumOutput = firstOut + secondOut,
+        Routes = [sp.record(weight = 1, Route = {0: hop(pool1, USDT)}), sp.record(weight = 2, Route = {0: hop(pool1, USDT)})]
+    ).run(sender = alice, valid = False, exception = "Plenty_Network_Router_Repeated_Exchange")
+
+    # Both routes end in USDT, but the second one would spend KUSD
+    swapRouter.routerSplitSwap(
+        recipient = bob.address, SwapAmount = SwapAmount, minimumOutput = 0,
+        Routes = [sp.record(weight = 1, Route = {0: hop(pool1, USDT)}), sp.record(weight = 2, Route = {0: hop(pool2, USDT)})]
+    ).run(sender = alice, valid = False, exception = "Plenty_Network_Router_Invalid_Exchange")
+
+    swapRouter.routerSplitSwap(
+        recipient = bob.address, SwapAmount = SwapAmount, minimumOutput = firstOut + secondOut, Routes = Routes
+    ).run(sender = alice)
+
+    # Every unit of the input is routed and the aggregate output is paid
+    scenario.verify(PLY.data.ledger[swapRouter.address].balance == 0)
+
+    scenario.verify(fa2Balance(USDT, bob.address) == firstOut + secondOut)
+
+    scenario.verify(pool1.data.token1_pool == POOL1[0] + firstAmount)
+
+    scenario.verify(pool3.data.token1_pool == POOL3[0] + secondAmount)
+
+    # A share rounding down to zero skips its route, the input goes to the others
+    smallAmount = 10**6
+
+    PLY.mint(address = swapRouter.address, value = smallAmount).run(sender = admin)
+
+    smallOut = quoteOut(smallAmount, POOL3[0] + secondAmount, POOL3[1] - secondOut)
+
+    swapRouter.routerSplitSwap(
+        recipient = bob.address, SwapAmount = smallAmount, minimumOutput = smallOut,
+        Routes = [sp.record(weight = 1, Route = {0: hop(pool1, USDT)}), sp.record(weight = 10**7, Route = {0: hop(pool3, USDT)})]
+    ).run(sender = alice)
+
+    scenario.verify(pool1.data.token1_pool == POOL1[0] + firstAmount)
+
+    scenario.verify(pool3.data.token1_pool == POOL3[0] + secondAmount + smallAmount)
+
+    scenario.verify(fa2Balance(USDT, bob.address) == firstOut + secondOut + smallOut)
+
+    swapRouter.routerSplitSwap(
+        recipient = bob.address, SwapAmount = 0, minimumOutput = 0, Routes = Routes
+    ).run(sender = alice, valid = False, exception = "Plenty_Network_Router_Zero_Swap")
+
+@sp.add_test(name = "Plenty Network Router Batch Swap")
+def batchRouterSwapTesting():
+
+    scenario = sp.test_scenario()
+
+    scenario.h1("Batched router swaps")
+
+    admin = sp.test_account("adminAddress")
+    alice = sp.test_account("alice")
+    bob = sp.test_account("bob")
+    carol = sp.test_account("carol")
+
+    swapRouter, PLY, USDT, KUSD, pool1, pool2, pool3, stableFactory = setupRouter(scenario, admin, alice)
+
+    firstAmount = 10**10
+
+    secondAmount = 2 * 10**10
+
+    PLY.mint(address = swapRouter.address, value = firstAmount + secondAmount).run(sender = admin)
+
+    # The jobs trade on pool1 and pool3, both quoted before any of them executes
+    firstOut = quoteOut(firstAmount, POOL1[0], POOL1[1])
+
+    secondOut = quoteOut(secondAmount, POOL3[0], POOL3[1])
+
+    swapRouter.batchRouterSwap([
+        sp.record(recipient = bob.address, SwapAmount = firstAmount, minimumOutput = firstOut, Route = {0: hop(pool1, USDT)}),
+        sp.record(recipient = carol.address, SwapAmount = secondAmount, minimumOutput = secondOut + 1, Route = {0: hop(pool3, USDT)})
+    ]).run(sender = alice, valid = False, exception = "Plenty_Network_Router_Slippage")
+
+    # An exchange can not be used by two jobs of one batch
+    swapRouter.batchRouterSwap([
+        sp.record(recipient = bob.address, SwapAmount = firstAmount, minimumOutput = 0, Route = {0: hop(pool1, USDT)}),
+        sp.record(recipient = carol.address, SwapAmount = secondAmount, minimumOutput = 0, Route = {0: hop(pool1, USDT)})
+    ]).run(sender = alice, valid = False, exception = "Plenty_Network_Router_Repeated_Exchange")
+
+    swapRouter.batchRouterSwap([
+        sp.record(recipient = bob.address, SwapAmount = firstAmount, minimumOutput = firstOut, Route = {0: hop(pool1, USDT)}),
+        sp.record(recipient = carol.address, SwapAmount = secondAmount, minimumOutput = secondOut, Route = {0: hop(pool3, USDT)})
+    ]).run(sender = alice)
+
+    scenario.verify(fa2Balance(USDT, bob.address) == firstOut)
+
+    scenario.verify(fa2Balance(USDT, carol.address) == secondOut)
+
+    scenario.verify(PLY.data.ledger[swapRouter.address].balance == 0)
+
+    scenario.verify(pool1.data.token1_pool == POOL1[0] + firstAmount)
+
+    scenario.verify(pool1.data.token2_pool == POOL1[1] - firstOut)
+
+    scenario.verify(pool3.data.token1_pool == POOL3[0] + secondAmount)
+
+    scenario.verify(pool3.data.token2_pool == POOL3[1] - secondOut)
+
+    swapRouter.batchRouterSwap([
+        sp.record(recipient = bob.address, SwapAmount = firstAmount, minimumOutput = 0, Route = {})
+    ]).run(sender = alice, valid = False, exception = "Plenty_Network_Router_Small_Route")
+
+@sp.add_test(name = "Plenty Network Router Exact Output Swap")
+def routerSwapExactOutTesting():
+
+    scenario = sp.test_scenario()
+
+    scenario.h1("Exact output multi hop swaps")
+
+    admin = sp.test_account("adminAddress")
+    alice = sp.test_account("alice")
+    bob = sp.test_account("bob")
+
+    swapRouter, PLY, USDT, KUSD, pool1, pool2, pool3, stableFactory = setupRouter(scenario, admin, alice)
+
+    PLY.approve(spender = swapRouter.address, value = USER_BALANCE).run(sender = alice)
+
+    # PLY -> USDT -> KUSD, quoted backwards from the KUSD output
+    tokenAmountOut = 5 * 10**10
+
+    usdtIn = quoteIn(tokenAmountOut, POOL2[0], POOL2[1])
+
+    plyIn = quoteIn(usdtIn, POOL1[0], POOL1[1])
+
+    Route = {
+        0: sp.record(exchangeAddress = pool1.address, requiredTokenAddress = USDT.address, requiredTokenId = 0),
+        1: sp.record(exchangeAddress = pool2.address, requiredTokenAddress = KUSD.address, requiredTokenId = 0)
+    }
+
+    swapRouter.routerSwapExactOut(
+        recipient = bob.address, tokenAmountOut = tokenAmountOut, maxAmountIn = plyIn - 1, Route = Route
+    ).run(sender = alice, valid = False, exception = "Plenty_Network_Router_Slippage")
+
+    swapRouter.routerSwapExactOut(
+        recipient = bob.address, tokenAmountOut = tokenAmountOut, maxAmountIn = plyIn, Route = Route
+    ).run(sender = alice)
+
+    # Only the quoted input is pulled and every hop takes exactly what the previous one returned
+    scenario.verify(KUSD.data.ledger[bob.address].balance == tokenAmountOut)
+
+    scenario.verify(PLY.data.ledger[alice.address].balance == USER_BALANCE - POOL1[0] - POOL3[0] - plyIn)
+
+    scenario.verify(PLY.data.ledger[swapRouter.address].balance == 0)
+
+    scenario.verify(fa2Balance(USDT, swapRouter.address) == 0)
+
+    scenario.verify((pool1.data.token1_pool == POOL1[0] + plyIn) & (pool1.data.token2_pool == POOL1[1] - usdtIn))
+
+    scenario.verify((pool2.data.token1_pool == POOL2[0] + usdtIn) & (pool2.data.token2_pool == POOL2[1] - tokenAmountOut))
+
+    # ctez hops have no quote view
+    ctezFlatCurveAddress = sp.test_account("ctezFlatCurveContract")
+
+    swapRouter.routerSwapExactOut(
+        recipient = bob.address, tokenAmountOut = tokenAmountOut, maxAmountIn = USER_BALANCE,
+        Route = {0: sp.record(exchangeAddress = ctezFlatCurveAddress.address, requiredTokenAddress = PLY.address, requiredTokenId = 0)}
+    ).run(sender = alice, valid = False, exception = "Plenty_Network_Router_No_Quote")
+
+    swapRouter.routerSwapExactOut(
+        recipient = bob.address, tokenAmountOut = 0, maxAmountIn = USER_BALANCE, Route = Route
+    ).run(sender = alice, valid = False, exception = "Plenty_Network_Router_Zero_Swap")
+
+@sp.add_test(name = "Plenty Network Router Quote Route")
+def quoteRouteTesting():
+
+    scenario = sp.test_scenario()
+
+    scenario.h1("Route quotes")
+
+    admin = sp.test_account("adminAddress")
+    alice = sp.test_account("alice")
+    bob = sp.test_account("bob")
+
+    swapRouter, PLY, USDT, KUSD, pool1, pool2, pool3, stableFactory = setupRouter(scenario, admin, alice)
+
+    SwapAmount = 10**10
+
+    Route = {0: hop(pool1, USDT), 1: hop(pool2, KUSD)}
+
+    usdtOut = quoteOut(SwapAmount, POOL1[0], POOL1[1])
+
+    kusdOut = quoteOut(usdtOut, POOL2[0], POOL2[1])
+
+    quote = swapRouter.quoteRoute(sp.record(SwapAmount = SwapAmount, Route = Route))
+
+    scenario.verify(quote.hopOutputs[0] == usdtOut)
+
+    scenario.verify(quote.hopOutputs[1] == kusdOut)
+
+    scenario.verify(quote.tokenAmountOut == kusdOut)
+
+    # The quote is what the route pays when executed in the same state
+    PLY.mint(address = swapRouter.address, value = SwapAmount).run(sender = admin)
+
+    swapRouter.routerSwapQuoted(
+        recipient = bob.address, SwapAmount = SwapAmount,
+        Route = {0: hop(pool1, USDT), 1: hop(pool2, KUSD, kusdOut)}
+    ).run(sender = alice)
+
+    scenario.verify(KUSD.data.ledger[bob.address].balance == kusdOut)
+
+    # Later quotes follow the updated reserves
+    scenario.verify(
+        swapRouter.quoteRoute(sp.record(SwapAmount = SwapAmount, Route = Route)).tokenAmountOut ==
+        quoteOut(quoteOut(SwapAmount, POOL1[0] + SwapAmount, POOL1[1] - usdtOut), POOL2[0] + usdtOut, POOL2[1] - kusdOut)
+    )
+
+@sp.add_test(name = "Plenty Network Router Exchange Listing")
+def exchangeListingTesting():
+
+    scenario = sp.test_scenario()
+
+    scenario.h1("Exchange resolution, delisting and relisting")
+
+    admin = sp.test_account("adminAddress")
+    alice = sp.test_account("alice")
+    bob = sp.test_account("bob")
+
+    swapRouter, PLY, USDT, KUSD, pool1, pool2, pool3, stableFactory = setupRouter(scenario, admin, alice)
+
+    SwapAmount = 10**10
+
+    PLY.mint(address = swapRouter.address, value = 3 * SwapAmount).run(sender = admin)
+
+    # Tokens are approved on the first swap through an exchange
+    scenario.verify(~ swapRouter.data.approvals.contains(pool1.address))
+
+    firstOut = quoteOut(SwapAmount, POOL1[0], POOL1[1])
+
+    swapRouter.routerSwapQuoted(
+        recipient = bob.address, SwapAmount = SwapAmount, Route = {0: hop(pool1, USDT, firstOut)}
+    ).run(sender = alice)
+
+    scenario.verify(swapRouter.data.approvals[pool1.address].contains(sp.pair(PLY.address, sp.nat(0))))
+
+    # Delisting revokes the approvals and stops the exchange from resolving
+    swapRouter.DeleteExchange(pool1.address).run(sender = alice, valid = False, exception = "Plenty_Network_Router_Not_Admin")
+
+    swapRouter.DeleteExchange(pool1.address).run(sender = admin)
+
+    scenario.verify(~ swapRouter.data.approvals.contains(pool1.address))
+
+    scenario.verify(swapRouter.data.delistedExchanges.contains(pool1.address))
+
+    swapRouter.routerSwapQuoted(
+        recipient = bob.address, SwapAmount = SwapAmount, Route = {0: hop(pool1, USDT)}
+    ).run(sender = alice, valid = False, exception = "Plenty_Network_Router_Invalid_Exchange")
+
+    # Only admins relist, and only delisted exchanges
+    swapRouter.relistExchange(pool1.address).run(sender = alice, valid = False, exception = "Plenty_Network_Router_Not_Admin")
+
+    swapRouter.relistExchange(pool1.address).run(sender = admin)
+
+    swapRouter.relistExchange(pool1.address).run(sender = admin, valid = False, exception = "Plenty_Network_Router_Invalid_Exchange")
+
+    scenario.verify(~ swapRouter.data.delistedExchanges.contains(pool1.address))
+
+    secondOut = quoteOut(SwapAmount, POOL1[0] + SwapAmount, POOL1[1] - firstOut)
+
+    swapRouter.routerSwapQuoted(
+        recipient = bob.address, SwapAmount = SwapAmount, Route = {0: hop(pool1, USDT, secondOut)}
+    ).run(sender = alice)
+
+    scenario.verify(fa2Balance(USDT, bob.address) == firstOut + secondOut)
+
+    scenario.verify(swapRouter.data.approvals[pool1.address].contains(sp.pair(PLY.address, sp.nat(0))))
+
+    # An exchange missing from the volatile factory resolves through the stable one
+    stablePool, stableLpToken = makeStablePool(scenario, admin, PLY, False, KUSD, False)
+
+    swapRouter.routerSwapQuoted(
+        recipient = bob.address, SwapAmount = SwapAmount, Route = {0: hop(stablePool, KUSD)}
+    ).run(sender = alice, valid = False, exception = "Plenty_Network_Router_Invalid_Exchange")
+
+    stableFactory.addExistingPair(
+        token1Address = PLY.address, token1Id = 0, token1Type = False, token1Precision = 1,
+        token2Address = KUSD.address, token2Id = 0, token2Type = False, token2Precision = 1,
+        lpTokenAddress = stableLpToken.address, exchangeAddress = stablePool.address, routerCall = False
+    ).run(sender = admin)
+
+    PLY.approve(spender = stablePool.address, value = USER_BALANCE).run(sender = alice)
+
+    KUSD.approve(spender = stablePool.address, value = USER_BALANCE).run(sender = alice)
+
+    stablePool.add_liquidity(token1_max = STABLE_POOL[0], token2_max = STABLE_POOL[1], recipient = alice.address).run(sender = alice)
+
+    stableOut = scenario.compute(stablePool.get_dy(sp.record(tokenAmountIn = SwapAmount, requiredTokenAddress = KUSD.address, requiredTokenId = sp.nat(0))))
+
+    swapRouter.routerSwapQuoted(
+        recipient = bob.address, SwapAmount = SwapAmount, Route = {0: hop(stablePool, KUSD)}
+    ).run(sender = alice)
+
+    scenario.verify(KUSD.data.ledger[bob.address].balance == stableOut)
+
+    scenario.verify(PLY.data.ledger[swapRouter.address].balance == 0)
+
+    scenario.verify(stablePool.data.token1Pool == STABLE_POOL[0] + SwapAmount)
@@ -38,7 +38,7 @@ def factoryContractTesting():
     stableDeployer = StableFactory.stableFactoryContract(adminAddress.address)
     scenario += stableDeployer
 
-    swapRouter = Router.Router(adminAddress.address, ctezTokenAddress.address, ctezFlatCurveAddress.address)
+    swapRouter = Router.Router(adminAddress.address, ctezTokenAddress.address, ctezFlatCurveAddress.address, volatileDeployer.address, stableDeployer.address)
     scenario += swapRouter
 
     # Setting Smart Contracts
@@ -0,0 +1,833 @@
+import smartpy as sp
+
+Token = sp.io.import_script_from_url("file:./tokenDeployer/tokenContract.py")
+
+Swap = sp.io.import_script_from_url("file:./stableSwapDeployer/stableSwap.py")
+
+FA2 = sp.io.import_template("FA2.py")
+
+LP_FEE = 2000
+
+MAX_NEWTON_ROUNDS = 5
+
+EXACT_OUT_NEWTON_ROUNDS = 32
+
+TOKEN_POOL = 10**12
+
+USER_BALANCE = 10**15
+
+def util(x, y):
+    """Mirrors FlatCurve.util
+    """
+    plus = x + y
+    minus = x - y
+    return abs(plus**8 - minus**8), 8 * abs(minus**7 + plus**7)
+
+def newton(tokenAmountIn, tokenInPool, tokenOutPool, invariant, maxRounds = MAX_NEWTON_ROUNDS):
+    """Mirrors FlatCurve.newton_dx_to_dy
+
+    Returns:
+        normalized output, whether the solve converged and util at the last newton round
+    """
+    dy = 0
+    rounds = 0
+    converged = False
+    while not converged and rounds < maxRounds:
+        first, second = util(tokenInPool + tokenAmountIn, abs(tokenOutPool - dy))
+        delta = abs(first - invariant) // second
+        if delta == 0:
+            converged = True
+        else:
+            dy += delta
+        rounds += 1
+    return dy, converged, (first, second)
+
+def quoteOut(tokenAmountIn, tokenInPool, tokenOutPool, invariant, maxRounds = MAX_NEWTON_ROUNDS, state = False):
+    """Mirrors FlatCurve.Swap for pools of precision 1
+
+    Returns:
+        amount of tokens bought, net of the lp fee, and the curve invariant cached after the swap
+    """
+    dy, converged, (first, second) = newton(tokenAmountIn, tokenInPool, tokenOutPool, invariant, maxRounds)
+    tokenBought = dy - dy // LP_FEE
+    tokenRemoved = dy if state else tokenBought
+    if converged:
+        invariant = first + (dy - tokenRemoved) * second
+    else:
+        invariant = util(tokenInPool + tokenAmountIn, tokenOutPool - tokenRemoved)[0]
+    return tokenBought, invariant
+
+def quoteAddSingle(tokenAmount, tokenInPool, tokenOutPool, lqtTotal, state):
+    """Mirrors FlatCurve.add_liquidity_single for pools of precision 1
+
+    Returns:
+        LP tokens minted, fee accrued in the other token and the reserves of the supplied and the other token afterwards
+    """
+    priceNum = util(tokenOutPool, tokenInPool)[1]
+    priceDen = util(tokenInPool, tokenOutPool)[1]
+    swapAmount = (tokenAmount * tokenOutPool * priceDen) // (tokenOutPool * priceDen + priceNum * (tokenInPool + tokenAmount))
+    dy = newton(swapAmount, tokenInPool, tokenOutPool, util(tokenInPool, tokenOutPool)[0])[0]
+    fee = dy // LP_FEE
+    tokenBought = dy - fee
+    if state:
+        tokenOutPool = tokenOutPool - dy + tokenBought
+    else:
+        fee = 0
+    tokenInPool += swapAmount
+    liquidity = min((tokenAmount - swapAmount) * lqtTotal // tokenInPool, tokenBought * lqtTotal // (tokenOutPool - tokenBought))
+    return liquidity, fee, tokenInPool + tokenAmount - swapAmount, tokenOutPool
+
+def quoteRemoveSingle(lpAmount, tokenOutPool, tokenInPool, lqtTotal, state):
+    """Mirrors FlatCurve.remove_liquidity_single for pools of precision 1, the other token is swapped into the required one
+
+    Returns:
+        tokens sent to the recipient, fee accrued in the required token and the reserves of the required and the other token afterwards
+    """
+    tokenOutAmount = lpAmount * tokenOutPool // lqtTotal
+    tokenInAmount = lpAmount * tokenInPool // lqtTotal
+    tokenOutPool -= tokenOutAmount
+    tokenInPool -= tokenInAmount
+    dy = newton(tokenInAmount, tokenInPool, tokenOutPool, util(tokenInPool, tokenOutPool)[0])[0]
+    fee = dy // LP_FEE
+    tokenBought = dy - fee
+    if state:
+        tokenOutPool -= dy
+    else:
+        tokenOutPool -= tokenBought
+        fee = 0
+    return tokenOutAmount + tokenBought, fee, tokenOutPool, tokenInPool + tokenInAmount
+
+def quoteIn(tokenAmountOut, tokenInPool, tokenOutPool):
+    """Mirrors FlatCurve.quoteDyToDx for pools of precision 1
+
+    Returns:
+        amount of tokens sold, newton rounds used and whether the solve converged
+    """
+    invariant = util(tokenInPool, tokenOutPool)[0]
+    newTokenOutPool = tokenOutPool - (tokenAmountOut * LP_FEE + LP_FEE - 2) // (LP_FEE - 1)
+    dx = 0
+    rounds = 0
+    converged = False
+    while not converged and rounds < EXACT_OUT_NEWTON_ROUNDS:
+        first, second = util(newTokenOutPool, tokenInPool + dx)
+        if first < invariant:
+            dx += (invariant - first + second - 1) // second
+        else:
+            delta = (first - invariant) // second
+            if delta == 0:
+                converged = True
+            else:
+                dx = abs(dx - delta)
+        rounds += 1
+    return dx, rounds, converged
+
+def makeFA12(scenario, administrator, exchangeAddress):
+    """Originates an FA1.2 token, exchangeAddress is the only account allowed to mint
+    """
+    token = Token.FA12()
+    token.init(
+        ledger = sp.big_map(),
+        metadata = sp.big_map({"": sp.utils.bytes_of_string("ipfs://")}),
+        token_metadata = sp.big_map(),
+        totalSupply = sp.nat(0),
+        securityCheck = False,
+        administrator = administrator,
+        exchangeAddress = exchangeAddress
+    )
+    scenario += token
+    return token
+
+def fa2Balance(token, owner, tokenId = 0):
+    return token.data.ledger[token.ledger_key.make(owner, tokenId)].balance
+
+class FeeDistributor(sp.Contract):
+    """Fee distributor, records the fees reported by the last forwardFee
+    """
+
+    def __init__(self):
+        self.init(
+            epoch = sp.nat(0),
+            fees = sp.map(
+                tkey = sp.TVariant(fa12 = sp.TAddress, fa2 = sp.TPair(sp.TAddress, sp.TNat), tez = sp.TUnit),
+                tvalue = sp.TNat
+            )
+        )
+
+    @sp.entry_point
+    def add_fees(self, params):
+        sp.set_type(params, sp.TRecord(
+            epoch = sp.TNat,
+            fees = sp.TMap(sp.TVariant(fa12 = sp.TAddress, fa2 = sp.TPair(sp.TAddress, sp.TNat), tez = sp.TUnit), sp.TNat)
+        ).layout(("epoch", "fees")))
+        self.data.epoch = params.epoch
+        self.data.fees = params.fees
+
+def originatePool(scenario, admin, token1Address, token1Id, token1Check, token2Address, token2Id, token2Check):
+    """Originates an empty FlatCurve of precision 1 for the given pair along with its LP token
+
+    Returns:
+        pool and LP token
+    """
+
+    lpToken = makeFA12(scenario, admin.address, admin.address)
+
+    pool = Swap.FlatCurve()
+    pool.init(
+        token1Pool = sp.nat(0),
+        token2Pool = sp.nat(0),
+        token1Id = token1Id,
+        token2Id = token2Id,
+        token1Check = token1Check, token2Check = token2Check,
+        token1Precision = sp.nat(1), token2Precision = sp.nat(1),
+        token1Address = token1Address, token2Address = token2Address,
+        token1Fee = sp.nat(0), token2Fee = sp.nat(0), state = False, voterContract = sp.none,
+        lqtTotal = sp.nat(0), lpFee = sp.nat(LP_FEE), lqtAddress = lpToken.address, admin = admin.address, paused = False,
+        maxNewtonRounds = sp.nat(MAX_NEWTON_ROUNDS), lastNewtonRounds = sp.nat(0),
+        token1PoolNormalized = sp.nat(0), token2PoolNormalized = sp.nat(0), invariant = sp.nat(0)
+    )
+    scenario += pool
+
+    lpToken.updateExchangeAddress(pool.address).run(sender = admin)
+
+    return pool, lpToken
+
+def setupPool(scenario, admin, alice):
+    """Originates a USDT (FA1.2) / USDC (FA2) FlatCurve and adds its initial liquidity from alice
+
+    Returns:
+        pool, USDT token, USDC token and LP token
+    """
+
+    USDT = makeFA12(scenario, admin.address, admin.address)
+
+    USDC = FA2.FA2(config = FA2.FA2_config(), metadata = sp.utils.metadata_of_url("ipfs://"), admin = admin.address)
+    scenario += USDC
+
+    pool, lpToken = originatePool(scenario, admin, USDT.address, sp.nat(0), False, USDC.address, sp.nat(0), True)
+
+    # Funding alice
+    USDT.mint(address = alice.address, value = USER_BALANCE).run(sender = admin)
+
+    USDC.mint(
+        address = alice.address, amount = USER_BALANCE, token_id = 0,
+        metadata = FA2.FA2.make_metadata(name = "USDC", decimals = 6, symbol = "USDC")
+    ).run(sender = admin)
+
+    USDT.approve(spender = pool.address, value = USER_BALANCE).run(sender = alice)
+
+    USDC.update_operators([
+        sp.variant("add_operator", USDC.operator_param.make(owner = alice.address, operator = pool.address, token_id = 0))
+    ]).run(sender = alice)
+
+    pool.add_liquidity(token1_max = TOKEN_POOL, token2_max = TOKEN_POOL, recipient = alice.address).run(sender = alice)
+
+    return pool, USDT, USDC, lpToken
+
+@sp.add_test(name = "Plenty Network Stable Pool SwapExactOut")
+def swapExactOutTesting():
+
+    scenario = sp.test_scenario()
+
+    scenario.h1("Exact output swaps")
+
+    admin = sp.test_account("adminAddress")
+    alice = sp.test_account("alice")
+    bob = sp.test_account("bob")
+
+    pool, USDT, USDC, lpToken = setupPool(scenario, admin, alice)
+
+    # Buying USDC with USDT
+    tokenAmountOut = 10**11
+
+    tokenAmountIn, rounds, converged = quoteIn(tokenAmountOut, TOKEN_POOL, TOKEN_POOL)
+
+    scenario.verify(pool.get_dx(sp.record(tokenAmountOut = tokenAmountOut, requiredTokenAddress = USDC.address, requiredTokenId = 0)) == tokenAmountIn)
+
+    pool.SwapExactOut(
+        tokenAmountOut = tokenAmountOut, maxTokenIn = tokenAmountIn - 1, recipient = bob.address,
+        requiredTokenAddress = USDC.address, requiredTokenId = 0
+    ).run(sender = alice, valid = False, exception = "Plenty_Network_Max_Cash_Error")
+
+    pool.SwapExactOut(
+        tokenAmountOut = tokenAmountOut, maxTokenIn = tokenAmountIn, recipient = bob.address,
+        requiredTokenAddress = USDC.address, requiredTokenId = 0
+    ).run(sender = alice)
+
+    scenario.verify(fa2Balance(USDC, bob.address) == tokenAmountOut)
+
+    scenario.verify(USDT.data.ledger[alice.address].balance == USER_BALANCE - TOKEN_POOL - tokenAmountIn)
+
+    scenario.verify(pool.data.token1Pool == TOKEN_POOL + tokenAmountIn)
+
+    scenario.verify(pool.data.token2Pool == TOKEN_POOL - tokenAmountOut)
+
+    scenario.verify(pool.data.lastNewtonRounds == rounds)
+
+    # The charged input never lets the curve invariant fall
+    scenario.verify(pool.data.invariant >= util(TOKEN_POOL, TOKEN_POOL)[0])
+
+    # Draining the pool needs more newton rounds than the exact output solve allows
+    drainAmountOut = TOKEN_POOL - tokenAmountOut - 10**9
+
+    pool.SwapExactOut(
+        tokenAmountOut = drainAmountOut, maxTokenIn = USER_BALANCE, recipient = bob.address,
+        requiredTokenAddress = USDC.address, requiredTokenId = 0
+    ).run(sender = alice, valid = False, exception = "Plenty_Network_No_Convergence")
+
+@sp.add_test(name = "Plenty Network Stable Pool BatchSwap")
+def batchSwapTesting():
+
+    scenario = sp.test_scenario()
+
+    scenario.h1("Batched swaps")
+
+    admin = sp.test_account("adminAddress")
+    alice = sp.test_account("alice")
+    bob = sp.test_account("bob")
+
+    pool, USDT, USDC, lpToken = setupPool(scenario, admin, alice)
+
+    # USDT for USDC paid to bob, then USDC back to USDT paid to alice
+    firstAmountIn = 5 * 10**10
+
+    firstAmountOut, invariant = quoteOut(firstAmountIn, TOKEN_POOL, TOKEN_POOL, util(TOKEN_POOL, TOKEN_POOL)[0])
+
+    token1Pool = TOKEN_POOL + firstAmountIn
+
+    token2Pool = TOKEN_POOL - firstAmountOut
+
+    secondAmountIn = 2 * 10**10
+
+    secondAmountOut, invariant = quoteOut(secondAmountIn, token2Pool, token1Pool, invariant)
+
+    token1Pool -= secondAmountOut
+
+    token2Pool += secondAmountIn
+
+    swaps = [
+        sp.record(tokenAmountIn = firstAmountIn, MinimumTokenOut = firstAmountOut, recipient = bob.address, requiredTokenAddress = USDC.address, requiredTokenId = 0),
+        sp.record(tokenAmountIn = secondAmountIn, MinimumTokenOut = secondAmountOut, recipient = alice.address, requiredTokenAddress = USDT.address, requiredTokenId = 0)
+    ]
+
+    # A single unmet minimum reverts the whole batch
+    pool.BatchSwap([
+        swaps[0],
+        sp.record(tokenAmountIn = secondAmountIn, MinimumTokenOut = secondAmountOut + 1, recipient = alice.address, requiredTokenAddress = USDT.address, requiredTokenId = 0)
+    ]).run(sender = alice, valid = False, exception = "Plenty_Network_Min_Cash_Error")
+
+    pool.BatchSwap(swaps).run(sender = alice)
+
+    scenario.verify(pool.data.token1Pool == token1Pool)
+
+    scenario.verify(pool.data.token2Pool == token2Pool)
+
+    scenario.verify(fa2Balance(USDC, bob.address) == firstAmountOut)
+
+    # alice only settles her net flows
+    scenario.verify(USDT.data.ledger[alice.address].balance == USER_BALANCE - TOKEN_POOL - firstAmountIn + secondAmountOut)
+
+    scenario.verify(fa2Balance(USDC, alice.address) == USER_BALANCE - TOKEN_POOL - secondAmountIn)
+
+    scenario.verify(pool.data.invariant == invariant)
+
+@sp.add_test(name = "Plenty Network Stable Pool Invariant Cache")
+def invariantCacheTesting():
+
+    scenario = sp.test_scenario()
+
+    scenario.h1("Cached invariant across swaps")
+
+    admin = sp.test_account("adminAddress")
+    alice = sp.test_account("alice")
+    bob = sp.test_account("bob")
+
+    pool, USDT, USDC, lpToken = setupPool(scenario, admin, alice)
+
+    # A converged solve moves the invariant from its last newton round
+    firstAmountIn = 10**10
+
+    firstAmountOut, invariant = quoteOut(firstAmountIn, TOKEN_POOL, TOKEN_POOL, util(TOKEN_POOL, TOKEN_POOL)[0])
+
+    token1Pool = TOKEN_POOL + firstAmountIn
+
+    token2Pool = TOKEN_POOL - firstAmountOut
+
+    pool.Swap(
+        tokenAmountIn = firstAmountIn, MinimumTokenOut = firstAmountOut, recipient = bob.address,
+        requiredTokenAddress = USDC.address, requiredTokenId = 0
+    ).run(sender = alice)
+
+    scenario.verify(pool.data.lastNewtonRounds < MAX_NEWTON_ROUNDS)
+
+    scenario.verify(pool.data.token1PoolNormalized == token1Pool)
+
+    scenario.verify(pool.data.token2PoolNormalized == token2Pool)
+
+    scenario.verify(pool.data.invariant == invariant)
+
+    # The step along the curve never overshoots the exact invariant
+    scenario.verify(pool.data.invariant <= util(token1Pool, token2Pool)[0])
+
+    # An unconverged solve re-evaluates the curve at the new reserves
+    secondAmountIn = 2 * 10**11
+
+    secondAmountOut, invariant = quoteOut(secondAmountIn, token2Pool, token1Pool, invariant)
+
+    token1Pool -= secondAmountOut
+
+    token2Pool += secondAmountIn
+
+    pool.Swap(
+        tokenAmountIn = secondAmountIn, MinimumTokenOut = secondAmountOut, recipient = bob.address,
+        requiredTokenAddress = USDT.address, requiredTokenId = 0
+    ).run(sender = alice)
+
+    scenario.verify(pool.data.lastNewtonRounds == MAX_NEWTON_ROUNDS)
+
+    scenario.verify(pool.data.token1PoolNormalized == token1Pool)
+
+    scenario.verify(pool.data.token2PoolNormalized == token2Pool)
+
+    scenario.verify(pool.data.invariant == util(token1Pool, token2Pool)[0])
+
+    scenario.verify(pool.data.invariant == invariant)
+
+@sp.add_test(name = "Plenty Network Stable Pool Single Sided Liquidity")
+def singleLiquidityTesting():
+
+    scenario = sp.test_scenario()
+
+    scenario.h1("Single sided liquidity")
+
+    admin = sp.test_account("adminAddress")
+    alice = sp.test_account("alice")
+    bob = sp.test_account("bob")
+
+    for state in [False, True]:
+
+        scenario.h2("Ve System" if state else "Before the Ve System")
+
+        pool, USDT, USDC, lpToken = setupPool(scenario, admin, alice)
+
+        if state:
+            pool.ChangeSystem(admin.address).run(sender = admin)
+
+        lqtTotal = 2 * TOKEN_POOL
+
+        scenario.verify(pool.data.lqtTotal == lqtTotal)
+
+        # Zapping USDT in
+        tokenAmount = 10**11
+
+        liquidity, token2Fee, token1Pool, token2Pool = quoteAddSingle(tokenAmount, TOKEN_POOL, TOKEN_POOL, lqtTotal, state)
+
+        pool.add_liquidity_single(
+            tokenAddress = USDT.address, tokenId = 0, tokenAmount = tokenAmount, minLqt = liquidity + 1, recipient = bob.address
+        ).run(sender = alice, valid = False, exception = "Plenty_Network_Min_Cash_Error")
+
+        pool.add_liquidity_single(
+            tokenAddress = USDT.address, tokenId = 0, tokenAmount = tokenAmount, minLqt = liquidity, recipient = bob.address
+        ).run(sender = alice)
+
+        lqtTotal += liquidity
+
+        scenario.verify(pool.data.token1Pool == token1Pool)
+
+        scenario.verify(pool.data.token2Pool == token2Pool)
+
+        scenario.verify(pool.data.token2Fee == token2Fee)
+
+        scenario.verify(pool.data.lqtTotal == lqtTotal)
+
+        scenario.verify(lpToken.data.ledger[bob.address].balance == liquidity)
+
+        scenario.verify(USDT.data.ledger[alice.address].balance == USER_BALANCE - TOKEN_POOL - tokenAmount)
+
+        scenario.verify(pool.data.invariant == util(token1Pool, token2Pool)[0])
+
+        # Zapping USDC in against the updated reserves
+        secondAmount = 5 * 10**10
+
+        secondLiquidity, token1Fee, token2Pool, token1Pool = quoteAddSingle(secondAmount, token2Pool, token1Pool, lqtTotal, state)
+
+        pool.add_liquidity_single(
+            tokenAddress = USDC.address, tokenId = 0, tokenAmount = secondAmount, minLqt = secondLiquidity + 1, recipient = bob.address
+        ).run(sender = alice, valid = False, exception = "Plenty_Network_Min_Cash_Error")
+
+        pool.add_liquidity_single(
+            tokenAddress = USDC.address, tokenId = 0, tokenAmount = secondAmount, minLqt = secondLiquidity, recipient = bob.address
+        ).run(sender = alice)
+
+        lqtTotal += secondLiquidity
+
+        scenario.verify(pool.data.token1Pool == token1Pool)
+
+        scenario.verify(pool.data.token2Pool == token2Pool)
+
+        scenario.verify(pool.data.token1Fee == token1Fee)
+
+        scenario.verify(lpToken.data.ledger[bob.address].balance == liquidity + secondLiquidity)
+
+        scenario.verify(fa2Balance(USDC, alice.address) == USER_BALANCE - TOKEN_POOL - secondAmount)
+
+        # Withdrawing as USDT only, bob's USDC share is swapped on the curve
+        tokenOut, removeFee, token1Pool, token2Pool = quoteRemoveSingle(liquidity, token1Pool, token2Pool, lqtTotal, state)
+
+        pool.remove_liquidity_single(
+            lpAmount = liquidity, requiredTokenAddress = USDT.address, requiredTokenId = 0, minTokenOut = tokenOut + 1, recipient = bob.address
+        ).run(sender = bob, valid = False, exception = "Plenty_Network_Min_Cash_Error")
+
+        pool.remove_liquidity_single(
+            lpAmount = liquidity, requiredTokenAddress = USDT.address, requiredTokenId = 0, minTokenOut = tokenOut, recipient = bob.address
+        ).run(sender = bob)
+
+        lqtTotal -= liquidity
+
+        scenario.verify(pool.data.token1Pool == token1Pool)
+
+        scenario.verify(pool.data.token2Pool == token2Pool)
+
+        scenario.verify(pool.data.token1Fee == token1Fee + removeFee)
+
+        scenario.verify(pool.data.lqtTotal == lqtTotal)
+
+        scenario.verify(lpToken.data.ledger[bob.address].balance == secondLiquidity)
+
+        scenario.verify(USDT.data.ledger[bob.address].balance == tokenOut)
+
+        # Withdrawing the rest as USDC only
+        secondTokenOut, secondRemoveFee, token2Pool, token1Pool = quoteRemoveSingle(secondLiquidity, token2Pool, token1Pool, lqtTotal, state)
+
+        pool.remove_liquidity_single(
+            lpAmount = secondLiquidity, requiredTokenAddress = USDC.address, requiredTokenId = 0, minTokenOut = secondTokenOut, recipient = bob.address
+        ).run(sender = bob)
+
+        scenario.verify(pool.data.token1Pool == token1Pool)
+
+        scenario.verify(pool.data.token2Pool == token2Pool)
+
+        scenario.verify(pool.data.token2Fee == token2Fee + secondRemoveFee)
+
+        scenario.verify(lpToken.data.ledger[bob.address].balance == 0)
+
+        scenario.verify(fa2Balance(USDC, bob.address) == secondTokenOut)
+
+@sp.add_test(name = "Plenty Network Stable Pool Newton Rounds")
+def newtonRoundsTesting():
+
+    scenario = sp.test_scenario()
+
+    scenario.h1("Newton rounds cap")
+
+    admin = sp.test_account("adminAddress")
+    alice = sp.test_account("alice")
+    bob = sp.test_account("bob")
+
+    pool, USDT, USDC, lpToken = setupPool(scenario, admin, alice)
+
+    scenario.verify(pool.data.maxNewtonRounds == MAX_NEWTON_ROUNDS)
+
+    # A small trade on a balanced pool converges before the cap
+    tokenAmountIn = 10**9
+
+    tokenAmountOut, invariant = quoteOut(tokenAmountIn, TOKEN_POOL, TOKEN_POOL, util(TOKEN_POOL, TOKEN_POOL)[0])
+
+    pool.Swap(
+        tokenAmountIn = tokenAmountIn, MinimumTokenOut = tokenAmountOut, recipient = bob.address,
+        requiredTokenAddress = USDC.address, requiredTokenId = 0
+    ).run(sender = alice)
+
+    scenario.verify(pool.data.lastNewtonRounds < MAX_NEWTON_ROUNDS)
+
+    scenario.verify(fa2Balance(USDC, bob.address) == tokenAmountOut)
+
+    # Only the admin can change the cap, and never to zero
+    pool.ModifyNewtonRounds(1).run(sender = alice, valid = False, exception = "Plenty_Network_Not_Admin")
+
+    pool.ModifyNewtonRounds(0).run(sender = admin, valid = False)
+
+    pool.ModifyNewtonRounds(1).run(sender = admin)
+
+    scenario.verify(pool.data.maxNewtonRounds == 1)
+
+    # A single round stops short of the curve, so the trader gets less than the converged quote
+    secondAmountOut, invariant = quoteOut(tokenAmountIn, TOKEN_POOL + tokenAmountIn, TOKEN_POOL - tokenAmountOut, invariant, 1)
+
+    pool.Swap(
+        tokenAmountIn = tokenAmountIn, MinimumTokenOut = secondAmountOut + 1, recipient = bob.address,
+        requiredTokenAddress = USDC.address, requiredTokenId = 0
+    ).run(sender = alice, valid = False, exception = "Plenty_Network_Min_Cash_Error")
+
+    pool.Swap(
+        tokenAmountIn = tokenAmountIn, MinimumTokenOut = secondAmountOut, recipient = bob.address,
+        requiredTokenAddress = USDC.address, requiredTokenId = 0
+    ).run(sender = alice)
+
+    scenario.verify(pool.data.lastNewtonRounds == 1)
+
+    scenario.verify(fa2Balance(USDC, bob.address) == tokenAmountOut + secondAmountOut)
+
+    scenario.verify(pool.data.invariant == invariant)
+
+@sp.add_test(name = "Plenty Network Stable Pool Views and Events")
+def viewsAndEventsTesting():
+
+    scenario = sp.test_scenario()
+
+    scenario.h1("Pool state, quotes and the values carried by events")
+
+    scenario.p("Scenarios cannot read emitted events, so every payload is checked against the state it is built from")
+
+    admin = sp.test_account("adminAddress")
+    alice = sp.test_account("alice")
+    bob = sp.test_account("bob")
+    voter = sp.test_account("voter")
+
+    pool, USDT, USDC, lpToken = setupPool(scenario, admin, alice)
+
+    feeDistributor = FeeDistributor()
+    scenario += feeDistributor
+
+    lqtTotal = 2 * TOKEN_POOL
+
+    poolState = pool.getPoolState()
+
+    scenario.verify(poolState.token1Pool == TOKEN_POOL)
+
+    scenario.verify(poolState.token2Pool == TOKEN_POOL)
+
+    scenario.verify((poolState.token1Precision == 1) & (poolState.token2Precision == 1))
+
+    scenario.verify(poolState.lpFee == LP_FEE)
+
+    scenario.verify(poolState.lqtTotal == lqtTotal)
+
+    scenario.verify(~ poolState.paused)
+
+    scenario.verify(~ poolState.state)
+
+    # get_dy quotes Swap in both directions
+    tokenAmountIn = 10**10
+
+    invariant = util(TOKEN_POOL, TOKEN_POOL)[0]
+
+    tokenAmountOut, invariant = quoteOut(tokenAmountIn, TOKEN_POOL, TOKEN_POOL, invariant)
+
+    scenario.verify(pool.get_dy(sp.record(tokenAmountIn = tokenAmountIn, requiredTokenAddress = USDC.address, requiredTokenId = 0)) == tokenAmountOut)
+
+    scenario.verify(pool.get_dy(sp.record(tokenAmountIn = tokenAmountIn, requiredTokenAddress = USDT.address, requiredTokenId = 0)) == tokenAmountOut)
+
+    # Swap event: the lp fee stays in the pool before the Ve System
+    pool.Swap(
+        tokenAmountIn = tokenAmountIn, MinimumTokenOut = tokenAmountOut, recipient = bob.address,
+        requiredTokenAddress = USDC.address, requiredTokenId = 0
+    ).run(sender = alice)
+
+    token1Pool = TOKEN_POOL + tokenAmountIn
+
+    token2Pool = TOKEN_POOL - tokenAmountOut
+
+    scenario.verify(fa2Balance(USDC, bob.address) == tokenAmountOut)
+
+    scenario.verify(pool.getPoolState().token1Pool == token1Pool)
+
+    scenario.verify(pool.getPoolState().token2Pool == token2Pool)
+
+    scenario.verify((pool.data.token1Fee == 0) & (pool.data.token2Fee == 0))
+
+    # Swap events in the Ve System report the fee as system fee, taken out of the reserves
+    pool.ChangeSystem(voter.address).run(sender = admin)
+
+    scenario.verify(pool.getPoolState().state)
+
+    secondAmountIn = 2 * 10**10
+
+    token1Fee = newton(secondAmountIn, token2Pool, token1Pool, invariant)[0] // LP_FEE
+
+    secondAmountOut, invariant = quoteOut(secondAmountIn, token2Pool, token1Pool, invariant, state = True)
+
+    pool.Swap(
+        tokenAmountIn = secondAmountIn, MinimumTokenOut = secondAmountOut, recipient = bob.address,
+        requiredTokenAddress = USDT.address, requiredTokenId = 0
+    ).run(sender = alice)
+
+    token1Pool -= secondAmountOut + token1Fee
+
+    token2Pool += secondAmountIn
+
+    scenario.verify(USDT.data.ledger[bob.address].balance == secondAmountOut)
+
+    scenario.verify(pool.data.token1Pool == token1Pool)
+
+    scenario.verify(pool.data.token2Pool == token2Pool)
+
+    scenario.verify(pool.data.token1Fee == token1Fee)
+
+    thirdAmountIn = 10**10
+
+    token2Fee = newton(thirdAmountIn, token1Pool, token2Pool, invariant)[0] // LP_FEE
+
+    thirdAmountOut, invariant = quoteOut(thirdAmountIn, token1Pool, token2Pool, invariant, state = True)
+
+    pool.Swap(
+        tokenAmountIn = thirdAmountIn, MinimumTokenOut = thirdAmountOut, recipient = bob.address,
+        requiredTokenAddress = USDC.address, requiredTokenId = 0
+    ).run(sender = alice)
+
+    token1Pool += thirdAmountIn
+
+    token2Pool -= thirdAmountOut + token2Fee
+
+    scenario.verify(pool.data.token2Fee == token2Fee)
+
+    scenario.verify(pool.data.invariant == invariant)
+
+    # forwardFee event: the fees reported are the ones sent to the fee distributor, through two
+    # separate transfers as USDT and USDC live in different contracts
+    pool.forwardFee(feeDistributor = feeDistributor.address, epoch = 3).run(sender = voter)
+
+    scenario.verify(USDT.data.ledger[feeDistributor.address].balance == token1Fee)
+
+    scenario.verify(fa2Balance(USDC, feeDistributor.address) == token2Fee)
+
+    scenario.verify(feeDistributor.data.epoch == 3)
+
+    scenario.verify(feeDistributor.data.fees[sp.variant("fa12", USDT.address)] == token1Fee)
+
+    scenario.verify(feeDistributor.data.fees[sp.variant("fa2", (USDC.address, sp.nat(0)))] == token2Fee)
+
+    scenario.verify((pool.data.token1Fee == 0) & (pool.data.token2Fee == 0))
+
+    # RemoveLiquidity event: amounts are the pro rata share of the reserves
+    lpAmount = lqtTotal // 10
+
+    token1Amount = lpAmount * token1Pool // lqtTotal
+
+    token2Amount = lpAmount * token2Pool // lqtTotal
+
+    pool.remove_liquidity(lpAmount = lpAmount, token1_min = token1Amount, token2_min = token2Amount, recipient = alice.address).run(sender = alice)
+
+    poolState = pool.getPoolState()
+
+    scenario.verify(poolState.token1Pool == token1Pool - token1Amount)
+
+    scenario.verify(poolState.token2Pool == token2Pool - token2Amount)
+
+    scenario.verify(poolState.lqtTotal == lqtTotal - lpAmount)
+
+    scenario.verify(USDT.data.ledger[alice.address].balance == USER_BALANCE - TOKEN_POOL - tokenAmountIn - thirdAmountIn + token1Amount)
+
+    scenario.verify(fa2Balance(USDC, alice.address) == USER_BALANCE - TOKEN_POOL - secondAmountIn + token2Amount)
+
+@sp.add_test(name = "Plenty Network Stable Pool Same FA2 Pair")
+def sameFA2PairTesting():
+
+    scenario = sp.test_scenario()
+
+    scenario.h1("Both tokens are ids of one FA2 contract")
+
+    admin = sp.test_account("adminAddress")
+    alice = sp.test_account("alice")
+    bob = sp.test_account("bob")
+    voter = sp.test_account("voter")
+
+    tokens = FA2.FA2(config = FA2.FA2_config(), metadata = sp.utils.metadata_of_url("ipfs://"), admin = admin.address)
+    scenario += tokens
+
+    pool, lpToken = originatePool(scenario, admin, tokens.address, sp.nat(0), True, tokens.address, sp.nat(1), True)
+
+    feeDistributor = FeeDistributor()
+    scenario += feeDistributor
+
+    tokens.mint(
+        address = alice.address, amount = USER_BALANCE, token_id = 0,
+        metadata = FA2.FA2.make_metadata(name = "USDT", decimals = 6, symbol = "USDT")
+    ).run(sender = admin)
+
+    tokens.mint(
+        address = alice.address, amount = USER_BALANCE, token_id = 1,
+        metadata = FA2.FA2.make_metadata(name = "USDC", decimals = 6, symbol = "USDC")
+    ).run(sender = admin)
+
+    tokens.update_operators([
+        sp.variant("add_operator", tokens.operator_param.make(owner = alice.address, operator = pool.address, token_id = 0)),
+        sp.variant("add_operator", tokens.operator_param.make(owner = alice.address, operator = pool.address, token_id = 1))
+    ]).run(sender = alice)
+
+    # Both deposits are pulled in a single FA2 transfer
+    pool.add_liquidity(token1_max = TOKEN_POOL, token2_max = TOKEN_POOL, recipient = alice.address).run(sender = alice)
+
+    lqtTotal = 2 * TOKEN_POOL
+
+    scenario.verify(fa2Balance(tokens, alice.address, 0) == USER_BALANCE - TOKEN_POOL)
+
+    scenario.verify(fa2Balance(tokens, alice.address, 1) == USER_BALANCE - TOKEN_POOL)
+
+    scenario.verify(fa2Balance(tokens, pool.address, 0) == TOKEN_POOL)
+
+    scenario.verify(fa2Balance(tokens, pool.address, 1) == TOKEN_POOL)
+
+    # Accruing system fees on both sides
+    pool.ChangeSystem(voter.address).run(sender = admin)
+
+    tokenAmountIn = 10**10
+
+    invariant = util(TOKEN_POOL, TOKEN_POOL)[0]
+
+    token2Fee = newton(tokenAmountIn, TOKEN_POOL, TOKEN_POOL, invariant)[0] // LP_FEE
+
+    tokenAmountOut, invariant = quoteOut(tokenAmountIn, TOKEN_POOL, TOKEN_POOL, invariant, state = True)
+
+    pool.Swap(
+        tokenAmountIn = tokenAmountIn, MinimumTokenOut = tokenAmountOut, recipient = bob.address,
+        requiredTokenAddress = tokens.address, requiredTokenId = 1
+    ).run(sender = alice)
+
+    token1Pool = TOKEN_POOL + tokenAmountIn
+
+    token2Pool = TOKEN_POOL - tokenAmountOut - token2Fee
+
+    token1Fee = newton(tokenAmountIn, token2Pool, token1Pool, invariant)[0] // LP_FEE
+
+    secondAmountOut, invariant = quoteOut(tokenAmountIn, token2Pool, token1Pool, invariant, state = True)
+
+    pool.Swap(
+        tokenAmountIn = tokenAmountIn, MinimumTokenOut = secondAmountOut, recipient = bob.address,
+        requiredTokenAddress = tokens.address, requiredTokenId = 0
+    ).run(sender = alice)
+
+    token1Pool -= secondAmountOut + token1Fee
+
+    token2Pool += tokenAmountIn
+
+    scenario.verify(fa2Balance(tokens, bob.address, 1) == tokenAmountOut)
+
+    scenario.verify(fa2Balance(tokens, bob.address, 0) == secondAmountOut)
+
+    # Both fees leave in a single FA2 transfer
+    pool.forwardFee(feeDistributor = feeDistributor.address, epoch = 1).run(sender = voter)
+
+    scenario.verify(fa2Balance(tokens, feeDistributor.address, 0) == token1Fee)
+
+    scenario.verify(fa2Balance(tokens, feeDistributor.address, 1) == token2Fee)
+
+    scenario.verify(feeDistributor.data.fees[sp.variant("fa2", (tokens.address, sp.nat(0)))] == token1Fee)
+
+    scenario.verify(feeDistributor.data.fees[sp.variant("fa2", (tokens.address, sp.nat(1)))] == token2Fee)
+
+    # Both withdrawals are paid in a single FA2 transfer
+    lpAmount = lqtTotal // 2
+
+    token1Amount = lpAmount * token1Pool // lqtTotal
+
+    token2Amount = lpAmount * token2Pool // lqtTotal
+
+    pool.remove_liquidity(lpAmount = lpAmount, token1_min = token1Amount, token2_min = token2Amount, recipient = alice.address).run(sender = alice)
+
+    scenario.verify(fa2Balance(tokens, alice.address, 0) == USER_BALANCE - TOKEN_POOL - tokenAmountIn + token1Amount)
+
+    scenario.verify(fa2Balance(tokens, alice.address, 1) == USER_BALANCE - TOKEN_POOL - tokenAmountIn + token2Amount)
+
+    scenario.verify(fa2Balance(tokens, pool.address, 0) == token1Pool - token1Amount)
+
+    scenario.verify(fa2Balance(tokens, pool.address, 1) == token2Pool - token2Amount)
@@ -0,0 +1,813 @@
+import math
+
+import smartpy as sp
+
+Token = sp.io.import_script_from_url("file:./tokenDeployer/tokenContract.py")
+
+Swap = sp.io.import_script_from_url("file:./volatileSwapDeployer/volatileSwap.py")
+
+FA2 = sp.io.import_template("FA2.py")
+
+LP_FEE = 1000
+
+PRICE_PRECISION = 2 ** 112
+
+TOKEN1_POOL = 10**12
+
+TOKEN2_POOL = 2 * 10**12
+
+USER_BALANCE = 10**15
+
+def quoteOut(tokenAmountIn, tokenInPool, tokenOutPool):
+    """Mirrors AMM.computeTokenOut
+    """
+    lpfee = tokenAmountIn // LP_FEE
+    return tokenOutPool - (tokenInPool * tokenOutPool) // (tokenInPool + tokenAmountIn - lpfee)
+
+def quoteIn(tokenAmountOut, tokenInPool, tokenOutPool):
+    """Mirrors AMM.computeTokenIn
+    """
+    netAmountIn = (tokenInPool * tokenOutPool) // (tokenOutPool - tokenAmountOut + 1) + 1 - tokenInPool
+    tokenAmountIn = (netAmountIn // (LP_FEE - 1)) * LP_FEE + netAmountIn % (LP_FEE - 1)
+    if netAmountIn % (LP_FEE - 1) == 0:
+        tokenAmountIn -= 1
+    return max(tokenAmountIn, LP_FEE)
+
+def quoteSingle(tokenAmount, tokenInPool, tokenOutPool, totalSupply):
+    """Mirrors AMM.AddLiquiditySingle outside of the Ve System
+
+    Returns:
+        swapped amount, LP tokens minted and the reserves of the supplied and the other token afterwards
+    """
+    feeFactor = 2 * LP_FEE - 1
+    swapAmount = (math.isqrt(tokenInPool * tokenInPool * feeFactor * feeFactor + 4 * LP_FEE * (LP_FEE - 1) * tokenAmount * tokenInPool) - tokenInPool * feeFactor) // (2 * (LP_FEE - 1))
+    tokenBought = quoteOut(swapAmount, tokenInPool, tokenOutPool)
+    newTokenInPool = tokenInPool + swapAmount
+    newTokenOutPool = tokenOutPool - tokenBought
+    liquidity = min((tokenAmount - swapAmount) * totalSupply // newTokenInPool, tokenBought * totalSupply // newTokenOutPool)
+    return swapAmount, liquidity, tokenInPool + tokenAmount, tokenOutPool
+
+def makeFA12(scenario, administrator, exchangeAddress):
+    """Originates an FA1.2 token, exchangeAddress is the only account allowed to mint
+    """
+    token = Token.FA12()
+    token.init(
+        ledger = sp.big_map(),
+        metadata = sp.big_map({"": sp.utils.bytes_of_string("ipfs://")}),
+        token_metadata = sp.big_map(),
+        totalSupply = sp.nat(0),
+        securityCheck = False,
+        administrator = administrator,
+        exchangeAddress = exchangeAddress
+    )
+    scenario += token
+    return token
+
+def fa2Balance(token, owner, tokenId = 0):
+    return token.data.ledger[token.ledger_key.make(owner, tokenId)].balance
+
+class FlashBorrower(sp.Contract):
+    """FlashSwap borrower, repays from its own balance once the callback has run
+    """
+
+    def __init__(self, pool):
+        self.init(pool = pool, lastAmountIn = sp.nat(0))
+
+    @sp.entry_point
+    def approveToken(self, params):
+        sp.set_type(params, sp.TRecord(tokenAddress = sp.TAddress, spender = sp.TAddress, value = sp.TNat))
+        approveHandle = sp.contract(
+            sp.TRecord(spender = sp.TAddress, value = sp.TNat).layout(("spender", "value")),
+            params.tokenAddress,
+            "approve"
+        ).open_some()
+        sp.transfer(sp.record(spender = params.spender, value = params.value), sp.mutez(0), approveHandle)
+
+    @sp.entry_point
+    def borrow(self, params):
+        sp.set_type(params, sp.TRecord(tokenAmountOut = sp.TNat, maxTokenIn = sp.TNat, requiredTokenAddress = sp.TAddress, requiredTokenId = sp.TNat))
+        callbackType = sp.TRecord(tokenAmountIn = sp.TNat, tokenAmountOut = sp.TNat, requiredTokenAddress = sp.TAddress, requiredTokenId = sp.TNat, data = sp.TBytes)
+        flashSwapHandle = sp.contract(
+            sp.TRecord(
+                tokenAmountOut = sp.TNat, maxTokenIn = sp.TNat, recipient = sp.TAddress,
+                requiredTokenAddress = sp.TAddress, requiredTokenId = sp.TNat,
+                callback = sp.TContract(callbackType), data = sp.TBytes
+            ),
+            self.data.pool,
+            "FlashSwap"
+        ).open_some()
+        sp.transfer(
+            sp.record(
+                tokenAmountOut = params.tokenAmountOut, maxTokenIn = params.maxTokenIn, recipient = sp.self_address,
+                requiredTokenAddress = params.requiredTokenAddress, requiredTokenId = params.requiredTokenId,
+                callback = sp.self_entry_point(entry_point = "onFlashSwap"), data = sp.bytes("0x00")
+            ),
+            sp.mutez(0),
+            flashSwapHandle
+        )
+
+    @sp.entry_point
+    def onFlashSwap(self, params):
+        sp.set_type(params, sp.TRecord(tokenAmountIn = sp.TNat, tokenAmountOut = sp.TNat, requiredTokenAddress = sp.TAddress, requiredTokenId = sp.TNat, data = sp.TBytes))
+        sp.verify(sp.sender == self.data.pool)
+        self.data.lastAmountIn = params.tokenAmountIn
+
+class FeeDistributor(sp.Contract):
+    """Fee distributor, records the fees reported by the last forwardFee
+    """
+
+    def __init__(self):
+        self.init(
+            epoch = sp.nat(0),
+            fees = sp.map(
+                tkey = sp.TVariant(fa12 = sp.TAddress, fa2 = sp.TPair(sp.TAddress, sp.TNat), tez = sp.TUnit),
+                tvalue = sp.TNat
+            )
+        )
+
+    @sp.entry_point
+    def add_fees(self, params):
+        sp.set_type(params, sp.TRecord(
+            epoch = sp.TNat,
+            fees = sp.TMap(sp.TVariant(fa12 = sp.TAddress, fa2 = sp.TPair(sp.TAddress, sp.TNat), tez = sp.TUnit), sp.TNat)
+        ).layout(("epoch", "fees")))
+        self.data.epoch = params.epoch
+        self.data.fees = params.fees
+
+def originatePool(scenario, admin, token1Address, token1Id, token1Check, token2Address, token2Id, token2Check):
+    """Originates an empty AMM for the given pair along with its LP token
+
+    Returns:
+        pool and LP token
+    """
+
+    lpToken = makeFA12(scenario, admin.address, admin.address)
+
+    pool = Swap.AMM()
+    pool.init(
+        config = sp.big_map(
+            l = {sp.unit : sp.record(admin = admin.address, voterContract = sp.none, lpTokenAddress = lpToken.address)},
+            tkey = sp.TUnit,
+            tvalue = sp.TRecord(admin = sp.TAddress, voterContract = sp.TOption(sp.TAddress), lpTokenAddress = sp.TAddress)
+        ),
+        token1Address = token1Address, token1Id = token1Id, token1Check = token1Check,
+        token2Address = token2Address, token2Id = token2Id, token2Check = token2Check,
+        lpFee = sp.nat(LP_FEE),
+        state = False,
+        token1_pool = sp.nat(0),
+        token2_pool = sp.nat(0),
+        totalSupply = sp.nat(0),
+        paused = False,
+        token1_Fee = sp.nat(0),
+        token2_Fee = sp.nat(0),
+        maxSwapLimit = sp.nat(40),
+        price1CumulativeLast = sp.nat(0),
+        price2CumulativeLast = sp.nat(0),
+        blockTimestampLast = sp.timestamp(0),
+        lazyFee = False,
+        kLast = sp.nat(0)
+    )
+    scenario += pool
+
+    lpToken.updateExchangeAddress(pool.address).run(sender = admin)
+
+    return pool, lpToken
+
+def setupPool(scenario, admin, alice):
+    """Originates a PLY (FA1.2) / USDT (FA2) AMM and adds its initial liquidity from alice at timestamp 0
+
+    Returns:
+        pool, PLY token, USDT token and LP token
+    """
+
+    PLY = makeFA12(scenario, admin.address, admin.address)
+
+    USDT = FA2.FA2(config = FA2.FA2_config(), metadata = sp.utils.metadata_of_url("ipfs://"), admin = admin.address)
+    scenario += USDT
+
+    pool, lpToken = originatePool(scenario, admin, PLY.address, sp.nat(0), False, USDT.address, sp.nat(0), True)
+
+    # Funding alice
+    PLY.mint(address = alice.address, value = USER_BALANCE).run(sender = admin)
+
+    USDT.mint(
+        address = alice.address, amount = USER_BALANCE, token_id = 0,
+        metadata = FA2.FA2.make_metadata(name = "USDT", decimals = 6, symbol = "USDT")
+    ).run(sender = admin)
+
+    PLY.approve(spender = pool.address, value = USER_BALANCE).run(sender = alice)
+
+    USDT.update_operators([
+        sp.variant("add_operator", USDT.operator_param.make(owner = alice.address, operator = pool.address, token_id = 0))
+    ]).run(sender = alice)
+
+    pool.AddLiquidity(token1_max = TOKEN1_POOL, token2_max = TOKEN2_POOL, recipient = alice.address).run(sender = alice, now = sp.timestamp(0))
+
+    return pool, PLY, USDT, lpToken
+
+@sp.add_test(name = "Plenty Network Volatile Pool TWAP Oracle")
+def twapTesting():
+
+    scenario = sp.test_scenario()
+
+    scenario.h1("TWAP accumulators")
+
+    admin = sp.test_account("adminAddress")
+    alice = sp.test_account("alice")
+
+    pool, PLY, USDT, lpToken = setupPool(scenario, admin, alice)
+
+    scenario.verify(pool.data.price1CumulativeLast == 0)
+
+    # First Swap 100 seconds later accumulates the reserves held since the initial liquidity
+    swapAmount = 10**10
+
+    pool.Swap(
+        tokenAmountIn = swapAmount, MinimumTokenOut = 0, recipient = alice.address,
+        requiredTokenAddress = USDT.address, requiredTokenId = 0
+    ).run(sender = alice, now = sp.timestamp(100))
+
+    price1Cumulative = (TOKEN2_POOL * PRICE_PRECISION // TOKEN1_POOL) * 100
+
+    price2Cumulative = (TOKEN1_POOL * PRICE_PRECISION // TOKEN2_POOL) * 100
+
+    scenario.verify(pool.data.price1CumulativeLast == price1Cumulative)
+
+    scenario.verify(pool.data.price2CumulativeLast == price2Cumulative)
+
+    scenario.verify(pool.data.blockTimestampLast == sp.timestamp(100))
+
+    token1Pool = TOKEN1_POOL + swapAmount
+
+    token2Pool = TOKEN2_POOL - quoteOut(swapAmount, TOKEN1_POOL, TOKEN2_POOL)
+
+    scenario.verify(pool.data.token1_pool == token1Pool)
+
+    scenario.verify(pool.data.token2_pool == token2Pool)
+
+    # A second Swap in the same block leaves the accumulators untouched
+    pool.Swap(
+        tokenAmountIn = swapAmount, MinimumTokenOut = 0, recipient = alice.address,
+        requiredTokenAddress = USDT.address, requiredTokenId = 0
+    ).run(sender = alice, now = sp.timestamp(100))
+
+    scenario.verify(pool.data.price1CumulativeLast == price1Cumulative)
+
+    # The next block accumulates the reserves left by the first block
+    token2Pool = token2Pool - quoteOut(swapAmount, token1Pool, token2Pool)
+
+    token1Pool = token1Pool + swapAmount
+
+    pool.RemoveLiquidity(lpAmount = 10**6, token1_min = 1, token2_min = 1, recipient = alice.address).run(sender = alice, now = sp.timestamp(160))
+
+    scenario.verify(pool.data.price1CumulativeLast == price1Cumulative + (token2Pool * PRICE_PRECISION // token1Pool) * 60)
+
+    scenario.verify(pool.data.price2CumulativeLast == price2Cumulative + (token1Pool * PRICE_PRECISION // token2Pool) * 60)
+
+@sp.add_test(name = "Plenty Network Volatile Pool FlashSwap")
+def flashSwapTesting():
+
+    scenario = sp.test_scenario()
+
+    scenario.h1("FlashSwap repayment")
+
+    admin = sp.test_account("adminAddress")
+    alice = sp.test_account("alice")
+
+    pool, PLY, USDT, lpToken = setupPool(scenario, admin, alice)
+
+    borrower = FlashBorrower(pool.address)
+    scenario += borrower
+
+    PLY.mint(address = borrower.address, value = 10**12).run(sender = admin)
+
+    borrower.approveToken(tokenAddress = PLY.address, spender = pool.address, value = 10**12).run(sender = alice)
+
+    tokenAmountOut = 5 * 10**10
+
+    tokenAmountIn = quoteIn(tokenAmountOut, TOKEN1_POOL, TOKEN2_POOL)
+
+    scenario.verify(pool.getAmountIn(sp.record(tokenAmountOut = tokenAmountOut, requiredTokenAddress = USDT.address, requiredTokenId = 0)) == tokenAmountIn)
+
+    # A maximum input below the quote is rejected
+    borrower.borrow(
+        tokenAmountOut = tokenAmountOut, maxTokenIn = tokenAmountIn - 1,
+        requiredTokenAddress = USDT.address, requiredTokenId = 0
+    ).run(sender = alice, now = sp.timestamp(10), valid = False, exception = "Plenty_Network_Higher_Slippage")
+
+    borrower.borrow(
+        tokenAmountOut = tokenAmountOut, maxTokenIn = tokenAmountIn,
+        requiredTokenAddress = USDT.address, requiredTokenId = 0
+    ).run(sender = alice, now = sp.timestamp(10))
+
+    # The borrower got the output before paying exactly the quoted input
+    scenario.verify(borrower.data.lastAmountIn == tokenAmountIn)
+
+    scenario.verify(fa2Balance(USDT, borrower.address) == tokenAmountOut)
+
+    scenario.verify(PLY.data.ledger[borrower.address].balance == 10**12 - tokenAmountIn)
+
+    scenario.verify(pool.data.token1_pool == TOKEN1_POOL + tokenAmountIn)
+
+    scenario.verify(pool.data.token2_pool == TOKEN2_POOL - tokenAmountOut)
+
+    # A borrower which can not pay reverts the whole FlashSwap
+    brokeBorrower = FlashBorrower(pool.address)
+    scenario += brokeBorrower
+
+    brokeBorrower.borrow(
+        tokenAmountOut = tokenAmountOut, maxTokenIn = 10**12,
+        requiredTokenAddress = USDT.address, requiredTokenId = 0
+    ).run(sender = alice, now = sp.timestamp(20), valid = False)
+
+    scenario.verify(pool.data.token2_pool == TOKEN2_POOL - tokenAmountOut)
+
+@sp.add_test(name = "Plenty Network Volatile Pool SwapExactOut")
+def swapExactOutTesting():
+
+    scenario = sp.test_scenario()
+
+    scenario.h1("Exact output swaps")
+
+    admin = sp.test_account("adminAddress")
+    alice = sp.test_account("alice")
+    bob = sp.test_account("bob")
+
+    pool, PLY, USDT, lpToken = setupPool(scenario, admin, alice)
+
+    # Buying PLY with USDT
+    tokenAmountOut = 3 * 10**10
+
+    tokenAmountIn = quoteIn(tokenAmountOut, TOKEN2_POOL, TOKEN1_POOL)
+
+    scenario.verify(pool.getAmountIn(sp.record(tokenAmountOut = tokenAmountOut, requiredTokenAddress = PLY.address, requiredTokenId = 0)) == tokenAmountIn)
+
+    # The quoted input is the smallest one for which Swap returns the output
+    scenario.verify(pool.getAmountOut(sp.record(tokenAmountIn = tokenAmountIn, requiredTokenAddress = PLY.address, requiredTokenId = 0)) >= tokenAmountOut)
+
+    scenario.verify(pool.getAmountOut(sp.record(tokenAmountIn = tokenAmountIn - 1, requiredTokenAddress = PLY.address, requiredTokenId = 0)) < tokenAmountOut)
+
+    pool.SwapExactOut(
+        tokenAmountOut = tokenAmountOut, maxTokenIn = tokenAmountIn - 1, recipient = bob.address,
+        requiredTokenAddress = PLY.address, requiredTokenId = 0
+    ).run(sender = alice, now = sp.timestamp(10), valid = False, exception = "Plenty_Network_Higher_Slippage")
+
+    pool.SwapExactOut(
+        tokenAmountOut = tokenAmountOut, maxTokenIn = tokenAmountIn, recipient = bob.address,
+        requiredTokenAddress = PLY.address, requiredTokenId = 0
+    ).run(sender = alice, now = sp.timestamp(10))
+
+    scenario.verify(PLY.data.ledger[bob.address].balance == tokenAmountOut)
+
+    scenario.verify(fa2Balance(USDT, alice.address) == USER_BALANCE - TOKEN2_POOL - tokenAmountIn)
+
+    scenario.verify(pool.data.token1_pool == TOKEN1_POOL - tokenAmountOut)
+
+    scenario.verify(pool.data.token2_pool == TOKEN2_POOL + tokenAmountIn)
+
+    # Buying USDT with PLY against the updated reserves
+    secondAmountOut = 7 * 10**10
+
+    secondAmountIn = quoteIn(secondAmountOut, TOKEN1_POOL - tokenAmountOut, TOKEN2_POOL + tokenAmountIn)
+
+    pool.SwapExactOut(
+        tokenAmountOut = secondAmountOut, maxTokenIn = secondAmountIn, recipient = bob.address,
+        requiredTokenAddress = USDT.address, requiredTokenId = 0
+    ).run(sender = alice, now = sp.timestamp(20))
+
+    scenario.verify(fa2Balance(USDT, bob.address) == secondAmountOut)
+
+    scenario.verify(pool.data.token1_pool == TOKEN1_POOL - tokenAmountOut + secondAmountIn)
+
+    scenario.verify(pool.data.token2_pool == TOKEN2_POOL + tokenAmountIn - secondAmountOut)
+
+@sp.add_test(name = "Plenty Network Volatile Pool AddLiquiditySingle")
+def addLiquiditySingleTesting():
+
+    scenario = sp.test_scenario()
+
+    scenario.h1("Single sided liquidity")
+
+    admin = sp.test_account("adminAddress")
+    alice = sp.test_account("alice")
+    bob = sp.test_account("bob")
+
+    pool, PLY, USDT, lpToken = setupPool(scenario, admin, alice)
+
+    totalSupply = math.isqrt(TOKEN1_POOL * TOKEN2_POOL)
+
+    scenario.verify(pool.data.totalSupply == totalSupply)
+
+    # Zapping PLY in
+    tokenAmount = 10**11
+
+    swapAmount, liquidity, token1Pool, token2Pool = quoteSingle(tokenAmount, TOKEN1_POOL, TOKEN2_POOL, totalSupply)
+
+    pool.AddLiquiditySingle(
+        tokenAddress = PLY.address, tokenId = 0, tokenAmount = tokenAmount, minLqt = liquidity + 1, recipient = bob.address
+    ).run(sender = alice, now = sp.timestamp(10), valid = False, exception = "Plenty_Network_Higher_Slippage")
+
+    pool.AddLiquiditySingle(
+        tokenAddress = PLY.address, tokenId = 0, tokenAmount = tokenAmount, minLqt = liquidity, recipient = bob.address
+    ).run(sender = alice, now = sp.timestamp(10))
+
+    # The whole input stays in the pool and the bought tokens are put back as liquidity
+    scenario.verify(pool.data.token1_pool == token1Pool)
+
+    scenario.verify(pool.data.token2_pool == token2Pool)
+
+    scenario.verify(lpToken.data.ledger[bob.address].balance == liquidity)
+
+    scenario.verify(pool.data.totalSupply == totalSupply + liquidity)
+
+    scenario.verify(PLY.data.ledger[alice.address].balance == USER_BALANCE - TOKEN1_POOL - tokenAmount)
+
+    # Zapping USDT in against the updated reserves
+    secondAmount = 3 * 10**11
+
+    secondSwapAmount, secondLiquidity, secondToken2Pool, secondToken1Pool = quoteSingle(secondAmount, token2Pool, token1Pool, totalSupply + liquidity)
+
+    pool.AddLiquiditySingle(
+        tokenAddress = USDT.address, tokenId = 0, tokenAmount = secondAmount, minLqt = secondLiquidity, recipient = bob.address
+    ).run(sender = alice, now = sp.timestamp(20))
+
+    scenario.verify(pool.data.token1_pool == secondToken1Pool)
+
+    scenario.verify(pool.data.token2_pool == secondToken2Pool)
+
+    scenario.verify(lpToken.data.ledger[bob.address].balance == liquidity + secondLiquidity)
+
+    scenario.verify(fa2Balance(USDT, alice.address) == USER_BALANCE - TOKEN2_POOL - secondAmount)
+
+    # Tokens outside of the pair are rejected
+    pool.AddLiquiditySingle(
+        tokenAddress = lpToken.address, tokenId = 0, tokenAmount = tokenAmount, minLqt = 0, recipient = bob.address
+    ).run(sender = alice, now = sp.timestamp(30), valid = False, exception = "Plenty_Network_Invalid_Pair")
+
+@sp.add_test(name = "Plenty Network Volatile Pool Lazy Fee")
+def lazyFeeTesting():
+
+    scenario = sp.test_scenario()
+
+    scenario.h1("Lazy Ve System fee")
+
+    admin = sp.test_account("adminAddress")
+    alice = sp.test_account("alice")
+    bob = sp.test_account("bob")
+    voter = sp.test_account("voter")
+
+    pool, PLY, USDT, lpToken = setupPool(scenario, admin, alice)
+
+    feeDistributor = FeeDistributor()
+    scenario += feeDistributor
+
+    pool.ChangeSystem(voter.address).run(sender = admin, now = sp.timestamp(0))
+
+    pool.ChangeFeeMode().run(sender = bob, now = sp.timestamp(0), valid = False, exception = "Plenty_Network_Not_Admin")
+
+    pool.ChangeFeeMode().run(sender = admin, now = sp.timestamp(0))
+
+    scenario.verify(pool.data.lazyFee)
+
+    scenario.verify(pool.data.kLast == TOKEN1_POOL * TOKEN2_POOL)
+
+    # Swaps keep the whole input in the pool
+    tokenAmountIn = 10**10
+
+    tokenAmountOut = quoteOut(tokenAmountIn, TOKEN1_POOL, TOKEN2_POOL)
+
+    pool.Swap(
+        tokenAmountIn = tokenAmountIn, MinimumTokenOut = tokenAmountOut, recipient = bob.address,
+        requiredTokenAddress = USDT.address, requiredTokenId = 0
+    ).run(sender = alice, now = sp.timestamp(10))
+
+    token1Pool = TOKEN1_POOL + tokenAmountIn
+
+    token2Pool = TOKEN2_POOL - tokenAmountOut
+
+    scenario.verify(fa2Balance(USDT, bob.address) == tokenAmountOut)
+
+    scenario.verify(pool.data.token1_pool == token1Pool)
+
+    scenario.verify(pool.data.token2_pool == token2Pool)
+
+    scenario.verify((pool.data.token1_Fee == 0) & (pool.data.token2_Fee == 0))
+
+    # forwardFee realises the growth of sqrt(k) since kLast
+    rootK = math.isqrt(token1Pool * token2Pool)
+
+    rootKLast = math.isqrt(TOKEN1_POOL * TOKEN2_POOL)
+
+    token1Fee = token1Pool * (rootK - rootKLast) // rootK
+
+    token2Fee = token2Pool * (rootK - rootKLast) // rootK
+
+    scenario.verify((token1Fee > 0) & (token2Fee > 0))
+
+    pool.forwardFee(feeDistributor = feeDistributor.address, epoch = 1).run(sender = admin, now = sp.timestamp(20), valid = False, exception = "Plenty_Network_Not_Voter")
+
+    pool.forwardFee(feeDistributor = feeDistributor.address, epoch = 1).run(sender = voter, now = sp.timestamp(20))
+
+    token1Pool -= token1Fee
+
+    token2Pool -= token2Fee
+
+    scenario.verify(pool.data.token1_pool == token1Pool)
+
+    scenario.verify(pool.data.token2_pool == token2Pool)
+
+    scenario.verify(pool.data.kLast == token1Pool * token2Pool)
+
+    scenario.verify((pool.data.token1_Fee == 0) & (pool.data.token2_Fee == 0))
+
+    scenario.verify(PLY.data.ledger[feeDistributor.address].balance == token1Fee)
+
+    scenario.verify(fa2Balance(USDT, feeDistributor.address) == token2Fee)
+
+    scenario.verify(feeDistributor.data.epoch == 1)
+
+    scenario.verify(feeDistributor.data.fees[sp.variant("fa12", PLY.address)] == token1Fee)
+
+    scenario.verify(feeDistributor.data.fees[sp.variant("fa2", (USDT.address, sp.nat(0)))] == token2Fee)
+
+    # Single sided liquidity keeps its swap fee in the pool as well
+    totalSupply = math.isqrt(TOKEN1_POOL * TOKEN2_POOL)
+
+    tokenAmount = 10**11
+
+    swapAmount, liquidity, newToken1Pool, newToken2Pool = quoteSingle(tokenAmount, token1Pool, token2Pool, totalSupply)
+
+    pool.AddLiquiditySingle(
+        tokenAddress = PLY.address, tokenId = 0, tokenAmount = tokenAmount, minLqt = liquidity, recipient = bob.address
+    ).run(sender = alice, now = sp.timestamp(30))
+
+    scenario.verify(pool.data.token1_pool == newToken1Pool)
+
+    scenario.verify(pool.data.token2_pool == newToken2Pool)
+
+    scenario.verify((pool.data.token1_Fee == 0) & (pool.data.token2_Fee == 0))
+
+    scenario.verify(lpToken.data.ledger[bob.address].balance == liquidity)
+
+    scenario.verify(pool.data.kLast == newToken1Pool * newToken2Pool)
+
+@sp.add_test(name = "Plenty Network Volatile Pool Views and Events")
+def viewsAndEventsTesting():
+
+    scenario = sp.test_scenario()
+
+    scenario.h1("Pool state, quotes and the values carried by events")
+
+    scenario.p("Scenarios cannot read emitted events, so every payload is checked against the state it is built from")
+
+    admin = sp.test_account("adminAddress")
+    alice = sp.test_account("alice")
+    bob = sp.test_account("bob")
+    voter = sp.test_account("voter")
+
+    pool, PLY, USDT, lpToken = setupPool(scenario, admin, alice)
+
+    feeDistributor = FeeDistributor()
+    scenario += feeDistributor
+
+    totalSupply = math.isqrt(TOKEN1_POOL * TOKEN2_POOL)
+
+    poolState = pool.getPoolState()
+
+    scenario.verify(poolState.token1_pool == TOKEN1_POOL)
+
+    scenario.verify(poolState.token2_pool == TOKEN2_POOL)
+
+    scenario.verify(poolState.lpFee == LP_FEE)
+
+    scenario.verify(poolState.maxSwapLimit == 40)
+
+    scenario.verify(poolState.totalSupply == totalSupply)
+
+    scenario.verify(~ poolState.paused)
+
+    scenario.verify(~ poolState.state)
+
+    # getAmountOut quotes Swap in both directions
+    tokenAmountIn = 10**10
+
+    tokenAmountOut = quoteOut(tokenAmountIn, TOKEN1_POOL, TOKEN2_POOL)
+
+    scenario.verify(pool.getAmountOut(sp.record(tokenAmountIn = tokenAmountIn, requiredTokenAddress = USDT.address, requiredTokenId = 0)) == tokenAmountOut)
+
+    scenario.verify(pool.getAmountOut(sp.record(tokenAmountIn = tokenAmountIn, requiredTokenAddress = PLY.address, requiredTokenId = 0)) == quoteOut(tokenAmountIn, TOKEN2_POOL, TOKEN1_POOL))
+
+    # Swap event: the lp fee stays in the pool before the Ve System
+    pool.Swap(
+        tokenAmountIn = tokenAmountIn, MinimumTokenOut = tokenAmountOut, recipient = bob.address,
+        requiredTokenAddress = USDT.address, requiredTokenId = 0
+    ).run(sender = alice, now = sp.timestamp(10))
+
+    token1Pool = TOKEN1_POOL + tokenAmountIn
+
+    token2Pool = TOKEN2_POOL - tokenAmountOut
+
+    scenario.verify(fa2Balance(USDT, bob.address) == tokenAmountOut)
+
+    scenario.verify(pool.getPoolState().token1_pool == token1Pool)
+
+    scenario.verify(pool.getPoolState().token2_pool == token2Pool)
+
+    scenario.verify((pool.data.token1_Fee == 0) & (pool.data.token2_Fee == 0))
+
+    # Swap events in the Ve System report the fee as system fee, accrued outside of the reserves
+    pool.ChangeSystem(voter.address).run(sender = admin, now = sp.timestamp(10))
+
+    scenario.verify(pool.getPoolState().state)
+
+    secondAmountIn = 2 * 10**10
+
+    secondAmountOut = quoteOut(secondAmountIn, token2Pool, token1Pool)
+
+    token2Fee = secondAmountIn // LP_FEE
+
+    pool.Swap(
+        tokenAmountIn = secondAmountIn, MinimumTokenOut = secondAmountOut, recipient = bob.address,
+        requiredTokenAddress = PLY.address, requiredTokenId = 0
+    ).run(sender = alice, now = sp.timestamp(20))
+
+    token1Pool -= secondAmountOut
+
+    token2Pool += secondAmountIn - token2Fee
+
+    scenario.verify(PLY.data.ledger[bob.address].balance == secondAmountOut)
+
+    scenario.verify(pool.data.token1_pool == token1Pool)
+
+    scenario.verify(pool.data.token2_pool == token2Pool)
+
+    scenario.verify(pool.data.token2_Fee == token2Fee)
+
+    thirdAmountIn = 10**10
+
+    thirdAmountOut = quoteOut(thirdAmountIn, token1Pool, token2Pool)
+
+    token1Fee = thirdAmountIn // LP_FEE
+
+    pool.Swap(
+        tokenAmountIn = thirdAmountIn, MinimumTokenOut = thirdAmountOut, recipient = bob.address,
+        requiredTokenAddress = USDT.address, requiredTokenId = 0
+    ).run(sender = alice, now = sp.timestamp(30))
+
+    token1Pool += thirdAmountIn - token1Fee
+
+    token2Pool -= thirdAmountOut
+
+    scenario.verify(pool.data.token1_Fee == token1Fee)
+
+    # forwardFee event: the fees reported are the ones sent to the fee distributor, through two
+    # separate transfers as PLY and USDT live in different contracts
+    pool.forwardFee(feeDistributor = feeDistributor.address, epoch = 3).run(sender = voter, now = sp.timestamp(40))
+
+    scenario.verify(PLY.data.ledger[feeDistributor.address].balance == token1Fee)
+
+    scenario.verify(fa2Balance(USDT, feeDistributor.address) == token2Fee)
+
+    scenario.verify(feeDistributor.data.epoch == 3)
+
+    scenario.verify(feeDistributor.data.fees[sp.variant("fa12", PLY.address)] == token1Fee)
+
+    scenario.verify(feeDistributor.data.fees[sp.variant("fa2", (USDT.address, sp.nat(0)))] == token2Fee)
+
+    scenario.verify((pool.data.token1_Fee == 0) & (pool.data.token2_Fee == 0))
+
+    scenario.verify(pool.data.token1_pool == token1Pool)
+
+    scenario.verify(pool.data.token2_pool == token2Pool)
+
+    # RemoveLiquidity event: amounts are the pro rata share of the reserves
+    lpAmount = totalSupply // 10
+
+    token1Amount = lpAmount * token1Pool // totalSupply
+
+    token2Amount = lpAmount * token2Pool // totalSupply
+
+    pool.RemoveLiquidity(lpAmount = lpAmount, token1_min = token1Amount, token2_min = token2Amount, recipient = alice.address).run(sender = alice, now = sp.timestamp(50))
+
+    poolState = pool.getPoolState()
+
+    scenario.verify(poolState.token1_pool == token1Pool - token1Amount)
+
+    scenario.verify(poolState.token2_pool == token2Pool - token2Amount)
+
+    scenario.verify(poolState.totalSupply == totalSupply - lpAmount)
+
+    scenario.verify(PLY.data.ledger[alice.address].balance == USER_BALANCE - TOKEN1_POOL - tokenAmountIn - thirdAmountIn + token1Amount)
+
+    scenario.verify(fa2Balance(USDT, alice.address) == USER_BALANCE - TOKEN2_POOL - secondAmountIn + token2Amount)
+
+@sp.add_test(name = "Plenty Network Volatile Pool Same FA2 Pair")
+def sameFA2PairTesting():
+
+    scenario = sp.test_scenario()
+
+    scenario.h1("Both tokens are ids of one FA2 contract")
+
+    admin = sp.test_account("adminAddress")
+    alice = sp.test_account("alice")
+    bob = sp.test_account("bob")
+    voter = sp.test_account("voter")
+
+    tokens = FA2.FA2(config = FA2.FA2_config(), metadata = sp.utils.metadata_of_url("ipfs://"), admin = admin.address)
+    scenario += tokens
+
+    pool, lpToken = originatePool(scenario, admin, tokens.address, sp.nat(0), True, tokens.address, sp.nat(1), True)
+
+    feeDistributor = FeeDistributor()
+    scenario += feeDistributor
+
+    tokens.mint(
+        address = alice.address, amount = USER_BALANCE, token_id = 0,
+        metadata = FA2.FA2.make_metadata(name = "USDT", decimals = 6, symbol = "USDT")
+    ).run(sender = admin)
+
+    tokens.mint(
+        address = alice.address, amount = USER_BALANCE, token_id = 1,
+        metadata = FA2.FA2.make_metadata(name = "USDC", decimals = 6, symbol = "USDC")
+    ).run(sender = admin)
+
+    tokens.update_operators([
+        sp.variant("add_operator", tokens.operator_param.make(owner = alice.address, operator = pool.address, token_id = 0)),
+        sp.variant("add_operator", tokens.operator_param.make(owner = alice.address, operator = pool.address, token_id = 1))
+    ]).run(sender = alice)
+
+    # Both deposits are pulled in a single FA2 transfer
+    pool.AddLiquidity(token1_max = TOKEN1_POOL, token2_max = TOKEN2_POOL, recipient = alice.address).run(sender = alice, now = sp.timestamp(0))
+
+    totalSupply = math.isqrt(TOKEN1_POOL * TOKEN2_POOL)
+
+    scenario.verify(fa2Balance(tokens, alice.address, 0) == USER_BALANCE - TOKEN1_POOL)
+
+    scenario.verify(fa2Balance(tokens, alice.address, 1) == USER_BALANCE - TOKEN2_POOL)
+
+    scenario.verify(fa2Balance(tokens, pool.address, 0) == TOKEN1_POOL)
+
+    scenario.verify(fa2Balance(tokens, pool.address, 1) == TOKEN2_POOL)
+
+    # Accruing system fees on both sides
+    pool.ChangeSystem(voter.address).run(sender = admin, now = sp.timestamp(0))
+
+    tokenAmountIn = 10**10
+
+    tokenAmountOut = quoteOut(tokenAmountIn, TOKEN1_POOL, TOKEN2_POOL)
+
+    token1Fee = tokenAmountIn // LP_FEE
+
+    pool.Swap(
+        tokenAmountIn = tokenAmountIn, MinimumTokenOut = tokenAmountOut, recipient = bob.address,
+        requiredTokenAddress = tokens.address, requiredTokenId = 1
+    ).run(sender = alice, now = sp.timestamp(10))
+
+    token1Pool = TOKEN1_POOL + tokenAmountIn - token1Fee
+
+    token2Pool = TOKEN2_POOL - tokenAmountOut
+
+    secondAmountOut = quoteOut(tokenAmountIn, token2Pool, token1Pool)
+
+    token2Fee = tokenAmountIn // LP_FEE
+
+    pool.Swap(
+        tokenAmountIn = tokenAmountIn, MinimumTokenOut = secondAmountOut, recipient = bob.address,
+        requiredTokenAddress = tokens.address, requiredTokenId = 0
+    ).run(sender = alice, now = sp.timestamp(20))
+
+    token1Pool -= secondAmountOut
+
+    token2Pool += tokenAmountIn - token2Fee
+
+    scenario.verify(fa2Balance(tokens, bob.address, 1) == tokenAmountOut)
+
+    scenario.verify(fa2Balance(tokens, bob.address, 0) == secondAmountOut)
+
+    # Both fees leave in a single FA2 transfer
+    pool.forwardFee(feeDistributor = feeDistributor.address, epoch = 1).run(sender = voter, now = sp.timestamp(30))
+
+    scenario.verify(fa2Balance(tokens, feeDistributor.address, 0) == token1Fee)
+
+    scenario.verify(fa2Balance(tokens, feeDistributor.address, 1) == token2Fee)
+
+    scenario.verify(feeDistributor.data.fees[sp.variant("fa2", (tokens.address, sp.nat(0)))] == token1Fee)
+
+    scenario.verify(feeDistributor.data.fees[sp.variant("fa2", (tokens.address, sp.nat(1)))] == token2Fee)
+
+    # Both withdrawals are paid in a single FA2 transfer
+    lpAmount = totalSupply // 2
+
+    token1Amount = lpAmount * token1Pool // totalSupply
+
+    token2Amount = lpAmount * token2Pool // totalSupply
+
+    pool.RemoveLiquidity(lpAmount = lpAmount, token1_min = token1Amount, token2_min = token2Amount, recipient = alice.address).run(sender = alice, now = sp.timestamp(40))
+
+    scenario.verify(fa2Balance(tokens, alice.address, 0) == USER_BALANCE - TOKEN1_POOL - tokenAmountIn + token1Amount)
+
+    scenario.verify(fa2Balance(tokens, alice.address, 1) == USER_BALANCE - TOKEN2_POOL - tokenAmountIn + token2Amount)
+
+    scenario.verify(fa2Balance(tokens, pool.address, 0) == token1Pool - token1Amount)
+
+    scenario.verify(fa2Balance(tokens, pool.address, 1) == token2Pool - token2Amount)
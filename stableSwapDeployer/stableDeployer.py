@@ -2,12 +2,18 @@ import smartpy as sp
 
 stableSwap = sp.io.import_script_from_url("file:./stableSwapDeployer/stableSwap.py")
 
+MIN_POOL_TOKENS = 3
+
+MAX_POOL_TOKENS = 4
+
 class stableFactoryContract(sp.Contract):
 
     def __init__(self, _adminAddress):
 
         self.stableSwap = stableSwap.FlatCurve()
 
+        self.multiSwap = stableSwap.MultiCurve()
+
         self.init(
             adminAddress = _adminAddress,
             lpFee = sp.nat(2000),
@@ -24,6 +30,13 @@ class stableFactoryContract(sp.Contract):
             lpMapping = sp.big_map(
                 tvalue = sp.TAddress,
                 tkey = sp.TAddress
+            ),
+            multiRegistry = sp.big_map(
+                tvalue = sp.TRecord(
+                    tokens = sp.TMap(sp.TNat, sp.TRecord(tokenAddress = sp.TAddress, tokenId = sp.TNat, tokenType = sp.TBool, tokenPrecision = sp.TNat)),
+                    lpTokenAddress = sp.TAddress
+                ),
+                tkey = sp.TAddress
             )
         )
 
@@ -49,7 +62,9 @@ class stableFactoryContract(sp.Contract):
                     token1Precision= params.token1Precision, token2Precision= params.token2Precision,
                     token1Address = params.token1Address, token2Address= params.token2Address,
                     token1Fee = sp.nat(0), token2Fee = sp.nat(0), state = False , voterContract= sp.none,
-                    lqtTotal= sp.nat(0), lpFee= self.data.lpFee, lqtAddress= params.lpTokenAddress, admin = self.data.adminAddress, paused = False
+                    lqtTotal= sp.nat(0), lpFee= self.data.lpFee, lqtAddress= params.lpTokenAddress, admin = self.data.adminAddress, paused = False,
+                    maxNewtonRounds = sp.nat(5), lastNewtonRounds = sp.nat(0),
+                    token1PoolNormalized = sp.nat(0), token2PoolNormalized = sp.nat(0), invariant = sp.nat(0)
                 ),
                 contract = self.stableSwap
             )
@@ -90,23 +105,124 @@ class stableFactoryContract(sp.Contract):
 
         sp.transfer(ammAddress.open_some(), sp.mutez(0), contractHandle)
 
-        # Add Pair to the Router
-        self.routerCall(
-                ammAddress.open_some(),
-                params.token1Address,
-                params.token2Address,
-                params.token1Id,
-                params.token2Id,
-                params.token1Type,
-                params.token2Type,
-                params.token1Amount,
-                params.token2Amount,
-                params.userAddress
-        )
+        # Seed the initial liquidity through the Router, pair metadata is read from getExchange
+        sp.if (params.token1Amount > sp.nat(0)) & (params.token2Amount > sp.nat(0)):
+
+            self.routerCall(
+                    ammAddress.open_some(),
+                    params.token1Address,
+                    params.token2Address,
+                    params.token1Id,
+                    params.token2Id,
+                    params.token1Type,
+                    params.token2Type,
+                    params.token1Amount,
+                    params.token2Amount,
+                    params.userAddress
+            )
 
         self.data.lpMapping[params.lpTokenAddress] = ammAddress.open_some()
 
     @sp.entry_point
+    def deployMultiPool(self, params):
+
+        sp.set_type(params, sp.TRecord(
+            tokens = sp.TMap(sp.TNat, sp.TRecord(tokenAddress = sp.TAddress, tokenId = sp.TNat, tokenType = sp.TBool, tokenPrecision = sp.TNat)),
+            amplification = sp.TNat, lpTokenAddress = sp.TAddress,
+            tokenAmounts = sp.TMap(sp.TNat, sp.TNat), userAddress = sp.TAddress
+        ))
+
+        sp.verify(sp.sender == self.data.lpDeployer)
+
+        sp.verify((sp.len(params.tokens) >= MIN_POOL_TOKENS) & (sp.len(params.tokens) <= MAX_POOL_TOKENS), "Invalid_Pool_Size")
+
+        sp.verify(params.amplification > 0)
+
+        tokens = sp.local('tokens', sp.map(
+            l = {},
+            tkey = sp.TNat,
+            tvalue = sp.TRecord(
+                tokenAddress = sp.TAddress, tokenId = sp.TNat, tokenCheck = sp.TBool, tokenPrecision = sp.TNat,
+                tokenPool = sp.TNat, tokenFee = sp.TNat
+            )
+        ))
+
+        # Token indexes have to be 0 to n-1
+        sp.for k in sp.range(0, sp.len(params.tokens)):
+
+            tokens.value[k] = sp.record(
+                tokenAddress = params.tokens[k].tokenAddress,
+                tokenId = params.tokens[k].tokenId,
+                tokenCheck = params.tokens[k].tokenType,
+                tokenPrecision = params.tokens[k].tokenPrecision,
+                tokenPool = sp.nat(0),
+                tokenFee = sp.nat(0)
+            )
+
+        ammAddress = sp.some(
+            sp.create_contract(
+                storage = sp.record(
+                    tokens = tokens.value,
+                    amplification = params.amplification, maxNewtonRounds = sp.nat(32),
+                    state = False , voterContract= sp.none,
+                    lqtTotal= sp.nat(0), lpFee= self.data.lpFee, lqtAddress= params.lpTokenAddress, admin = self.data.adminAddress, paused = False
+                ),
+                contract = self.multiSwap
+            )
+        )
+
+        sp.emit(
+            sp.record(
+                tokens = params.tokens,
+                amplification = params.amplification,
+                lpTokenAddress = params.lpTokenAddress,
+                exchangeAddress = ammAddress.open_some()
+            ),
+            tag = "deployMultiPool"
+        )
+
+        self.data.multiRegistry[ammAddress.open_some()] = sp.record(
+            tokens = params.tokens,
+            lpTokenAddress = params.lpTokenAddress
+        )
+
+        contractHandle = sp.contract(
+                sp.TAddress,
+                params.lpTokenAddress,
+                "updateExchangeAddress"
+            ).open_some()
+
+        sp.transfer(ammAddress.open_some(), sp.mutez(0), contractHandle)
+
+        # Seed the initial liquidity through the Router when an amount is given for every token
+        seed = sp.local('seed', sp.len(params.tokenAmounts) == sp.len(params.tokens))
+
+        sp.for k in sp.range(0, sp.len(params.tokens)):
+
+            seed.value = seed.value & (params.tokenAmounts.get(k, sp.nat(0)) > sp.nat(0))
+
+        sp.if seed.value:
+
+            routerHandle = sp.contract(
+                sp.TRecord(
+                    exchangeAddress = sp.TAddress,
+                    tokens = sp.TMap(sp.TNat, sp.TRecord(tokenAddress = sp.TAddress, tokenId = sp.TNat, tokenType = sp.TBool, tokenPrecision = sp.TNat)),
+                    tokenAmounts = sp.TMap(sp.TNat, sp.TNat), userAddress = sp.TAddress
+                ),
+                self.data.routerAddress,
+                "AddMultiExchange"
+            ).open_some()
+
+            routerData = sp.record(
+                exchangeAddress = ammAddress.open_some(), tokens = params.tokens,
+                tokenAmounts = params.tokenAmounts, userAddress = params.userAddress
+            )
+
+            sp.transfer(routerData, sp.mutez(0), routerHandle)
+
+        self.data.lpMapping[params.lpTokenAddress] = ammAddress.open_some()
+
+    @sp.entry_point(lazify = True)
     def addExistingPair(self, params):
 
         sp.set_type(
@@ -149,7 +265,7 @@ class stableFactoryContract(sp.Contract):
 
         self.data.lpMapping[params.lpTokenAddress] = params.exchangeAddress
 
-    @sp.entry_point
+    @sp.entry_point(lazify = True)
     def removeExchangePair(self,exchangeAddress):
 
         sp.set_type(exchangeAddress, sp.TAddress)
@@ -168,7 +284,7 @@ class stableFactoryContract(sp.Contract):
 
         sp.transfer(exchangeAddress, sp.mutez(0), contractHandle)
 
-    @sp.entry_point
+    @sp.entry_point(lazify = True)
     def callUpdateExchageAddress(self, lpTokenAddres):
 
         sp.set_type(lpTokenAddres, sp.TAddress)
@@ -185,34 +301,67 @@ class stableFactoryContract(sp.Contract):
 
         sp.transfer(self.data.lpMapping[lpTokenAddres], sp.mutez(0), contractHandle)
 
-    @sp.entry_point
+    @sp.entry_point(lazify = True)
     def changeLpDeployer(self, newLpDeployer):
 
         sp.verify(sp.sender == self.data.adminAddress)
 
         self.data.lpDeployer = newLpDeployer
 
-    @sp.entry_point
+    @sp.entry_point(lazify = True)
     def changeRouterAddress(self, newRouterAddress):
 
         sp.verify(sp.sender == self.data.adminAddress)
 
         self.data.routerAddress = newRouterAddress
 
-    @sp.entry_point
+    @sp.entry_point(lazify = True)
     def modifyFee(self, newLpFee):
 
         sp.verify(sp.sender == self.data.adminAddress)
 
         self.data.lpFee = newLpFee
 
-    @sp.entry_point
+    @sp.entry_point(lazify = True)
     def changeAdminAddress(self, newAdminAddress):
 
         sp.verify(sp.sender == self.data.adminAddress)
 
         self.data.adminAddress = newAdminAddress
 
+    @sp.onchain_view()
+    def getExchange(self, exchangeAddress):
+        """Returns the registered pair metadata of an exchange, read by the Router once per hop
+
+        Args:
+            exchangeAddress: exchange to be looked up
+        Returns:
+            sp.TOption: pair metadata, none if the exchange is not registered by this factory
+        """
+
+        sp.set_type(exchangeAddress, sp.TAddress)
+
+        exchange = sp.local('exchange', sp.set_type_expr(sp.none, sp.TOption(sp.TRecord(
+            token1Address = sp.TAddress, token2Address = sp.TAddress, lpTokenAddress = sp.TAddress,
+            token1Id = sp.TNat, token2Id = sp.TNat,
+            token1Type = sp.TBool, token2Type = sp.TBool, stablePair = sp.TBool
+        ))))
+
+        sp.if self.data.Registry.contains(exchangeAddress):
+
+            exchange.value = sp.some(sp.record(
+                token1Address = self.data.Registry[exchangeAddress].token1Address,
+                token2Address = self.data.Registry[exchangeAddress].token2Address,
+                lpTokenAddress = self.data.Registry[exchangeAddress].lpTokenAddress,
+                token1Id = self.data.Registry[exchangeAddress].token1Id,
+                token2Id = self.data.Registry[exchangeAddress].token2Id,
+                token1Type = self.data.Registry[exchangeAddress].token1Type,
+                token2Type = self.data.Registry[exchangeAddress].token2Type,
+                stablePair = True
+            ))
+
+        sp.result(exchange.value)
+
     def routerCall(self,exchangeAddress, token1Address, token2Address, token1Id, token2Id, token1Type, token2Type, token1Amount, token2Amount, userAddress):
 
         contractHandle = sp.contract(
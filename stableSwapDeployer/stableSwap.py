@@ -2,6 +2,9 @@ import smartpy as sp
 
 INITIAL_LIQUIDITY = 1000
 
+# Minimum newton rounds of the exact output solver, its overshooting first step can take well over maxNewtonRounds to settle
+EXACT_OUT_NEWTON_ROUNDS = 32
+
 class ContractLibrary(sp.Contract):
     """Provides utility functions 
     """
@@ -84,6 +87,58 @@ class ContractLibrary(sp.Contract):
 
             ContractLibrary.TransferFATokens(sender, receiver, amount, tokenAddress)
 
+
+    def TransferTokenPair(sender, receiver, token1Amount, token2Amount, token1Address, token1Id, token1Check, token2Address, token2Id, token2Check): 
+        """Transfers both tokens of a pool, batched in one transfer when they are ids of the same FA2 contract
+        
+        Args:
+            sender: sender address
+            receiver: receiver address
+            token1Amount: amount of first token to be transferred
+            token2Amount: amount of second token to be transferred
+            token1Address: address of the first token contract
+            token1Id: id of first token to be transferred (for FA2 tokens)
+            token1Check: boolean describing whether the first token contract is FA2 or not
+            token2Address: address of the second token contract
+            token2Id: id of second token to be transferred (for FA2 tokens)
+            token2Check: boolean describing whether the second token contract is FA2 or not
+        """
+
+        sp.if token1Check & token2Check & (token1Address == token2Address): 
+
+            sp.verify((token1Amount > 0) & (token2Amount > 0), "Zero_Transfer")
+
+            arg = [
+                sp.record(
+                    from_ = sender,
+                    txs = [
+                        sp.record(
+                            to_         = receiver,
+                            token_id    = token1Id , 
+                            amount      = token1Amount 
+                        ),
+                        sp.record(
+                            to_         = receiver,
+                            token_id    = token2Id , 
+                            amount      = token2Amount 
+                        )
+                    ]
+                )
+            ]
+
+            transferHandle = sp.contract(
+                sp.TList(sp.TRecord(from_=sp.TAddress, txs=sp.TList(sp.TRecord(amount=sp.TNat, to_=sp.TAddress, token_id=sp.TNat).layout(("to_", ("token_id", "amount")))))), 
+                token1Address,
+                entry_point='transfer').open_some()
+
+            sp.transfer(arg, sp.mutez(0), transferHandle)
+
+        sp.else: 
+
+            ContractLibrary.TransferToken(sender, receiver, token1Amount, token1Address, token1Id, token1Check)
+
+            ContractLibrary.TransferToken(sender, receiver, token2Amount, token2Address, token2Id, token2Check)
+
         
     @sp.private_lambda(wrap_call=True)
     def square_root(self , x): 
@@ -121,7 +176,9 @@ class FlatCurve(ContractLibrary):
                 token1Precision= sp.TNat, token2Precision= sp.TNat,
                 token1Address = sp.TAddress, token2Address= sp.TAddress,
                 token1Fee = sp.TNat, token2Fee = sp.TNat, state = sp.TBool, voterContract= sp.TOption(sp.TAddress),
-                lqtTotal= sp.TNat, lpFee= sp.TNat, lqtAddress= sp.TAddress, admin = sp.TAddress, paused = sp.TBool
+                lqtTotal= sp.TNat, lpFee= sp.TNat, lqtAddress= sp.TAddress, admin = sp.TAddress, paused = sp.TBool,
+                maxNewtonRounds = sp.TNat, lastNewtonRounds = sp.TNat,
+                token1PoolNormalized = sp.TNat, token2PoolNormalized = sp.TNat, invariant = sp.TNat
             )
         )
 
@@ -149,25 +206,173 @@ class FlatCurve(ContractLibrary):
         return sp.record(first=abs(sp.to_int(plus_8) - minus_8), second = 8 * abs(minus_7 + sp.to_int(plus_7)))
 
     def newton(self, params):
-        rounds = sp.local('rounds', params.n)
+        rounds = sp.local('rounds', sp.nat(0))
         dy = sp.local('dy', params.dy)
-        new_util = sp.local('new_util', self.util((params.x+params.dx), abs(params.y - dy.value)))
-        new_u = sp.local('new_u', new_util.value.first)
-        new_du_dy = sp.local('new_du_dy', new_util.value.second)
-        sp.while rounds.value != 0:
+        converged = sp.local('converged', False)
+        new_util = sp.local('new_util', sp.record(first = sp.nat(0), second = sp.nat(0)))
+        delta = sp.local('delta', sp.nat(0))
+        sp.while (~ converged.value) & (rounds.value < params.n):
             new_util.value = self.util((params.x+params.dx), abs(params.y - dy.value))
-            new_u.value = new_util.value.first
-            new_du_dy.value = new_util.value.second
-            dy.value = dy.value + (abs(new_u.value - params.u) / new_du_dy.value)
-            rounds.value = rounds.value - 1
-        return dy.value
+            delta.value = abs(new_util.value.first - params.u) / new_util.value.second
+            sp.if delta.value == 0:
+                converged.value = True
+            sp.else:
+                dy.value = dy.value + delta.value
+            rounds.value = rounds.value + 1
+        return sp.record(dy = dy.value, rounds = rounds.value, converged = converged.value, util = new_util.value)
 
     def newton_dx_to_dy(self, params):
-        sp.set_type(params,sp.TRecord(x = sp.TNat, y = sp.TNat, dx = sp.TNat, rounds = sp.TInt))
-        utility = self.util(params.x, params.y)
-        u = utility.first
-        dy = self.newton(sp.record(x = params.x, y = params.y, dx = params.dx, dy = sp.nat(0), u = u, n = params.rounds))
-        return dy
+        sp.set_type(params,sp.TRecord(x = sp.TNat, y = sp.TNat, dx = sp.TNat, u = sp.TNat, rounds = sp.TNat))
+        solution = self.newton(sp.record(x = params.x, y = params.y, dx = params.dx, dy = sp.nat(0), u = params.u, n = params.rounds))
+        return solution
+
+    def newton_dy_to_dx(self, params):
+        """Solves the curve for the amount dx that has to be sold to take dy out of the pool
+        
+        util is symmetric, so the sold side is solved as the second coordinate of util.
+        The curve is convex along it, hence the first (rounded up) step lands above the root
+        and every later (rounded down) step stays above it: dx never undershoots.
+        An unconverged dx overshoots the root, so the solve fails instead of overcharging the input.
+        """
+        sp.set_type(params,sp.TRecord(x = sp.TNat, y = sp.TNat, dy = sp.TNat, u = sp.TNat, rounds = sp.TNat))
+        sp.verify(params.dy < params.y, "Plenty_Network_Cash_Bought_Exceeds_Pool")
+        y_new = sp.local('y_new', sp.as_nat(params.y - params.dy))
+        rounds = sp.local('rounds', sp.nat(0))
+        dx = sp.local('dx', sp.nat(0))
+        converged = sp.local('converged', False)
+        new_util = sp.local('new_util', sp.record(first = sp.nat(0), second = sp.nat(0)))
+        delta = sp.local('delta', sp.nat(0))
+        sp.while (~ converged.value) & (rounds.value < params.rounds):
+            new_util.value = self.util(y_new.value, params.x + dx.value)
+            sp.if new_util.value.first < params.u:
+                delta.value = (abs(params.u - new_util.value.first) + abs(new_util.value.second - 1)) / new_util.value.second
+                dx.value = dx.value + delta.value
+            sp.else:
+                delta.value = abs(new_util.value.first - params.u) / new_util.value.second
+                sp.if delta.value == 0:
+                    converged.value = True
+                sp.else:
+                    dx.value = abs(dx.value - delta.value)
+            rounds.value = rounds.value + 1
+        sp.verify(converged.value, "Plenty_Network_No_Convergence")
+        return sp.record(dx = dx.value, rounds = rounds.value)
+
+    def quoteDxToDy(self, x, y, tokenAmountIn, inPrecision, outPrecision):
+        """Computes the output of a swap for an exact input amount
+        
+        Args:
+            x: normalized reserve of the token sold
+            y: normalized reserve of the token bought
+            tokenAmountIn: amount of tokens sold
+            inPrecision: precision of the token sold
+            outPrecision: precision of the token bought
+        Returns:
+            sp.TRecord(dx, dy, fee, tokenBought, rounds, converged, util): normalized input, normalized output and lp fee,
+            output net of fee, newton rounds used, whether the solve converged and util at the last newton round
+        """
+        dx = sp.local('dxIn', tokenAmountIn * inPrecision)
+        solution = self.newton_dx_to_dy(sp.record(x = x, y = y, dx = dx.value, u = self.data.invariant, rounds = self.data.maxNewtonRounds))
+        fee = solution.dy / self.data.lpFee
+        return sp.record(dx = dx.value, dy = solution.dy, fee = fee, tokenBought = abs(solution.dy - fee) / outPrecision, rounds = solution.rounds, converged = solution.converged, util = solution.util)
+
+    def quoteDyToDx(self, x, y, tokenAmountOut, inPrecision, outPrecision):
+        """Computes the input required for a swap to return an exact output amount
+        
+        Args:
+            x: normalized reserve of the token sold
+            y: normalized reserve of the token bought
+            tokenAmountOut: amount of tokens bought, net of the lp fee
+            inPrecision: precision of the token sold
+            outPrecision: precision of the token bought
+        Returns:
+            sp.TRecord(dy, fee, tokenAmountIn, rounds): normalized output and lp fee, required input and newton rounds used
+        """
+        dy = sp.local('dyOut', (tokenAmountOut * outPrecision * self.data.lpFee + sp.as_nat(self.data.lpFee - 2)) / sp.as_nat(self.data.lpFee - 1))
+        solution = self.newton_dy_to_dx(sp.record(x = x, y = y, dy = dy.value, u = self.data.invariant, rounds = sp.max(self.data.maxNewtonRounds, EXACT_OUT_NEWTON_ROUNDS)))
+        return sp.record(dy = dy.value, fee = dy.value / self.data.lpFee, tokenAmountIn = (solution.dx + sp.as_nat(inPrecision - 1)) / inPrecision, rounds = solution.rounds)
+
+    def updateInvariant(self):
+        """Syncs the precision normalized reserves and the cached curve invariant with the pools
+        """
+        self.data.token1PoolNormalized = self.data.token1Pool * self.data.token1Precision
+        self.data.token2PoolNormalized = self.data.token2Pool * self.data.token2Precision
+        self.data.invariant = self.util(self.data.token1PoolNormalized, self.data.token2PoolNormalized).first
+
+    def swapInvariant(self, quote, removedNormalized):
+        """Moves the cached curve invariant along a swap quoted by quoteDxToDy, once the normalized reserves are updated
+
+        A converged solve last evaluated util at the traded reserves (x + dx, y - dy), so only the normalized output
+        that stays in the pool is added, along the slope of util in y. util is convex in y, so the step can only
+        undershoot the exact invariant, by a second order term in the amount kept. An unconverged solve re-evaluates util.
+
+        Args:
+            quote: quote of the swap
+            removedNormalized: normalized amount of the token bought taken out of the pool
+        """
+        sp.if quote.converged:
+            self.data.invariant = quote.util.first + sp.as_nat(quote.dy - removedNormalized) * quote.util.second
+        sp.else:
+            self.data.invariant = self.util(self.data.token1PoolNormalized, self.data.token2PoolNormalized).first
+
+    def emitSwap(self, recipient, tokenAmountIn, tokenAmountOut, requiredTokenAddress, requiredTokenId, fee):
+        """Emits a Swap event with the traded amounts, the fee split and the post trade reserves
+        
+        Args:
+            recipient: address that received the swapped out tokens
+            tokenAmountIn: amount of tokens sent to the pool
+            tokenAmountOut: amount of required tokens sent to the recipient
+            requiredTokenAddress: contract address of the token returned after swap
+            requiredTokenId: id of the token returned after swap
+            fee: fee charged in the required token, kept by the LPs or accrued as system fee in Ve System
+        """
+        lpShare = sp.local('lpShare', fee)
+        systemShare = sp.local('systemShare', sp.nat(0))
+        sp.if self.data.state:
+            lpShare.value = sp.nat(0)
+            systemShare.value = fee
+
+        sp.emit(
+            sp.record(
+                sender = sp.sender,
+                recipient = recipient,
+                tokenAmountIn = tokenAmountIn,
+                tokenAmountOut = tokenAmountOut,
+                requiredTokenAddress = requiredTokenAddress,
+                requiredTokenId = requiredTokenId,
+                lpFee = lpShare.value,
+                systemFee = systemShare.value,
+                token1Pool = self.data.token1Pool,
+                token2Pool = self.data.token2Pool
+            ),
+            tag = "Swap"
+        )
+
+    def emitLiquidity(self, tag, recipient, token1Amount, token2Amount, lpAmount):
+        """Emits an AddLiquidity / RemoveLiquidity event with the amounts moved and the post operation reserves
+        
+        Single sided operations use the AddLiquiditySingle / RemoveLiquiditySingle tags, with the amount
+        of the other token, swapped internally on the curve, left at zero
+        
+        Args:
+            tag: name of the event
+            recipient: address credited with the LP tokens or with the tokens removed from the pool
+            token1Amount: amount of token1 added to or removed from the pool
+            token2Amount: amount of token2 added to or removed from the pool
+            lpAmount: amount of LP tokens minted or burned
+        """
+        sp.emit(
+            sp.record(
+                sender = sp.sender,
+                recipient = recipient,
+                token1Amount = token1Amount,
+                token2Amount = token2Amount,
+                lpAmount = lpAmount,
+                token1Pool = self.data.token1Pool,
+                token2Pool = self.data.token2Pool,
+                lqtTotal = self.data.lqtTotal
+            ),
+            tag = tag
+        )
     
     @sp.entry_point 
     def add_liquidity(self,params): 
@@ -216,16 +421,19 @@ class FlatCurve(ContractLibrary):
         sp.verify(token2Amount.value <= params.token2_max )
 
         # Transfer Funds to Exchange 
-        ContractLibrary.TransferToken(sp.sender, sp.self_address, token1Amount.value, self.data.token1Address, self.data.token1Id, self.data.token1Check)
-        ContractLibrary.TransferToken(sp.sender, sp.self_address, token2Amount.value, self.data.token2Address, self.data.token2Id, self.data.token2Check)
+        ContractLibrary.TransferTokenPair(sp.sender, sp.self_address, token1Amount.value, token2Amount.value, 
+            self.data.token1Address, self.data.token1Id, self.data.token1Check, self.data.token2Address, self.data.token2Id, self.data.token2Check)
 
         self.data.token1Pool += token1Amount.value
         self.data.token2Pool += token2Amount.value
+        self.updateInvariant()
 
         # Mint LP Tokens
         self.data.lqtTotal += liquidity.value
         self.mint(sp.record(address=params.recipient, value = liquidity.value))
 
+        self.emitLiquidity("AddLiquidity", params.recipient, token1Amount.value, token2Amount.value, liquidity.value)
+
     @sp.entry_point 
     def remove_liquidity(self,params): 
         """Allows users to remove their liquidity from the pool by burning their LP tokens
@@ -252,13 +460,212 @@ class FlatCurve(ContractLibrary):
         self.data.token1Pool = sp.as_nat(self.data.token1Pool - token1Amount.value)
         self.data.token2Pool = sp.as_nat(self.data.token2Pool - token2Amount.value)  
         self.data.lqtTotal = sp.as_nat(self.data.lqtTotal - params.lpAmount)
+        self.updateInvariant()
         
         # Burning LP Tokens  
         self.burn(sp.record(address=sp.sender, value= params.lpAmount))
 
         # Sending Tokens 
-        ContractLibrary.TransferToken(sp.self_address, params.recipient, token1Amount.value, self.data.token1Address, self.data.token1Id, self.data.token1Check)
-        ContractLibrary.TransferToken(sp.self_address, params.recipient, token2Amount.value, self.data.token2Address, self.data.token2Id, self.data.token2Check)
+        ContractLibrary.TransferTokenPair(sp.self_address, params.recipient, token1Amount.value, token2Amount.value, 
+            self.data.token1Address, self.data.token1Id, self.data.token1Check, self.data.token2Address, self.data.token2Id, self.data.token2Check)
+
+        self.emitLiquidity("RemoveLiquidity", params.recipient, token1Amount.value, token2Amount.value, params.lpAmount)
+
+    @sp.entry_point 
+    def add_liquidity_single(self,params): 
+        """Allows users to add liquidity to the pool with a single token and gain LP tokens
+        
+        Part of the input is swapped internally on the curve so that the rest matches the pool ratio
+        
+        Args:
+            tokenAddress: contract address of the token supplied to the pool
+            tokenId: id of the token supplied to the pool
+            tokenAmount: amount of tokens supplied to the pool
+            minLqt: minimum amount of LP tokens expected by the user
+            recipient: account address that will be credited with the LP tokens
+        """
+        sp.set_type(params, sp.TRecord(tokenAddress = sp.TAddress, tokenId = sp.TNat, tokenAmount = sp.TNat, minLqt = sp.TNat, recipient = sp.TAddress))
+        sp.verify(~self.data.paused, "Plenty_Network_Paused_State")
+        sp.verify(self.data.lqtTotal != sp.nat(0),"Plenty_Network_Not_Initialized")
+        sp.verify(params.tokenAmount >sp.nat(0),"Plenty_Network_Zero_Swap")
+        sp.verify(((params.tokenAddress == self.data.token1Address) & (params.tokenId == self.data.token1Id)) | 
+        ((params.tokenAddress == self.data.token2Address) & (params.tokenId == self.data.token2Id)),"Plenty_Network_Invalid_Pair")
+
+        liquidity = sp.local('liquidity', sp.nat(0))
+        token1Amount = sp.local('token1Amount', sp.nat(0))
+        token2Amount = sp.local('token2Amount', sp.nat(0))
+
+        sp.if (params.tokenAddress == self.data.token1Address) & (params.tokenId == self.data.token1Id): 
+            token1Amount.value = params.tokenAmount
+
+            # Marginal price of token1 in token2 is du/dx1 over du/dx2
+            priceNum = sp.local("priceNum", self.util(self.data.token2PoolNormalized, self.data.token1PoolNormalized).second)
+            priceDen = sp.local("priceDen", self.util(self.data.token1PoolNormalized, self.data.token2PoolNormalized).second)
+
+            # Swapped portion that leaves the rest of the input in the post swap pool ratio
+            swapAmount = sp.local("swapAmount", ((params.tokenAmount * self.data.token1Precision * self.data.token2PoolNormalized * priceDen.value) / (self.data.token2PoolNormalized * priceDen.value + priceNum.value * (self.data.token1PoolNormalized + params.tokenAmount * self.data.token1Precision))) / self.data.token1Precision)
+
+            sp.verify(swapAmount.value > 0, "Plenty_Network_Zero_Swap")
+
+            quote = self.quoteDxToDy(self.data.token1PoolNormalized, self.data.token2PoolNormalized, swapAmount.value, self.data.token1Precision, self.data.token2Precision)
+            tokenBought = sp.local("tokenBought", quote.tokenBought)
+            self.data.lastNewtonRounds = quote.rounds
+
+            sp.verify(tokenBought.value<self.data.token2Pool, "Plenty_Network_Cash_Bought_Exceeds_Pool")
+
+            # Bought tokens are added straight back, so only the fee leaves the pool in the Ve System
+            sp.if self.data.state:
+
+                self.data.token2Pool = sp.as_nat(self.data.token2Pool - quote.dy/self.data.token2Precision) + tokenBought.value
+                self.data.token2Fee += quote.fee / self.data.token2Precision
+
+            self.data.token1Pool += swapAmount.value
+
+            remainingAmount = sp.local("remainingAmount", sp.as_nat(params.tokenAmount - swapAmount.value))
+
+            sp.if ( remainingAmount.value * self.data.lqtTotal ) / self.data.token1Pool < ( tokenBought.value * self.data.lqtTotal) / sp.as_nat(self.data.token2Pool - tokenBought.value): 
+                liquidity.value = ( remainingAmount.value * self.data.lqtTotal ) / self.data.token1Pool
+            sp.else: 
+                liquidity.value = ( tokenBought.value * self.data.lqtTotal) / sp.as_nat(self.data.token2Pool - tokenBought.value)
+
+            self.data.token1Pool += remainingAmount.value
+
+            ContractLibrary.TransferToken(sp.sender, sp.self_address, params.tokenAmount, self.data.token1Address, self.data.token1Id, self.data.token1Check)
+
+        sp.else :
+            token2Amount.value = params.tokenAmount
+
+            # Marginal price of token2 in token1 is du/dx2 over du/dx1
+            priceNum = sp.local("priceNum", self.util(self.data.token1PoolNormalized, self.data.token2PoolNormalized).second)
+            priceDen = sp.local("priceDen", self.util(self.data.token2PoolNormalized, self.data.token1PoolNormalized).second)
+
+            # Swapped portion that leaves the rest of the input in the post swap pool ratio
+            swapAmount = sp.local("swapAmount", ((params.tokenAmount * self.data.token2Precision * self.data.token1PoolNormalized * priceDen.value) / (self.data.token1PoolNormalized * priceDen.value + priceNum.value * (self.data.token2PoolNormalized + params.tokenAmount * self.data.token2Precision))) / self.data.token2Precision)
+
+            sp.verify(swapAmount.value > 0, "Plenty_Network_Zero_Swap")
+
+            quote = self.quoteDxToDy(self.data.token2PoolNormalized, self.data.token1PoolNormalized, swapAmount.value, self.data.token2Precision, self.data.token1Precision)
+            tokenBought = sp.local("tokenBought", quote.tokenBought)
+            self.data.lastNewtonRounds = quote.rounds
+
+            sp.verify(tokenBought.value<self.data.token1Pool, "Plenty_Network_Cash_Bought_Exceeds_Pool")
+
+            # Bought tokens are added straight back, so only the fee leaves the pool in the Ve System
+            sp.if self.data.state:
+
+                self.data.token1Pool = sp.as_nat(self.data.token1Pool - quote.dy/self.data.token1Precision) + tokenBought.value
+                self.data.token1Fee += quote.fee / self.data.token1Precision
+
+            self.data.token2Pool += swapAmount.value
+
+            remainingAmount = sp.local("remainingAmount", sp.as_nat(params.tokenAmount - swapAmount.value))
+
+            sp.if ( remainingAmount.value * self.data.lqtTotal ) / self.data.token2Pool < ( tokenBought.value * self.data.lqtTotal) / sp.as_nat(self.data.token1Pool - tokenBought.value): 
+                liquidity.value = ( remainingAmount.value * self.data.lqtTotal ) / self.data.token2Pool
+            sp.else: 
+                liquidity.value = ( tokenBought.value * self.data.lqtTotal) / sp.as_nat(self.data.token1Pool - tokenBought.value)
+
+            self.data.token2Pool += remainingAmount.value
+
+            ContractLibrary.TransferToken(sp.sender, sp.self_address, params.tokenAmount, self.data.token2Address, self.data.token2Id, self.data.token2Check)
+
+        sp.verify(liquidity.value > 0 )
+        sp.verify(liquidity.value >= params.minLqt, "Plenty_Network_Min_Cash_Error")
+
+        self.updateInvariant()
+
+        # Mint LP Tokens
+        self.data.lqtTotal += liquidity.value
+        self.mint(sp.record(address=params.recipient, value = liquidity.value))
+
+        self.emitLiquidity("AddLiquiditySingle", params.recipient, token1Amount.value, token2Amount.value, liquidity.value)
+
+    @sp.entry_point 
+    def remove_liquidity_single(self,params): 
+        """Allows users to remove their liquidity from the pool as a single token by burning their LP tokens
+        
+        The share of the other token is swapped internally on the curve
+        
+        Args:
+            lpAmount: amount of LP tokens to be burned
+            requiredTokenAddress: contract address of the token to be returned
+            requiredTokenId: id of the token to be returned
+            minTokenOut: minimum amount of tokens expected by the user upon burning given LP tokens
+            recipient: address of the user that will get the tokens
+        """
+        sp.set_type(params, sp.TRecord(lpAmount = sp.TNat, requiredTokenAddress = sp.TAddress, requiredTokenId = sp.TNat, minTokenOut = sp.TNat, recipient = sp.TAddress))
+        sp.verify(~self.data.paused, "Plenty_Network_Paused_State")
+        sp.verify(self.data.lqtTotal != sp.nat(0),"Plenty_Network_Not_Initialized")
+        sp.verify(params.lpAmount <= self.data.lqtTotal,"Plenty_Network_Insufficient_Balance")
+        sp.verify(((params.requiredTokenAddress == self.data.token1Address) & (params.requiredTokenId == self.data.token1Id)) | 
+        ((params.requiredTokenAddress == self.data.token2Address) & (params.requiredTokenId == self.data.token2Id)),"Plenty_Network_Invalid_Pair")
+
+        token1Amount = sp.local('token1Amount', (params.lpAmount * self.data.token1Pool) / self.data.lqtTotal)
+        token2Amount = sp.local('token2Amount', (params.lpAmount * self.data.token2Pool) / self.data.lqtTotal)
+
+        # Subtracting Values  
+        self.data.token1Pool = sp.as_nat(self.data.token1Pool - token1Amount.value)
+        self.data.token2Pool = sp.as_nat(self.data.token2Pool - token2Amount.value)  
+        self.data.lqtTotal = sp.as_nat(self.data.lqtTotal - params.lpAmount)
+        self.updateInvariant()
+
+        # Burning LP Tokens  
+        self.burn(sp.record(address=sp.sender, value= params.lpAmount))
+
+        sp.if (params.requiredTokenAddress == self.data.token1Address) & (params.requiredTokenId == self.data.token1Id): 
+            quote = self.quoteDxToDy(self.data.token2PoolNormalized, self.data.token1PoolNormalized, token2Amount.value, self.data.token2Precision, self.data.token1Precision)
+            tokenBought = sp.local("tokenBought", quote.tokenBought)
+            self.data.lastNewtonRounds = quote.rounds
+
+            sp.verify(tokenBought.value<self.data.token1Pool, "Plenty_Network_Cash_Bought_Exceeds_Pool")
+
+            sp.if self.data.state:
+
+                self.data.token1Pool = sp.as_nat(self.data.token1Pool - quote.dy/self.data.token1Precision)
+                self.data.token1Fee += quote.fee / self.data.token1Precision
+
+            sp.else:
+
+                self.data.token1Pool = sp.as_nat(self.data.token1Pool - tokenBought.value)
+
+            self.data.token2Pool += token2Amount.value
+
+            tokenOut = sp.local("tokenOut", token1Amount.value + tokenBought.value)
+
+            sp.verify(tokenOut.value >= params.minTokenOut, "Plenty_Network_Min_Cash_Error")
+
+            ContractLibrary.TransferToken(sp.self_address, params.recipient, tokenOut.value, self.data.token1Address, self.data.token1Id, self.data.token1Check)
+
+            self.emitLiquidity("RemoveLiquiditySingle", params.recipient, tokenOut.value, sp.nat(0), params.lpAmount)
+
+        sp.else :
+
+            quote = self.quoteDxToDy(self.data.token1PoolNormalized, self.data.token2PoolNormalized, token1Amount.value, self.data.token1Precision, self.data.token2Precision)
+            tokenBought = sp.local("tokenBought", quote.tokenBought)
+            self.data.lastNewtonRounds = quote.rounds
+
+            sp.verify(tokenBought.value<self.data.token2Pool, "Plenty_Network_Cash_Bought_Exceeds_Pool")
+
+            sp.if self.data.state:
+
+                self.data.token2Pool = sp.as_nat(self.data.token2Pool - quote.dy/self.data.token2Precision)
+                self.data.token2Fee += quote.fee / self.data.token2Precision
+
+            sp.else:
+
+                self.data.token2Pool = sp.as_nat(self.data.token2Pool - tokenBought.value)
+
+            self.data.token1Pool += token1Amount.value
+
+            tokenOut = sp.local("tokenOut", token2Amount.value + tokenBought.value)
+
+            sp.verify(tokenOut.value >= params.minTokenOut, "Plenty_Network_Min_Cash_Error")
+
+            ContractLibrary.TransferToken(sp.self_address, params.recipient, tokenOut.value, self.data.token2Address, self.data.token2Id, self.data.token2Check)
+
+            self.emitLiquidity("RemoveLiquiditySingle", params.recipient, sp.nat(0), tokenOut.value, params.lpAmount)
+
+        self.updateInvariant()
 
     @sp.entry_point
     def Swap(self,params):
@@ -277,53 +684,233 @@ class FlatCurve(ContractLibrary):
         sp.verify(((params.requiredTokenAddress == self.data.token1Address) & (params.requiredTokenId == self.data.token1Id)) | 
         ((params.requiredTokenAddress == self.data.token2Address) & (params.requiredTokenId == self.data.token2Id)),"Plenty_Network_Invalid_Pair")
 
-        token1PoolNew = sp.local("token1PoolNew", self.data.token1Pool * self.data.token1Precision)
-        token2PoolNew = sp.local("token2PoolNew", self.data.token2Pool * self.data.token2Precision)
-
         sp.if (params.requiredTokenAddress == self.data.token1Address) & (params.requiredTokenId == self.data.token1Id): 
-            tokenBoughtWithoutFee = self.newton_dx_to_dy(sp.record(x = token2PoolNew.value, y = token1PoolNew.value, dx = params.tokenAmountIn * self.data.token2Precision, rounds = 5))
-            fee = sp.local("fee", tokenBoughtWithoutFee/self.data.lpFee)
-            tokenBought = abs(tokenBoughtWithoutFee - fee.value) / self.data.token1Precision
+            quote = self.quoteDxToDy(self.data.token2PoolNormalized, self.data.token1PoolNormalized, params.tokenAmountIn, self.data.token2Precision, self.data.token1Precision)
+            tokenBoughtWithoutFee = quote.dy
+            self.data.lastNewtonRounds = quote.rounds
+            fee = sp.local("fee", quote.fee)
+            tokenBought = quote.tokenBought
 
             sp.verify(tokenBought>=params.MinimumTokenOut, "Plenty_Network_Min_Cash_Error")
             sp.verify(tokenBought<self.data.token1Pool, "Plenty_Network_Cash_Bought_Exceeds_Pool")
 
+            tokenRemoved = sp.local("tokenRemoved", tokenBought)
+
             sp.if self.data.state:
 
-                self.data.token1Pool = sp.as_nat(self.data.token1Pool - tokenBoughtWithoutFee/self.data.token1Precision)
+                tokenRemoved.value = tokenBoughtWithoutFee/self.data.token1Precision
                 self.data.token1Fee += fee.value / self.data.token1Precision
 
-            sp.else:
-
-                self.data.token1Pool= abs(self.data.token1Pool - tokenBought)
-
+            self.data.token1Pool = sp.as_nat(self.data.token1Pool - tokenRemoved.value)
             self.data.token2Pool += params.tokenAmountIn
 
+            removedNormalized = sp.local("removedNormalized", tokenRemoved.value * self.data.token1Precision)
+            self.data.token1PoolNormalized = sp.as_nat(self.data.token1PoolNormalized - removedNormalized.value)
+            self.data.token2PoolNormalized += quote.dx
+            self.swapInvariant(quote, removedNormalized.value)
+
             ContractLibrary.TransferToken(sp.sender, sp.self_address, params.tokenAmountIn, self.data.token2Address, self.data.token2Id, self.data.token2Check)
             ContractLibrary.TransferToken(sp.self_address, params.recipient, tokenBought, self.data.token1Address, self.data.token1Id, self.data.token1Check)
 
+            self.emitSwap(params.recipient, params.tokenAmountIn, tokenBought, params.requiredTokenAddress, params.requiredTokenId, fee.value / self.data.token1Precision)
+
         sp.else :
 
-            tokenBoughtWithoutFee = self.newton_dx_to_dy(sp.record(x = token1PoolNew.value, y = token2PoolNew.value, dx = params.tokenAmountIn * self.data.token1Precision, rounds = 5))
-            fee = sp.local("fee", tokenBoughtWithoutFee/self.data.lpFee)
-            tokenBought = abs(tokenBoughtWithoutFee - fee.value) / self.data.token2Precision
+            quote = self.quoteDxToDy(self.data.token1PoolNormalized, self.data.token2PoolNormalized, params.tokenAmountIn, self.data.token1Precision, self.data.token2Precision)
+            tokenBoughtWithoutFee = quote.dy
+            self.data.lastNewtonRounds = quote.rounds
+            fee = sp.local("fee", quote.fee)
+            tokenBought = quote.tokenBought
 
             sp.verify(tokenBought>=params.MinimumTokenOut, "Plenty_Network_Min_Cash_Error")
             sp.verify(tokenBought<self.data.token2Pool, "Plenty_Network_Cash_Bought_Exceeds_Pool")
 
+            tokenRemoved = sp.local("tokenRemoved", tokenBought)
+
             sp.if self.data.state:
 
-                self.data.token2Pool = sp.as_nat(self.data.token2Pool - tokenBoughtWithoutFee/self.data.token2Precision)
+                tokenRemoved.value = tokenBoughtWithoutFee/self.data.token2Precision
                 self.data.token2Fee += fee.value / self.data.token2Precision
 
-            sp.else:
-
-                self.data.token2Pool= sp.as_nat(self.data.token2Pool - tokenBought)
-
+            self.data.token2Pool = sp.as_nat(self.data.token2Pool - tokenRemoved.value)
             self.data.token1Pool= self.data.token1Pool + params.tokenAmountIn
 
+            removedNormalized = sp.local("removedNormalized", tokenRemoved.value * self.data.token2Precision)
+            self.data.token2PoolNormalized = sp.as_nat(self.data.token2PoolNormalized - removedNormalized.value)
+            self.data.token1PoolNormalized += quote.dx
+            self.swapInvariant(quote, removedNormalized.value)
+
             ContractLibrary.TransferToken(sp.sender, sp.self_address, params.tokenAmountIn, self.data.token1Address, self.data.token1Id, self.data.token1Check)
             ContractLibrary.TransferToken(sp.self_address, params.recipient, tokenBought, self.data.token2Address, self.data.token2Id, self.data.token2Check)
+
+            self.emitSwap(params.recipient, params.tokenAmountIn, tokenBought, params.requiredTokenAddress, params.requiredTokenId, fee.value / self.data.token2Precision)
+    
+    @sp.entry_point
+    def SwapExactOut(self,params):
+        """ Function for Users to Swap their assets for an exact amount of the required Token 
+        
+        Args:
+            tokenAmountOut: exact amount of tokens the recipient will receive
+            maxTokenIn: maximum amount of tokens the user is willing to swap in
+            recipient: address that will receive the swapped out tokens 
+            requiredTokenAddress: contract address of the token that is expected to be returned after swap
+            requiredTokenId: id of the token that is expected to be returned after swap
+        """
+        sp.set_type(params, sp.TRecord(tokenAmountOut = sp.TNat, maxTokenIn = sp.TNat, recipient = sp.TAddress, requiredTokenAddress = sp.TAddress, requiredTokenId = sp.TNat))
+        sp.verify(~self.data.paused, "Plenty_Network_Paused_State")
+        sp.verify(params.tokenAmountOut >sp.nat(0),"Plenty_Network_Zero_Swap")
+        sp.verify(((params.requiredTokenAddress == self.data.token1Address) & (params.requiredTokenId == self.data.token1Id)) | 
+        ((params.requiredTokenAddress == self.data.token2Address) & (params.requiredTokenId == self.data.token2Id)),"Plenty_Network_Invalid_Pair")
+
+        sp.if (params.requiredTokenAddress == self.data.token1Address) & (params.requiredTokenId == self.data.token1Id): 
+            sp.verify(params.tokenAmountOut<self.data.token1Pool, "Plenty_Network_Cash_Bought_Exceeds_Pool")
+
+            quote = self.quoteDyToDx(self.data.token2PoolNormalized, self.data.token1PoolNormalized, params.tokenAmountOut, self.data.token2Precision, self.data.token1Precision)
+            tokenAmountIn = sp.local("tokenAmountIn", quote.tokenAmountIn)
+            self.data.lastNewtonRounds = quote.rounds
+
+            sp.verify(tokenAmountIn.value<=params.maxTokenIn, "Plenty_Network_Max_Cash_Error")
+
+            sp.if self.data.state:
+
+                fee = sp.local("fee", quote.fee / self.data.token1Precision)
+                self.data.token1Pool = sp.as_nat(self.data.token1Pool - (params.tokenAmountOut + fee.value))
+                self.data.token1Fee += fee.value
+
+            sp.else:
+
+                self.data.token1Pool = sp.as_nat(self.data.token1Pool - params.tokenAmountOut)
+
+            self.data.token2Pool += tokenAmountIn.value
+
+            ContractLibrary.TransferToken(sp.sender, sp.self_address, tokenAmountIn.value, self.data.token2Address, self.data.token2Id, self.data.token2Check)
+            ContractLibrary.TransferToken(sp.self_address, params.recipient, params.tokenAmountOut, self.data.token1Address, self.data.token1Id, self.data.token1Check)
+
+            self.emitSwap(params.recipient, tokenAmountIn.value, params.tokenAmountOut, params.requiredTokenAddress, params.requiredTokenId, quote.fee / self.data.token1Precision)
+
+        sp.else :
+
+            sp.verify(params.tokenAmountOut<self.data.token2Pool, "Plenty_Network_Cash_Bought_Exceeds_Pool")
+
+            quote = self.quoteDyToDx(self.data.token1PoolNormalized, self.data.token2PoolNormalized, params.tokenAmountOut, self.data.token1Precision, self.data.token2Precision)
+            tokenAmountIn = sp.local("tokenAmountIn", quote.tokenAmountIn)
+            self.data.lastNewtonRounds = quote.rounds
+
+            sp.verify(tokenAmountIn.value<=params.maxTokenIn, "Plenty_Network_Max_Cash_Error")
+
+            sp.if self.data.state:
+
+                fee = sp.local("fee", quote.fee / self.data.token2Precision)
+                self.data.token2Pool = sp.as_nat(self.data.token2Pool - (params.tokenAmountOut + fee.value))
+                self.data.token2Fee += fee.value
+
+            sp.else:
+
+                self.data.token2Pool = sp.as_nat(self.data.token2Pool - params.tokenAmountOut)
+
+            self.data.token1Pool += tokenAmountIn.value
+
+            ContractLibrary.TransferToken(sp.sender, sp.self_address, tokenAmountIn.value, self.data.token1Address, self.data.token1Id, self.data.token1Check)
+            ContractLibrary.TransferToken(sp.self_address, params.recipient, params.tokenAmountOut, self.data.token2Address, self.data.token2Id, self.data.token2Check)
+
+            self.emitSwap(params.recipient, tokenAmountIn.value, params.tokenAmountOut, params.requiredTokenAddress, params.requiredTokenId, quote.fee / self.data.token2Precision)
+
+        self.updateInvariant()
+    
+    @sp.entry_point
+    def BatchSwap(self,params):
+        """ Function for Market Makers to run several Swaps against the pool in one call
+        
+        Swaps are applied in order against the pool state and only the net token flows
+        of every address are settled, with at most one transfer per token and address
+        
+        Args:
+            params: list of swaps, each taking the same arguments as Swap
+        """
+        sp.set_type(params, sp.TList(sp.TRecord(tokenAmountIn = sp.TNat, MinimumTokenOut = sp.TNat, recipient = sp.TAddress, requiredTokenAddress = sp.TAddress, requiredTokenId = sp.TNat)))
+        sp.verify(~self.data.paused, "Plenty_Network_Paused_State")
+
+        flows = sp.local("flows", sp.map(l = {}, tkey = sp.TAddress, tvalue = sp.TRecord(token1 = sp.TInt, token2 = sp.TInt)))
+        flows.value[sp.sender] = sp.record(token1 = 0, token2 = 0)
+
+        sp.for swap in params:
+
+            sp.verify(swap.tokenAmountIn >sp.nat(0),"Plenty_Network_Zero_Swap")
+            sp.verify(((swap.requiredTokenAddress == self.data.token1Address) & (swap.requiredTokenId == self.data.token1Id)) | 
+            ((swap.requiredTokenAddress == self.data.token2Address) & (swap.requiredTokenId == self.data.token2Id)),"Plenty_Network_Invalid_Pair")
+
+            sp.if ~ flows.value.contains(swap.recipient):
+                flows.value[swap.recipient] = sp.record(token1 = 0, token2 = 0)
+
+            sp.if (swap.requiredTokenAddress == self.data.token1Address) & (swap.requiredTokenId == self.data.token1Id): 
+                quote = self.quoteDxToDy(self.data.token2PoolNormalized, self.data.token1PoolNormalized, swap.tokenAmountIn, self.data.token2Precision, self.data.token1Precision)
+                tokenBought = sp.local("tokenBought", quote.tokenBought)
+                self.data.lastNewtonRounds = quote.rounds
+
+                sp.verify(tokenBought.value>=swap.MinimumTokenOut, "Plenty_Network_Min_Cash_Error")
+                sp.verify(tokenBought.value<self.data.token1Pool, "Plenty_Network_Cash_Bought_Exceeds_Pool")
+
+                tokenRemoved = sp.local("tokenRemoved", tokenBought.value)
+
+                sp.if self.data.state:
+
+                    tokenRemoved.value = quote.dy/self.data.token1Precision
+                    self.data.token1Fee += quote.fee / self.data.token1Precision
+
+                self.data.token1Pool = sp.as_nat(self.data.token1Pool - tokenRemoved.value)
+                self.data.token2Pool += swap.tokenAmountIn
+
+                removedNormalized = sp.local("removedNormalized", tokenRemoved.value * self.data.token1Precision)
+                self.data.token1PoolNormalized = sp.as_nat(self.data.token1PoolNormalized - removedNormalized.value)
+                self.data.token2PoolNormalized += quote.dx
+                self.swapInvariant(quote, removedNormalized.value)
+
+                flows.value[sp.sender].token2 -= sp.to_int(swap.tokenAmountIn)
+                flows.value[swap.recipient].token1 += sp.to_int(tokenBought.value)
+
+                self.emitSwap(swap.recipient, swap.tokenAmountIn, tokenBought.value, swap.requiredTokenAddress, swap.requiredTokenId, quote.fee / self.data.token1Precision)
+
+            sp.else :
+
+                quote = self.quoteDxToDy(self.data.token1PoolNormalized, self.data.token2PoolNormalized, swap.tokenAmountIn, self.data.token1Precision, self.data.token2Precision)
+                tokenBought = sp.local("tokenBought", quote.tokenBought)
+                self.data.lastNewtonRounds = quote.rounds
+
+                sp.verify(tokenBought.value>=swap.MinimumTokenOut, "Plenty_Network_Min_Cash_Error")
+                sp.verify(tokenBought.value<self.data.token2Pool, "Plenty_Network_Cash_Bought_Exceeds_Pool")
+
+                tokenRemoved = sp.local("tokenRemoved", tokenBought.value)
+
+                sp.if self.data.state:
+
+                    tokenRemoved.value = quote.dy/self.data.token2Precision
+                    self.data.token2Fee += quote.fee / self.data.token2Precision
+
+                self.data.token2Pool = sp.as_nat(self.data.token2Pool - tokenRemoved.value)
+                self.data.token1Pool += swap.tokenAmountIn
+
+                removedNormalized = sp.local("removedNormalized", tokenRemoved.value * self.data.token2Precision)
+                self.data.token2PoolNormalized = sp.as_nat(self.data.token2PoolNormalized - removedNormalized.value)
+                self.data.token1PoolNormalized += quote.dx
+                self.swapInvariant(quote, removedNormalized.value)
+
+                flows.value[sp.sender].token1 -= sp.to_int(swap.tokenAmountIn)
+                flows.value[swap.recipient].token2 += sp.to_int(tokenBought.value)
+
+                self.emitSwap(swap.recipient, swap.tokenAmountIn, tokenBought.value, swap.requiredTokenAddress, swap.requiredTokenId, quote.fee / self.data.token2Precision)
+
+        # Settling net flows
+        sp.for flow in flows.value.items():
+
+            sp.if flow.value.token1 > 0:
+                ContractLibrary.TransferToken(sp.self_address, flow.key, abs(flow.value.token1), self.data.token1Address, self.data.token1Id, self.data.token1Check)
+            sp.if flow.value.token1 < 0:
+                ContractLibrary.TransferToken(flow.key, sp.self_address, abs(flow.value.token1), self.data.token1Address, self.data.token1Id, self.data.token1Check)
+
+            sp.if flow.value.token2 > 0:
+                ContractLibrary.TransferToken(sp.self_address, flow.key, abs(flow.value.token2), self.data.token2Address, self.data.token2Id, self.data.token2Check)
+            sp.if flow.value.token2 < 0:
+                ContractLibrary.TransferToken(flow.key, sp.self_address, abs(flow.value.token2), self.data.token2Address, self.data.token2Id, self.data.token2Check)
     
     @sp.entry_point
     def ModifyFee(self,lpFee):
@@ -342,6 +929,23 @@ class FlatCurve(ContractLibrary):
 
         self.data.lpFee = lpFee
 
+    @sp.entry_point
+    def ModifyNewtonRounds(self,rounds):
+
+        """Admin function to modify the max number of newton rounds used per swap
+        Solver stops early once dy stops changing
+        Args:
+            rounds: new max number of newton rounds
+        """
+
+        sp.set_type(rounds, sp.TNat)
+
+        sp.verify(sp.sender == self.data.admin,"Plenty_Network_Not_Admin")
+
+        sp.verify(rounds > 0)
+
+        self.data.maxNewtonRounds = rounds
+
 
     @sp.entry_point
     def ChangeSystem(self,newVoterContract):
@@ -385,13 +989,20 @@ class FlatCurve(ContractLibrary):
 
         sp.verify(sp.sender == self.data.voterContract.open_some(),"Plenty_Network_Not_Voter")
 
-        sp.if self.data.token1Fee != sp.nat(0):
+        sp.if (self.data.token1Fee != sp.nat(0)) & (self.data.token2Fee != sp.nat(0)):
+
+            ContractLibrary.TransferTokenPair(sp.self_address, params.feeDistributor, self.data.token1Fee, self.data.token2Fee, 
+                self.data.token1Address, self.data.token1Id, self.data.token1Check, self.data.token2Address, self.data.token2Id, self.data.token2Check)
+
+        sp.else:
+
+            sp.if self.data.token1Fee != sp.nat(0):
 
-            ContractLibrary.TransferToken(sp.self_address, params.feeDistributor, self.data.token1Fee, self.data.token1Address, self.data.token1Id, self.data.token1Check)
+                ContractLibrary.TransferToken(sp.self_address, params.feeDistributor, self.data.token1Fee, self.data.token1Address, self.data.token1Id, self.data.token1Check)
 
-        sp.if self.data.token2Fee != sp.nat(0):
+            sp.if self.data.token2Fee != sp.nat(0):
 
-            ContractLibrary.TransferToken(sp.self_address, params.feeDistributor, self.data.token2Fee, self.data.token2Address, self.data.token2Id, self.data.token2Check)
+                ContractLibrary.TransferToken(sp.self_address, params.feeDistributor, self.data.token2Fee, self.data.token2Address, self.data.token2Id, self.data.token2Check)
 
         # Type constants for FeeDistributor call
         TOKEN_VARIANT = sp.TVariant(
@@ -430,6 +1041,16 @@ class FlatCurve(ContractLibrary):
             c,
         )
 
+        sp.emit(
+            sp.record(
+                feeDistributor = params.feeDistributor,
+                epoch = params.epoch,
+                token1Fee = self.data.token1Fee,
+                token2Fee = self.data.token2Fee
+            ),
+            tag = "forwardFee"
+        )
+
         self.data.token1Fee = 0
 
         self.data.token2Fee = 0
@@ -440,4 +1061,466 @@ class FlatCurve(ContractLibrary):
             token1Pool = self.data.token1Pool, 
             token2Pool = self.data.token2Pool
         )
-        sp.result(reserve)
\ No newline at end of file
+        sp.result(reserve)
+
+    @sp.onchain_view()
+    def getPoolState(self): 
+        """View function returning everything needed to quote the pool in one read
+        
+        Returns:
+            sp.TRecord: reserves, precisions, lp fee, LP supply and the paused / Ve System flags
+        """
+        sp.result(sp.record(
+            token1Pool = self.data.token1Pool, 
+            token2Pool = self.data.token2Pool,
+            token1Precision = self.data.token1Precision,
+            token2Precision = self.data.token2Precision,
+            lpFee = self.data.lpFee,
+            lqtTotal = self.data.lqtTotal,
+            paused = self.data.paused,
+            state = self.data.state
+        ))
+
+    @sp.onchain_view()
+    def get_dy(self, params):
+        """View function to quote the output of Swap for an exact input
+        
+        Args:
+            tokenAmountIn: amount of tokens to be swapped
+            requiredTokenAddress: contract address of the token that is expected to be returned after swap
+            requiredTokenId: id of the token that is expected to be returned after swap
+        Returns:
+            sp.TNat: amount of required tokens Swap would transfer, net of the lp fee
+        """
+        sp.set_type(params, sp.TRecord(tokenAmountIn = sp.TNat, requiredTokenAddress = sp.TAddress, requiredTokenId = sp.TNat))
+        sp.verify(params.tokenAmountIn >sp.nat(0),"Plenty_Network_Zero_Swap")
+        sp.verify(((params.requiredTokenAddress == self.data.token1Address) & (params.requiredTokenId == self.data.token1Id)) | 
+        ((params.requiredTokenAddress == self.data.token2Address) & (params.requiredTokenId == self.data.token2Id)),"Plenty_Network_Invalid_Pair")
+
+        tokenBought = sp.local('tokenBought', sp.nat(0))
+
+        sp.if (params.requiredTokenAddress == self.data.token1Address) & (params.requiredTokenId == self.data.token1Id): 
+            quote = self.quoteDxToDy(self.data.token2PoolNormalized, self.data.token1PoolNormalized, params.tokenAmountIn, self.data.token2Precision, self.data.token1Precision)
+            sp.verify(quote.tokenBought<self.data.token1Pool, "Plenty_Network_Cash_Bought_Exceeds_Pool")
+            tokenBought.value = quote.tokenBought
+        sp.else:
+            quote = self.quoteDxToDy(self.data.token1PoolNormalized, self.data.token2PoolNormalized, params.tokenAmountIn, self.data.token1Precision, self.data.token2Precision)
+            sp.verify(quote.tokenBought<self.data.token2Pool, "Plenty_Network_Cash_Bought_Exceeds_Pool")
+            tokenBought.value = quote.tokenBought
+
+        sp.result(tokenBought.value)
+
+    @sp.onchain_view()
+    def get_dx(self, params):
+        """View function to quote the input needed to receive an exact output
+        
+        Args:
+            tokenAmountOut: amount of required tokens expected after swap, net of the lp fee
+            requiredTokenAddress: contract address of the token that is expected to be returned after swap
+            requiredTokenId: id of the token that is expected to be returned after swap
+        Returns:
+            sp.TNat: amount of tokens that have to be swapped in
+        """
+        sp.set_type(params, sp.TRecord(tokenAmountOut = sp.TNat, requiredTokenAddress = sp.TAddress, requiredTokenId = sp.TNat))
+        sp.verify(params.tokenAmountOut >sp.nat(0),"Plenty_Network_Zero_Swap")
+        sp.verify(((params.requiredTokenAddress == self.data.token1Address) & (params.requiredTokenId == self.data.token1Id)) | 
+        ((params.requiredTokenAddress == self.data.token2Address) & (params.requiredTokenId == self.data.token2Id)),"Plenty_Network_Invalid_Pair")
+
+        tokenAmountIn = sp.local('tokenAmountIn', sp.nat(0))
+
+        sp.if (params.requiredTokenAddress == self.data.token1Address) & (params.requiredTokenId == self.data.token1Id): 
+            sp.verify(params.tokenAmountOut<self.data.token1Pool, "Plenty_Network_Cash_Bought_Exceeds_Pool")
+            quote = self.quoteDyToDx(self.data.token2PoolNormalized, self.data.token1PoolNormalized, params.tokenAmountOut, self.data.token2Precision, self.data.token1Precision)
+            tokenAmountIn.value = quote.tokenAmountIn
+        sp.else:
+            sp.verify(params.tokenAmountOut<self.data.token2Pool, "Plenty_Network_Cash_Bought_Exceeds_Pool")
+            quote = self.quoteDyToDx(self.data.token1PoolNormalized, self.data.token2PoolNormalized, params.tokenAmountOut, self.data.token1Precision, self.data.token2Precision)
+            tokenAmountIn.value = quote.tokenAmountIn
+
+        sp.result(tokenAmountIn.value)
+
+class MultiCurve(ContractLibrary):
+    """StableSwap AMM for 3 to 4 assets of similar underlying value sharing one pool of liquidity
+
+    Uses the StableSwap invariant A*n^n*S + D = A*D*n^n + D^(n+1)/(n^n*P) where S and P are
+    the sum and product of the precision normalized reserves
+    """
+
+    def __init__(self):
+
+        self.init_type(
+            sp.TRecord(
+                tokens = sp.TMap(sp.TNat, sp.TRecord(
+                    tokenAddress = sp.TAddress, tokenId = sp.TNat, tokenCheck = sp.TBool, tokenPrecision = sp.TNat,
+                    tokenPool = sp.TNat, tokenFee = sp.TNat
+                )),
+                amplification = sp.TNat, maxNewtonRounds = sp.TNat,
+                state = sp.TBool, voterContract= sp.TOption(sp.TAddress),
+                lqtTotal= sp.TNat, lpFee= sp.TNat, lqtAddress= sp.TAddress, admin = sp.TAddress, paused = sp.TBool
+            )
+        )
+
+    def burn(self,burnData):
+        c = sp.contract(sp.TRecord(address = sp.TAddress, value = sp.TNat), self.data.lqtAddress, entry_point="burn").open_some()
+        sp.transfer(burnData,sp.mutez(0),c)
+
+    def mint(self,mintData):
+        c = sp.contract(sp.TRecord(address = sp.TAddress, value = sp.TNat), self.data.lqtAddress, entry_point="mint").open_some()
+        sp.transfer(mintData,sp.mutez(0),c)
+
+    def normalizedPools(self):
+        xp = sp.local('xp', sp.map(l = {}, tkey = sp.TNat, tvalue = sp.TNat))
+        sp.for token in self.data.tokens.items():
+            xp.value[token.key] = token.value.tokenPool * token.value.tokenPrecision
+        return xp.value
+
+    def amplificationFactor(self):
+        """Returns A*n^n for the current number of tokens
+        """
+        ann = sp.local('ann', self.data.amplification)
+        sp.for token in self.data.tokens.keys():
+            ann.value = ann.value * sp.len(self.data.tokens)
+        return ann.value
+
+    def get_D(self, xp, ann):
+        """Solves the invariant D for the normalized reserves xp
+        """
+        n = sp.len(xp)
+        S = sp.local('S', sp.nat(0))
+        sp.for x in xp.values():
+            S.value += x
+        D = sp.local('D', S.value)
+        D_P = sp.local('D_P', sp.nat(0))
+        D_prev = sp.local('D_prev', sp.nat(0))
+        D_converged = sp.local('D_converged', S.value == 0)
+        D_rounds = sp.local('D_rounds', sp.nat(0))
+        sp.while (~ D_converged.value) & (D_rounds.value < self.data.maxNewtonRounds):
+            D_P.value = D.value
+            sp.for x in xp.values():
+                D_P.value = D_P.value * D.value / (x * n)
+            D_prev.value = D.value
+            D.value = (ann * S.value + D_P.value * n) * D.value / (sp.as_nat(ann - 1) * D.value + (n + 1) * D_P.value)
+            D_converged.value = abs(D.value - D_prev.value) <= 1
+            D_rounds.value += 1
+        sp.verify(D_converged.value, "Plenty_Network_No_Convergence")
+        return D.value
+
+    def get_y(self, i, j, x, xp, D, ann):
+        """Solves the normalized reserve of token j once the reserve of token i is set to x
+        """
+        n = sp.len(xp)
+        c = sp.local('c', D)
+        S_ = sp.local('S_', sp.nat(0))
+        sp.for item in xp.items():
+            sp.if item.key != j:
+                x_k = sp.local('x_k', item.value)
+                sp.if item.key == i:
+                    x_k.value = x
+                S_.value += x_k.value
+                c.value = c.value * D / (x_k.value * n)
+        c.value = c.value * D / (ann * n)
+        b = sp.local('b', S_.value + D / ann)
+        y = sp.local('y', D)
+        y_prev = sp.local('y_prev', sp.nat(0))
+        y_converged = sp.local('y_converged', False)
+        y_rounds = sp.local('y_rounds', sp.nat(0))
+        sp.while (~ y_converged.value) & (y_rounds.value < self.data.maxNewtonRounds):
+            y_prev.value = y.value
+            y.value = (y.value * y.value + c.value) / sp.as_nat(2 * y.value + b.value - D)
+            y_converged.value = abs(y.value - y_prev.value) <= 1
+            y_rounds.value += 1
+        sp.verify(y_converged.value, "Plenty_Network_No_Convergence")
+        return y.value
+
+    def quoteDxToDy(self, tokenIn, tokenOut, tokenAmountIn):
+        """Computes the output of a swap for an exact input amount
+        
+        Args:
+            tokenIn: index of the token sold
+            tokenOut: index of the token bought
+            tokenAmountIn: amount of tokens sold
+        Returns:
+            sp.TRecord(dy, fee, tokenBought): normalized output and lp fee, output net of fee
+        """
+        sp.verify(tokenIn != tokenOut, "Plenty_Network_Invalid_Pair")
+        sp.verify(self.data.tokens.contains(tokenIn) & self.data.tokens.contains(tokenOut), "Plenty_Network_Invalid_Pair")
+        xp = sp.local('xp_pools', self.normalizedPools())
+        ann = sp.local('ann_factor', self.amplificationFactor())
+        D = sp.local('D_pools', self.get_D(xp.value, ann.value))
+        x = xp.value[tokenIn] + tokenAmountIn * self.data.tokens[tokenIn].tokenPrecision
+        y = sp.local('y_new', self.get_y(tokenIn, tokenOut, x, xp.value, D.value, ann.value))
+        # Rounding down the output by one unit in favour of the pool
+        dy = sp.local('dy', sp.as_nat(xp.value[tokenOut] - y.value - 1))
+        fee = dy.value / self.data.lpFee
+        return sp.record(dy = dy.value, fee = fee, tokenBought = sp.as_nat(dy.value - fee) / self.data.tokens[tokenOut].tokenPrecision)
+
+    @sp.entry_point 
+    def add_liquidity(self,params): 
+        """Allows users to add liquidity to the pool and gain LP tokens
+        
+        Args:
+            tokenMax: max amount of every token that the user wants to supply to the pool, keyed by token index
+            recipient: account address that will be credited with the LP tokens
+        """
+        sp.set_type(params, sp.TRecord(tokenMax = sp.TMap(sp.TNat, sp.TNat), recipient = sp.TAddress))
+        sp.verify(sp.len(params.tokenMax) == sp.len(self.data.tokens), "Plenty_Network_Invalid_LP_Ratio")
+        tokenAmounts = sp.local('tokenAmounts', sp.map(l = {}, tkey = sp.TNat, tvalue = sp.TNat))
+        liquidity = sp.local('liquidity', sp.nat(0))
+        sp.if self.data.lqtTotal != sp.nat(0): 
+            initialized = sp.local('initialized', False)
+            sp.for token in self.data.tokens.items():
+                share = sp.local('share', (params.tokenMax[token.key] * self.data.lqtTotal) / token.value.tokenPool)
+                sp.if (~ initialized.value) | (share.value < liquidity.value):
+                    liquidity.value = share.value
+                    initialized.value = True
+            sp.for token in self.data.tokens.items():
+                # Rounding up the amounts in favour of the pool
+                tokenAmounts.value[token.key] = (liquidity.value * token.value.tokenPool + sp.as_nat(self.data.lqtTotal - 1)) / self.data.lqtTotal
+        sp.else: 
+            xp = sp.local('xp', sp.map(l = {}, tkey = sp.TNat, tvalue = sp.TNat))
+            sp.for token in self.data.tokens.items():
+                sp.verify(params.tokenMax[token.key] > 0, "Plenty_Network_Invalid_LP_Ratio")
+                xp.value[token.key] = params.tokenMax[token.key] * token.value.tokenPrecision
+
+            D = sp.local('D_initial', self.get_D(xp.value, self.amplificationFactor()))
+
+            sp.verify(D.value > INITIAL_LIQUIDITY , "Negative_Val" )
+            
+            liquidity.value = sp.as_nat(D.value - INITIAL_LIQUIDITY )
+            
+            self.data.lqtTotal += INITIAL_LIQUIDITY
+
+            tokenAmounts.value = params.tokenMax
+            
+        sp.verify(liquidity.value > 0 )
+
+        # Transfer Funds to Exchange 
+        sp.for k in sp.range(0, sp.len(self.data.tokens)):
+            token = self.data.tokens[k]
+            sp.verify(tokenAmounts.value[k] <= params.tokenMax[k])
+            ContractLibrary.TransferToken(sp.sender, sp.self_address, tokenAmounts.value[k], token.tokenAddress, token.tokenId, token.tokenCheck)
+            self.data.tokens[k].tokenPool += tokenAmounts.value[k]
+
+        # Mint LP Tokens
+        self.data.lqtTotal += liquidity.value
+        self.mint(sp.record(address=params.recipient, value = liquidity.value))
+
+    @sp.entry_point 
+    def remove_liquidity(self,params): 
+        """Allows users to remove their liquidity from the pool by burning their LP tokens
+        
+        Args:
+            lpAmount: amount of LP tokens to be burned
+            tokenMin: minimum amount of every token expected by the user upon burning given LP tokens, keyed by token index
+            recipient: address of the user that will get the tokens
+        """
+        sp.set_type(params, sp.TRecord(lpAmount = sp.TNat, tokenMin = sp.TMap(sp.TNat, sp.TNat), recipient = sp.TAddress))
+        sp.verify(self.data.lqtTotal != sp.nat(0),"Plenty_Network_Not_Initialized")
+        sp.verify(params.lpAmount <= self.data.lqtTotal,"Plenty_Network_Insufficient_Balance")
+
+        # Burning LP Tokens  
+        self.burn(sp.record(address=sp.sender, value= params.lpAmount))
+
+        # Sending Tokens 
+        sp.for k in sp.range(0, sp.len(self.data.tokens)):
+            token = self.data.tokens[k]
+            tokenAmount = sp.local('tokenAmount', (params.lpAmount * token.tokenPool) / self.data.lqtTotal)
+            sp.verify(tokenAmount.value >= params.tokenMin.get(k, sp.nat(0)))
+            ContractLibrary.TransferToken(sp.self_address, params.recipient, tokenAmount.value, token.tokenAddress, token.tokenId, token.tokenCheck)
+            self.data.tokens[k].tokenPool = sp.as_nat(self.data.tokens[k].tokenPool - tokenAmount.value)
+
+        self.data.lqtTotal = sp.as_nat(self.data.lqtTotal - params.lpAmount)
+
+    @sp.entry_point
+    def Swap(self,params):
+        """ Function for Users to Swap their assets to get the required Token 
+        
+        Args:
+            tokenIn: index of the token sent by user that needs to be swapped
+            tokenOut: index of the token that is expected to be returned after swap
+            tokenAmountIn: amount of tokens sent by user that needs to be swapped
+            MinimumTokenOut: minimum amount of token expected by user after swap 
+            recipient: address that will receive the swapped out tokens 
+        """
+        sp.set_type(params, sp.TRecord(tokenIn = sp.TNat, tokenOut = sp.TNat, tokenAmountIn = sp.TNat, MinimumTokenOut = sp.TNat, recipient = sp.TAddress))
+        sp.verify(~self.data.paused, "Plenty_Network_Paused_State")
+        sp.verify(params.tokenAmountIn >sp.nat(0),"Plenty_Network_Zero_Swap")
+
+        quote = self.quoteDxToDy(params.tokenIn, params.tokenOut, params.tokenAmountIn)
+        tokenOut = self.data.tokens[params.tokenOut]
+        tokenIn = self.data.tokens[params.tokenIn]
+        tokenBought = sp.local("tokenBought", quote.tokenBought)
+
+        sp.verify(tokenBought.value>=params.MinimumTokenOut, "Plenty_Network_Min_Cash_Error")
+        sp.verify(tokenBought.value<tokenOut.tokenPool, "Plenty_Network_Cash_Bought_Exceeds_Pool")
+
+        ContractLibrary.TransferToken(sp.sender, sp.self_address, params.tokenAmountIn, tokenIn.tokenAddress, tokenIn.tokenId, tokenIn.tokenCheck)
+        ContractLibrary.TransferToken(sp.self_address, params.recipient, tokenBought.value, tokenOut.tokenAddress, tokenOut.tokenId, tokenOut.tokenCheck)
+
+        sp.if self.data.state:
+
+            self.data.tokens[params.tokenOut].tokenPool = sp.as_nat(self.data.tokens[params.tokenOut].tokenPool - quote.dy / tokenOut.tokenPrecision)
+            self.data.tokens[params.tokenOut].tokenFee += quote.fee / tokenOut.tokenPrecision
+
+        sp.else:
+
+            self.data.tokens[params.tokenOut].tokenPool = sp.as_nat(self.data.tokens[params.tokenOut].tokenPool - tokenBought.value)
+
+        self.data.tokens[params.tokenIn].tokenPool += params.tokenAmountIn
+
+    @sp.entry_point
+    def ModifyFee(self,lpFee):
+
+        """Admin function to modify the LP Fees
+        Max Fee can be 1% Hardcoded
+        Args:
+            lpFee: new % fee for the liquidity providers
+        """
+
+        sp.set_type(lpFee, sp.TNat)
+
+        sp.verify(sp.sender == self.data.admin,"Plenty_Network_Not_Admin")
+
+        sp.verify( lpFee >= 100)
+
+        self.data.lpFee = lpFee
+
+    @sp.entry_point
+    def ModifyAmplification(self,amplification):
+
+        """Admin function to modify the amplification coefficient A of the invariant
+        Args:
+            amplification: new amplification coefficient
+        """
+
+        sp.set_type(amplification, sp.TNat)
+
+        sp.verify(sp.sender == self.data.admin,"Plenty_Network_Not_Admin")
+
+        sp.verify(amplification > 0)
+
+        self.data.amplification = amplification
+
+    @sp.entry_point
+    def ModifyNewtonRounds(self,rounds):
+
+        """Admin function to modify the max number of newton rounds used to solve the invariant
+        Args:
+            rounds: new max number of newton rounds
+        """
+
+        sp.set_type(rounds, sp.TNat)
+
+        sp.verify(sp.sender == self.data.admin,"Plenty_Network_Not_Admin")
+
+        sp.verify(rounds > 0)
+
+        self.data.maxNewtonRounds = rounds
+
+    @sp.entry_point
+    def ChangeSystem(self,newVoterContract):
+
+        """
+            Admin function for executing transition to Ve System
+            This is a one-way change
+        """
+
+        sp.set_type(newVoterContract, sp.TAddress)
+
+        sp.verify(sp.sender == self.data.admin,"Plenty_Network_Not_Admin")
+
+        self.data.voterContract = sp.some(newVoterContract)
+
+        self.data.state = True
+
+    @sp.entry_point 
+    def ChangeState(self):
+        sp.verify(sp.sender == self.data.admin,"Plenty_Network_Not_Admin")
+        self.data.paused = ~ self.data.paused
+
+    @sp.entry_point
+    def ChangeAdmin(self,adminAddress): 
+        sp.set_type(adminAddress, sp.TAddress)
+        sp.verify(sp.sender == self.data.admin,"Plenty_Network_Not_Admin")
+        self.data.admin = adminAddress
+
+    @sp.entry_point
+    def forwardFee(self,params):
+
+        """Admin function to withdraw lp Fees for the Ve System
+        Args:
+            feeDistributor: account address where the lp fees will be transferred to fee distributor contract
+            epoch:
+        """
+
+        sp.set_type(params, sp.TRecord(feeDistributor=sp.TAddress, epoch=sp.TNat))
+
+        sp.verify(self.data.state,"Plenty_Network_Invalid_State")
+
+        sp.verify(sp.sender == self.data.voterContract.open_some(),"Plenty_Network_Not_Voter")
+
+        # Type constants for FeeDistributor call
+        TOKEN_VARIANT = sp.TVariant(
+            fa12=sp.TAddress,
+            fa2=sp.TPair(sp.TAddress, sp.TNat),
+            tez=sp.TUnit,
+        )
+
+        ADD_FEES_PARAMS = sp.TRecord(
+            epoch=sp.TNat,
+            fees=sp.TMap(TOKEN_VARIANT, sp.TNat),
+        ).layout(("epoch", "fees"))
+
+        fees_map = sp.local("fees_map", sp.map(l={}, tkey=TOKEN_VARIANT, tvalue=sp.TNat))
+
+        sp.for k in sp.range(0, sp.len(self.data.tokens)):
+
+            token = self.data.tokens[k]
+
+            sp.if token.tokenFee != sp.nat(0):
+
+                ContractLibrary.TransferToken(sp.self_address, params.feeDistributor, token.tokenFee, token.tokenAddress, token.tokenId, token.tokenCheck)
+
+            # Record token fees
+            sp.if token.tokenCheck:
+                fees_map.value[sp.variant("fa2", (token.tokenAddress, token.tokenId))] = token.tokenFee
+            sp.else:
+                fees_map.value[sp.variant("fa12", token.tokenAddress)] = token.tokenFee
+
+            self.data.tokens[k].tokenFee = 0
+ 
+        # Call FeeDistributor to record the fees for the epoch
+        c = sp.contract(ADD_FEES_PARAMS, params.feeDistributor, "add_fees").open_some()
+        sp.transfer(
+            sp.record(
+                epoch=params.epoch, 
+                fees=fees_map.value
+            ),
+            sp.tez(0),
+            c,
+        )
+
+    @sp.onchain_view()
+    def getReserveBalance(self): 
+        reserve = sp.local('reserve', sp.map(l = {}, tkey = sp.TNat, tvalue = sp.TNat))
+        sp.for token in self.data.tokens.items():
+            reserve.value[token.key] = token.value.tokenPool
+        sp.result(reserve.value)
+
+    @sp.onchain_view()
+    def get_dy(self, params):
+        """View function to quote the output of Swap for an exact input
+        
+        Args:
+            tokenIn: index of the token to be swapped
+            tokenOut: index of the token that is expected to be returned after swap
+            tokenAmountIn: amount of tokens to be swapped
+        Returns:
+            sp.TNat: amount of tokenOut Swap would transfer, net of the lp fee
+        """
+        sp.set_type(params, sp.TRecord(tokenIn = sp.TNat, tokenOut = sp.TNat, tokenAmountIn = sp.TNat))
+        sp.verify(params.tokenAmountIn >sp.nat(0),"Plenty_Network_Zero_Swap")
+        quote = self.quoteDxToDy(params.tokenIn, params.tokenOut, params.tokenAmountIn)
+        tokenBought = sp.local("tokenBought", quote.tokenBought)
+        sp.verify(tokenBought.value<self.data.tokens[params.tokenOut].tokenPool, "Plenty_Network_Cash_Bought_Exceeds_Pool")
+        sp.result(tokenBought.value)
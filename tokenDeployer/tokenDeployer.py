@@ -19,6 +19,7 @@ class tokenDeployer(sp.Contract):
             tokenSymbol = _tokenSymbol,
             volatileRegistry = sp.big_map(tvalue = sp.TMap(sp.TNat, sp.TMap(sp.TAddress, sp.TMap(sp.TNat, sp.TAddress))),tkey = sp.TAddress),
             stableRegistry = sp.big_map(tvalue = sp.TMap(sp.TNat, sp.TMap(sp.TAddress, sp.TMap(sp.TNat, sp.TAddress))), tkey = sp.TAddress),
+            stablePoolRegistry = sp.big_map(tvalue = sp.TAddress, tkey = sp.TBytes),
             paused = False
         )
         
@@ -176,20 +177,93 @@ class tokenDeployer(sp.Contract):
         sp.transfer(contractData, sp.mutez(0), contractHandle)
 
     @sp.entry_point
+    def deployStablePool(self,params):
+
+        sp.set_type(params, sp.TRecord(
+            tokens = sp.TMap(sp.TNat, sp.TRecord(tokenAddress = sp.TAddress, tokenId = sp.TNat, tokenType = sp.TBool, tokenPrecision = sp.TNat)),
+            amplification = sp.TNat, tokenName = sp.TBytes,
+            tokenAmounts = sp.TMap(sp.TNat, sp.TNat), userAddress = sp.TAddress
+        ))
+
+        sp.verify(~self.data.paused)
+
+        # Pools are keyed on their packed token set, which is sorted, so the token order does not matter
+        tokenSet = sp.local('tokenSet', sp.set(t = sp.TPair(sp.TAddress, sp.TNat)))
+
+        sp.for token in params.tokens.values():
+
+            tokenSet.value.add(sp.pair(token.tokenAddress, token.tokenId))
+
+        sp.verify(sp.len(tokenSet.value) == sp.len(params.tokens), message = "RepeatedToken")
+
+        poolKey = sp.local('poolKey', sp.pack(tokenSet.value))
+
+        sp.verify(~self.data.stablePoolRegistry.contains(poolKey.value), message = "PoolExist")
+
+        lpTokenContract = sp.some(sp.create_contract(
+            storage = sp.record(
+                ledger = sp.big_map(),
+                metadata = sp.big_map(
+                    {
+                        "": self.data.stableContractMetadata
+                    }
+                ),
+                token_metadata = sp.big_map(
+                    {
+                        0 : sp.record(token_id = 0, token_info = sp.map(
+                            {
+                                "decimals" : self.data.tokenDecimal,
+                                "name" : params.tokenName, 
+                                "symbol": self.data.tokenSymbol,
+                                "icon" : self.data.tokenIcon
+                            }
+                        ))
+                    }
+                ),
+                totalSupply = sp.nat(0),
+                securityCheck = False,
+                administrator = self.data.stableAmmDeployer,
+                exchangeAddress = self.data.stableAmmDeployer
+            ),
+            contract = self.tokenContract
+        ))
+
+        self.data.stablePoolRegistry[poolKey.value] = lpTokenContract.open_some()
+
+        # Deploying Multi Asset AMM Contract
+        contractHandle = sp.contract(
+            sp.TRecord(
+                tokens = sp.TMap(sp.TNat, sp.TRecord(tokenAddress = sp.TAddress, tokenId = sp.TNat, tokenType = sp.TBool, tokenPrecision = sp.TNat)),
+                amplification = sp.TNat, lpTokenAddress = sp.TAddress,
+                tokenAmounts = sp.TMap(sp.TNat, sp.TNat), userAddress = sp.TAddress
+            ), 
+            self.data.stableAmmDeployer,
+            "deployMultiPool"
+        ).open_some()
+
+        contractData = sp.record(
+            tokens = params.tokens, amplification = params.amplification,
+            lpTokenAddress = lpTokenContract.open_some(),
+            tokenAmounts = params.tokenAmounts, userAddress = params.userAddress
+        )
+
+        sp.transfer(contractData, sp.mutez(0), contractHandle)
+
+    @sp.entry_point(lazify = True)
     def changeAdminAddress(self,newAdminAddress):
 
         sp.verify(sp.sender == self.data.adminAddress)
 
         self.data.adminAddress = newAdminAddress
 
-    @sp.entry_point
+    @sp.entry_point(lazify = True)
     def modifyVolatileDeployer(self, newVolatileDeployer):
 
         sp.verify(sp.sender == self.data.adminAddress)
 
         self.data.volatileAmmDeployer = newVolatileDeployer
 
-    @sp.entry_point
+    @sp.entry_point(lazify = True)
     def addPair(self,params):
 
         sp.set_type(
@@ -257,7 +331,7 @@ class tokenDeployer(sp.Contract):
                 params.exchangeAddress, params.lpTokenAddress, False , self.data.volatileAmmDeployer
             )
 
-    @sp.entry_point
+    @sp.entry_point(lazify = True)
     def removePair(self,params):
 
         sp.set_type(
@@ -294,14 +368,14 @@ class tokenDeployer(sp.Contract):
 
             sp.transfer(params.exchangeAddress, sp.mutez(0), contractHandle)
 
-    @sp.entry_point
+    @sp.entry_point(lazify = True)
     def changeDeployerState(self):
 
         sp.verify(sp.sender == self.data.adminAddress)
 
         self.data.paused = ~ self.data.paused
 
-    @sp.entry_point
+    @sp.entry_point(lazify = True)
     def modifyStableDeployer(self, newStableDeployer):
 
         sp.verify(sp.sender == self.data.adminAddress)
@@ -41,17 +41,25 @@ class FactoryContract(sp.Contract):
 
         ammAddress = sp.some(sp.create_contract(
             storage = sp.record(
-                admin = self.data.adminAddress, 
+                config = sp.big_map(
+                    l = {
+                        sp.unit : sp.record(
+                            admin = self.data.adminAddress,
+                            voterContract = sp.none,
+                            lpTokenAddress = params.lpTokenAddress
+                        )
+                    },
+                    tkey = sp.TUnit,
+                    tvalue = sp.TRecord(admin = sp.TAddress, voterContract = sp.TOption(sp.TAddress), lpTokenAddress = sp.TAddress)
+                ),
                 token1Address = params.token1Address, 
                 token1Id = params.token1Id,
                 token1Check = params.token1Type,
                 token2Address = params.token2Address,
                 token2Id = params.token2Id,
                 token2Check = params.token2Type,
-                lpTokenAddress = params.lpTokenAddress,
                 lpFee = self.data.lpFee,
                 state = False,
-                voterContract = sp.none,
                 token1_pool = sp.nat(0), 
                 token2_pool = sp.nat(0), 
                 totalSupply = sp.nat(0),
@@ -59,6 +67,11 @@ class FactoryContract(sp.Contract):
                 token1_Fee = sp.nat(0), 
                 token2_Fee = sp.nat(0),
                 maxSwapLimit = sp.nat(40),
+                price1CumulativeLast = sp.nat(0),
+                price2CumulativeLast = sp.nat(0),
+                blockTimestampLast = sp.now,
+                lazyFee = False,
+                kLast = sp.nat(0),
             ),
             contract = self.SwapContract
         ))
@@ -94,23 +107,25 @@ class FactoryContract(sp.Contract):
 
         sp.transfer(ammAddress.open_some(), sp.mutez(0), contractHandle)
 
-        # Add Pair to the Router
-        self.routerCall(
-                ammAddress.open_some(),
-                params.token1Address,
-                params.token2Address,
-                params.token1Id,
-                params.token2Id,
-                params.token1Type,
-                params.token2Type,
-                params.token1Amount,
-                params.token2Amount,
-                params.userAddress
-        )
+        # Seed the initial liquidity through the Router, pair metadata is read from getExchange
+        sp.if (params.token1Amount > sp.nat(0)) & (params.token2Amount > sp.nat(0)):
+
+            self.routerCall(
+                    ammAddress.open_some(),
+                    params.token1Address,
+                    params.token2Address,
+                    params.token1Id,
+                    params.token2Id,
+                    params.token1Type,
+                    params.token2Type,
+                    params.token1Amount,
+                    params.token2Amount,
+                    params.userAddress
+            )
 
         self.data.lpMapping[params.lpTokenAddress] = ammAddress.open_some()
 
-    @sp.entry_point
+    @sp.entry_point(lazify = True)
     def addExistingPair(self, params):
 
         sp.set_type(
@@ -149,10 +164,9 @@ class FactoryContract(sp.Contract):
                 sp.self_address
             )
 
-
         self.data.lpMapping[params.lpTokenAddress] = params.exchangeAddress
 
-    @sp.entry_point
+    @sp.entry_point(lazify = True)
     def removeExchangePair(self, exchangeAddress):
 
         sp.set_type(exchangeAddress, sp.TAddress)
@@ -171,7 +185,7 @@ class FactoryContract(sp.Contract):
 
         sp.transfer(exchangeAddress, sp.mutez(0), contractHandle)
 
-    @sp.entry_point
+    @sp.entry_point(lazify = True)
     def callUpdateExchageAddress(self, lpTokenAddres):
 
         sp.set_type(lpTokenAddres, sp.TAddress)
@@ -189,34 +203,67 @@ class FactoryContract(sp.Contract):
         sp.transfer(self.data.lpMapping[lpTokenAddres], sp.mutez(0), contractHandle)
 
 
-    @sp.entry_point
+    @sp.entry_point(lazify = True)
     def changeLpDeployer(self, newLpDeployer):
 
         sp.verify(sp.sender == self.data.adminAddress)
 
         self.data.lpDeployer = newLpDeployer
 
-    @sp.entry_point
+    @sp.entry_point(lazify = True)
     def changeRouterAddress(self, newRouterAddress):
 
         sp.verify(sp.sender == self.data.adminAddress)
 
         self.data.routerAddress = newRouterAddress
 
-    @sp.entry_point
+    @sp.entry_point(lazify = True)
     def modifyFee(self, newLpFee):
 
         sp.verify(sp.sender == self.data.adminAddress)
 
         self.data.lpFee = newLpFee
 
-    @sp.entry_point
+    @sp.entry_point(lazify = True)
     def changeAdminAddress(self, newAdminAddress):
 
         sp.verify(sp.sender == self.data.adminAddress)
 
         self.data.adminAddress = newAdminAddress
 
+    @sp.onchain_view()
+    def getExchange(self, exchangeAddress):
+        """Returns the registered pair metadata of an exchange, read by the Router once per hop
+
+        Args:
+            exchangeAddress: exchange to be looked up
+        Returns:
+            sp.TOption: pair metadata, none if the exchange is not registered by this factory
+        """
+
+        sp.set_type(exchangeAddress, sp.TAddress)
+
+        exchange = sp.local('exchange', sp.set_type_expr(sp.none, sp.TOption(sp.TRecord(
+            token1Address = sp.TAddress, token2Address = sp.TAddress, lpTokenAddress = sp.TAddress,
+            token1Id = sp.TNat, token2Id = sp.TNat,
+            token1Type = sp.TBool, token2Type = sp.TBool, stablePair = sp.TBool
+        ))))
+
+        sp.if self.data.Registry.contains(exchangeAddress):
+
+            exchange.value = sp.some(sp.record(
+                token1Address = self.data.Registry[exchangeAddress].token1Address,
+                token2Address = self.data.Registry[exchangeAddress].token2Address,
+                lpTokenAddress = self.data.Registry[exchangeAddress].lpTokenAddress,
+                token1Id = self.data.Registry[exchangeAddress].token1Id,
+                token2Id = self.data.Registry[exchangeAddress].token2Id,
+                token1Type = self.data.Registry[exchangeAddress].token1Type,
+                token2Type = self.data.Registry[exchangeAddress].token2Type,
+                stablePair = False
+            ))
+
+        sp.result(exchange.value)
+
     def routerCall(self,exchangeAddress, token1Address, token2Address, token1Id, token2Id, token1Type, token2Type, token1Amount, token2Amount, userAddress):
 
         contractHandle = sp.contract(
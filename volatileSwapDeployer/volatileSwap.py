@@ -2,6 +2,8 @@ import smartpy as sp
 
 INITIAL_LIQUIDITY = 1000
 
+PRICE_PRECISION = 2 ** 112
+
 class ContractLibrary(sp.Contract):
     """Provides utility functions 
     """
@@ -84,6 +86,58 @@ class ContractLibrary(sp.Contract):
 
             ContractLibrary.TransferFATokens(sender, receiver, amount, tokenAddress)
 
+
+    def TransferTokenPair(sender, receiver, token1Amount, token2Amount, token1Address, token1Id, token1Check, token2Address, token2Id, token2Check): 
+        """Transfers both tokens of a pool, batched in one transfer when they are ids of the same FA2 contract
+        
+        Args:
+            sender: sender address
+            receiver: receiver address
+            token1Amount: amount of first token to be transferred
+            token2Amount: amount of second token to be transferred
+            token1Address: address of the first token contract
+            token1Id: id of first token to be transferred (for FA2 tokens)
+            token1Check: boolean describing whether the first token contract is FA2 or not
+            token2Address: address of the second token contract
+            token2Id: id of second token to be transferred (for FA2 tokens)
+            token2Check: boolean describing whether the second token contract is FA2 or not
+        """
+
+        sp.if token1Check & token2Check & (token1Address == token2Address): 
+
+            sp.verify((token1Amount > 0) & (token2Amount > 0), "Zero_Transfer")
+
+            arg = [
+                sp.record(
+                    from_ = sender,
+                    txs = [
+                        sp.record(
+                            to_         = receiver,
+                            token_id    = token1Id , 
+                            amount      = token1Amount 
+                        ),
+                        sp.record(
+                            to_         = receiver,
+                            token_id    = token2Id , 
+                            amount      = token2Amount 
+                        )
+                    ]
+                )
+            ]
+
+            transferHandle = sp.contract(
+                sp.TList(sp.TRecord(from_=sp.TAddress, txs=sp.TList(sp.TRecord(amount=sp.TNat, to_=sp.TAddress, token_id=sp.TNat).layout(("to_", ("token_id", "amount")))))), 
+                token1Address,
+                entry_point='transfer').open_some()
+
+            sp.transfer(arg, sp.mutez(0), transferHandle)
+
+        sp.else: 
+
+            ContractLibrary.TransferToken(sender, receiver, token1Amount, token1Address, token1Id, token1Check)
+
+            ContractLibrary.TransferToken(sender, receiver, token2Amount, token2Address, token2Id, token2Check)
+
         
     @sp.private_lambda(wrap_call=True)
     def square_root(self , x): 
@@ -114,17 +168,18 @@ class AMM(ContractLibrary):
         """Initialize the contract storage
         
         Storage:
-            admin: amm admin address
+            config: single entry big_map (key sp.unit) holding the rarely changed configuration, kept out of the storage deserialized on every swap
+                admin: amm admin address
+                voterContract : voter contract for Ve System
+                lpTokenAddress: contract address for the LP tokens used in the amm
             token1Address: contract address for first token used in the amm
             token1Id: token id for first token used in the amm
             token1Check: boolean describing whether first token used in the amm is FA2
             token2Address: contract address for second token used in the amm
             token2Id: token id for second token used in the amm
             token2Check: boolean describing whether second token used in the amm is FA2
-            lpTokenAddress: contract address for the LP tokens used in the amm
             lpFee: % fee for the LP
             state: Boolean Value for switching between normal fees and Ve System
-            voterContract : voter contract for Ve System
             token1_pool: total liquidity of token 1
             token2_pool: total liquidity of token 2
             totalSupply: total supply of LP tokens
@@ -132,21 +187,24 @@ class AMM(ContractLibrary):
             token1_Fee: total system fee accumulated in token 1
             token2_Fee: total system fee accumulated in token 2
             maxSwapLimit: max % of total liquidity that can be swapped in one go
+            price1CumulativeLast: time weighted sum of the price of token 1 in token 2 (scaled by PRICE_PRECISION)
+            price2CumulativeLast: time weighted sum of the price of token 2 in token 1 (scaled by PRICE_PRECISION)
+            blockTimestampLast: timestamp of the block in which the price accumulators were last updated
+            lazyFee: boolean describing whether the Ve System fee is realised from invariant growth instead of on every swap
+            kLast: token1_pool * token2_pool right after the last fee realisation or liquidity event in lazy fee mode
         """
 
         self.init_type(
             sp.TRecord(
-            admin = sp.TAddress, 
+            config = sp.TBigMap(sp.TUnit, sp.TRecord(admin = sp.TAddress, voterContract = sp.TOption(sp.TAddress), lpTokenAddress = sp.TAddress)),
             token1Address = sp.TAddress, 
             token1Id = sp.TNat,
             token1Check = sp.TBool,
             token2Address = sp.TAddress,
             token2Id = sp.TNat,
             token2Check = sp.TBool,
-            lpTokenAddress = sp.TAddress,
             lpFee = sp.TNat,
             state = sp.TBool,
-            voterContract = sp.TOption(sp.TAddress),
             token1_pool = sp.TNat, 
             token2_pool = sp.TNat, 
             totalSupply = sp.TNat,
@@ -154,10 +212,270 @@ class AMM(ContractLibrary):
             token1_Fee = sp.TNat, 
             token2_Fee = sp.TNat,
             maxSwapLimit = sp.TNat,
+            price1CumulativeLast = sp.TNat,
+            price2CumulativeLast = sp.TNat,
+            blockTimestampLast = sp.TTimestamp,
+            lazyFee = sp.TBool,
+            kLast = sp.TNat,
             )
         )
 
 
+    def currentCumulativePrices(self):
+        """Computes the price accumulators as of the current block using the reserves held since the last update
+        
+        Returns:
+            sp.TRecord(price1Cumulative, price2Cumulative): up to date price accumulators for token 1 and token 2
+        """
+
+        price1Cumulative = sp.local('price1Cumulative', self.data.price1CumulativeLast)
+
+        price2Cumulative = sp.local('price2Cumulative', self.data.price2CumulativeLast)
+
+        sp.if (sp.now > self.data.blockTimestampLast) & (self.data.token1_pool != sp.nat(0)) & (self.data.token2_pool != sp.nat(0)): 
+
+            timeElapsed = sp.local('timeElapsed', sp.as_nat(sp.now - self.data.blockTimestampLast))
+
+            price1Cumulative.value += ((self.data.token2_pool * sp.nat(PRICE_PRECISION)) / self.data.token1_pool) * timeElapsed.value
+
+            price2Cumulative.value += ((self.data.token1_pool * sp.nat(PRICE_PRECISION)) / self.data.token2_pool) * timeElapsed.value
+
+        return sp.record(price1Cumulative = price1Cumulative.value, price2Cumulative = price2Cumulative.value)
+
+    def updatePriceOracle(self):
+        """Updates the price accumulators on the first Swap / AddLiquidity / RemoveLiquidity of a block, before the reserves change
+        """
+
+        sp.if sp.now > self.data.blockTimestampLast: 
+
+            cumulativePrices = self.currentCumulativePrices()
+
+            self.data.price1CumulativeLast = cumulativePrices.price1Cumulative
+
+            self.data.price2CumulativeLast = cumulativePrices.price2Cumulative
+
+            self.data.blockTimestampLast = sp.now
+
+    def accrueLazyFee(self):
+        """Moves the Ve System share of the pool, the growth of sqrt(token1_pool * token2_pool) since kLast, into the fee buckets
+        """
+
+        sp.if self.data.lazyFee & self.data.state & (self.data.kLast != sp.nat(0)): 
+
+            rootK = sp.local('rootK', self.square_root(self.data.token1_pool * self.data.token2_pool))
+
+            rootKLast = sp.local('rootKLast', self.square_root(self.data.kLast))
+
+            sp.if rootK.value > rootKLast.value: 
+
+                token1Fee = sp.local('token1Fee', (self.data.token1_pool * sp.as_nat(rootK.value - rootKLast.value)) / rootK.value)
+
+                token2Fee = sp.local('token2Fee', (self.data.token2_pool * sp.as_nat(rootK.value - rootKLast.value)) / rootK.value)
+
+                self.data.token1_pool = sp.as_nat(self.data.token1_pool - token1Fee.value)
+                self.data.token1_Fee += token1Fee.value
+
+                self.data.token2_pool = sp.as_nat(self.data.token2_pool - token2Fee.value)
+                self.data.token2_Fee += token2Fee.value
+
+    def updateKLast(self):
+        """Records the current invariant as the base for the next lazy fee realisation
+        """
+
+        sp.if self.data.lazyFee: 
+
+            self.data.kLast = self.data.token1_pool * self.data.token2_pool
+
+    def emitSwap(self, recipient, tokenAmountIn, tokenAmountOut, requiredTokenAddress, requiredTokenId, fee):
+        """Emits a Swap event with the traded amounts, the fee split and the post trade reserves
+        
+        Args:
+            recipient: address that received the swapped out tokens
+            tokenAmountIn: amount of tokens sent to the amm
+            tokenAmountOut: amount of required tokens sent to the recipient
+            requiredTokenAddress: contract address of the token returned after swap
+            requiredTokenId: id of the token returned after swap
+            fee: fee charged on the input token, kept by the LPs or accrued as system fee in Ve System
+        """
+
+        lpShare = sp.local('lpShare', fee)
+
+        systemShare = sp.local('systemShare', sp.nat(0))
+
+        sp.if self.data.state & ~self.data.lazyFee:
+
+            lpShare.value = sp.nat(0)
+
+            systemShare.value = fee
+
+        sp.emit(
+            sp.record(
+                sender = sp.sender,
+                recipient = recipient,
+                tokenAmountIn = tokenAmountIn,
+                tokenAmountOut = tokenAmountOut,
+                requiredTokenAddress = requiredTokenAddress,
+                requiredTokenId = requiredTokenId,
+                lpFee = lpShare.value,
+                systemFee = systemShare.value,
+                token1_pool = self.data.token1_pool,
+                token2_pool = self.data.token2_pool
+            ),
+            tag = "Swap"
+        )
+
+    def emitLiquidity(self, tag, recipient, token1Amount, token2Amount, lpAmount):
+        """Emits an AddLiquidity / RemoveLiquidity event with the amounts moved and the post operation reserves
+        
+        AddLiquiditySingle tags a single sided deposit, with the amount of the other token left at zero
+        
+        Args:
+            tag: name of the event
+            recipient: address credited with the LP tokens or with the tokens removed from the pool
+            token1Amount: amount of token 1 added to or removed from the pool
+            token2Amount: amount of token 2 added to or removed from the pool
+            lpAmount: amount of LP tokens minted or burned
+        """
+
+        sp.emit(
+            sp.record(
+                sender = sp.sender,
+                recipient = recipient,
+                token1Amount = token1Amount,
+                token2Amount = token2Amount,
+                lpAmount = lpAmount,
+                token1_pool = self.data.token1_pool,
+                token2_pool = self.data.token2_pool,
+                totalSupply = self.data.totalSupply
+            ),
+            tag = tag
+        )
+
+    def computeTokenOut(self, tokenAmountIn, tokenInPool, tokenOutPool):
+        """Computes the result of a swap for an exact input amount
+        
+        Args:
+            tokenAmountIn: amount of tokens sent to the amm
+            tokenInPool: liquidity of the token sent to the amm
+            tokenOutPool: liquidity of the token returned by the amm
+        Returns:
+            sp.TRecord(lpfee, newTokenOutPool, tokenTransfer): fee charged on the input, liquidity of the returned token after swap and amount of tokens returned
+        """
+
+        sp.verify(tokenAmountIn * 100 <= tokenInPool * self.data.maxSwapLimit,"Plenty_Network_Swap_Limit_Exceed")
+
+        lpfee = sp.local('swapLpFee', tokenAmountIn / self.data.lpFee)
+
+        sp.verify(lpfee.value > 0,"Plenty_Network_Zero_System_Fee")
+
+        newTokenOutPool = sp.local('newTokenOutPool', (tokenInPool * tokenOutPool) / sp.as_nat( (tokenInPool + tokenAmountIn) - lpfee.value ))
+
+        return sp.record(lpfee = lpfee.value, newTokenOutPool = newTokenOutPool.value, tokenTransfer = sp.as_nat(tokenOutPool - newTokenOutPool.value))
+
+    def computeTokenIn(self, tokenAmountOut, tokenInPool, tokenOutPool):
+        """Computes the smallest input amount for which a swap returns at least tokenAmountOut
+        
+        Args:
+            tokenAmountOut: amount of tokens expected from the amm
+            tokenInPool: liquidity of the token sent to the amm
+            tokenOutPool: liquidity of the token returned by the amm
+        Returns:
+            sp.TNat: amount of tokens that have to be sent to the amm
+        """
+
+        sp.verify(tokenAmountOut < tokenOutPool,"Plenty_Network_Cash_Bought_Exceeds_Pool")
+
+        # A swap leaves (tokenInPool * tokenOutPool) / (tokenInPool + tokenAmountIn - lpfee) in the pool
+        netAmountIn = sp.local('netAmountIn', sp.as_nat( (tokenInPool * tokenOutPool) / sp.as_nat(tokenOutPool - tokenAmountOut + 1) + 1 - tokenInPool ))
+
+        # Smallest tokenAmountIn with tokenAmountIn - tokenAmountIn / lpFee >= netAmountIn
+        feePeriods = sp.local('feePeriods', netAmountIn.value / sp.as_nat(self.data.lpFee - 1))
+        tokenAmountIn = sp.local('tokenAmountIn', feePeriods.value * self.data.lpFee + netAmountIn.value % sp.as_nat(self.data.lpFee - 1))
+
+        sp.if netAmountIn.value % sp.as_nat(self.data.lpFee - 1) == 0:
+
+            tokenAmountIn.value = sp.as_nat(tokenAmountIn.value - 1)
+
+        # Swap charges a non zero fee
+        sp.if tokenAmountIn.value < self.data.lpFee:
+
+            tokenAmountIn.value = self.data.lpFee
+
+        sp.verify(tokenAmountIn.value * 100 <= tokenInPool * self.data.maxSwapLimit,"Plenty_Network_Swap_Limit_Exceed")
+
+        return tokenAmountIn.value
+
+    def applySwapExactOut(self, tokenAmountOut, maxTokenIn, requiredTokenAddress, requiredTokenId):
+        """Updates the pool to the state after swapping in the smallest amount that returns tokenAmountOut
+        
+        Args:
+            tokenAmountOut: amount of required tokens returned by the swap
+            maxTokenIn: maximum amount of tokens that can be swapped in
+            requiredTokenAddress: contract address of the token returned after swap
+            requiredTokenId: id of the token returned after swap
+        Returns:
+            sp.TRecord(tokenAmountIn, lpfee, tokenInAddress, tokenInId, tokenInCheck, tokenOutCheck): amount owed to the amm, fee charged on it and the tokens involved
+        """
+
+        tokenAmountIn = sp.local('exactOutAmountIn', sp.nat(0))
+
+        lpfee = sp.local('exactOutLpFee', sp.nat(0))
+
+        tokenIn = sp.local('tokenIn', sp.record(tokenAddress = self.data.token1Address, tokenId = self.data.token1Id, tokenCheck = self.data.token1Check))
+
+        tokenOutCheck = sp.local('tokenOutCheck', self.data.token2Check)
+
+        sp.if (requiredTokenAddress == self.data.token1Address) & (requiredTokenId == self.data.token1Id): 
+
+            tokenAmountIn.value = self.computeTokenIn(tokenAmountOut, self.data.token2_pool, self.data.token1_pool)
+
+            sp.verify(tokenAmountIn.value <= maxTokenIn,"Plenty_Network_Higher_Slippage")
+
+            lpfee.value = tokenAmountIn.value / self.data.lpFee
+
+            self.data.token1_pool = sp.as_nat(self.data.token1_pool - tokenAmountOut)
+
+            sp.if self.data.state & ~self.data.lazyFee:
+
+                self.data.token2_pool += sp.as_nat(tokenAmountIn.value - lpfee.value)
+                self.data.token2_Fee += lpfee.value
+
+            sp.else:
+
+                self.data.token2_pool += tokenAmountIn.value
+
+            tokenIn.value = sp.record(tokenAddress = self.data.token2Address, tokenId = self.data.token2Id, tokenCheck = self.data.token2Check)
+
+            tokenOutCheck.value = self.data.token1Check
+
+        sp.else: 
+
+            tokenAmountIn.value = self.computeTokenIn(tokenAmountOut, self.data.token1_pool, self.data.token2_pool)
+
+            sp.verify(tokenAmountIn.value <= maxTokenIn,"Plenty_Network_Higher_Slippage")
+
+            lpfee.value = tokenAmountIn.value / self.data.lpFee
+
+            self.data.token2_pool = sp.as_nat(self.data.token2_pool - tokenAmountOut)
+
+            sp.if self.data.state & ~self.data.lazyFee:
+
+                self.data.token1_pool += sp.as_nat(tokenAmountIn.value - lpfee.value)
+                self.data.token1_Fee += lpfee.value
+
+            sp.else:
+
+                self.data.token1_pool += tokenAmountIn.value
+
+        return sp.record(
+            tokenAmountIn = tokenAmountIn.value, 
+            lpfee = lpfee.value, 
+            tokenInAddress = tokenIn.value.tokenAddress, 
+            tokenInId = tokenIn.value.tokenId, 
+            tokenInCheck = tokenIn.value.tokenCheck, 
+            tokenOutCheck = tokenOutCheck.value
+        )
+
     @sp.entry_point
     def Swap(self,params): 
         """ Function for Users to Swap their assets to get the required Token 
@@ -177,6 +495,8 @@ class AMM(ContractLibrary):
         sp.verify( ( (params.requiredTokenAddress == self.data.token1Address) & (params.requiredTokenId == self.data.token1Id)) | 
         ( (params.requiredTokenAddress == self.data.token2Address)  & (params.requiredTokenId == self.data.token2Id)),"Plenty_Network_Invalid_Pair")
 
+        self.updatePriceOracle()
+
         requiredTokenAmount = sp.local('requiredTokenAmount', sp.nat(0))
         SwapTokenPool = sp.local('SwapTokenPool', sp.nat(0))
 
@@ -194,25 +514,21 @@ class AMM(ContractLibrary):
             requiredTokenAmount.value = self.data.token1_pool
             SwapTokenPool.value = self.data.token2_pool
 
-        sp.verify(params.tokenAmountIn * 100 <= requiredTokenAmount.value * self.data.maxSwapLimit,"Plenty_Network_Swap_Limit_Exceed")
-
-        lpfee.value = params.tokenAmountIn / self.data.lpFee
+        swapResult = self.computeTokenOut(params.tokenAmountIn, requiredTokenAmount.value, SwapTokenPool.value)
 
-        Invariant = sp.local('Invariant', self.data.token1_pool * self.data.token2_pool)
+        lpfee.value = swapResult.lpfee
 
-        Invariant.value = Invariant.value / sp.as_nat( (requiredTokenAmount.value + params.tokenAmountIn) - lpfee.value )
+        Invariant = sp.local('Invariant', swapResult.newTokenOutPool)
 
-        tokenTransfer.value = sp.as_nat(SwapTokenPool.value - Invariant.value)
+        tokenTransfer.value = swapResult.tokenTransfer
 
         sp.verify(tokenTransfer.value >= params.MinimumTokenOut,"Plenty_Network_Higher_Slippage")
 
-        sp.verify(lpfee.value > 0,"Plenty_Network_Zero_System_Fee")
-
         sp.if (params.requiredTokenAddress == self.data.token1Address) & (params.requiredTokenId == self.data.token1Id): 
 
             self.data.token1_pool = Invariant.value
 
-            sp.if self.data.state:
+            sp.if self.data.state & ~self.data.lazyFee:
 
                 self.data.token2_pool += sp.as_nat(params.tokenAmountIn - lpfee.value)
                 self.data.token2_Fee += lpfee.value
@@ -231,7 +547,7 @@ class AMM(ContractLibrary):
 
             self.data.token2_pool = Invariant.value
 
-            sp.if self.data.state:
+            sp.if self.data.state & ~self.data.lazyFee:
 
                 self.data.token1_pool += sp.as_nat(params.tokenAmountIn - lpfee.value)
                 self.data.token1_Fee += lpfee.value
@@ -246,6 +562,98 @@ class AMM(ContractLibrary):
             # Transfer Tokens to the recipient
             ContractLibrary.TransferToken(sp.self_address, params.recipient, tokenTransfer.value, self.data.token2Address, self.data.token2Id, self.data.token2Check)
 
+        self.emitSwap(params.recipient, params.tokenAmountIn, tokenTransfer.value, params.requiredTokenAddress, params.requiredTokenId, lpfee.value)
+
+    @sp.entry_point
+    def SwapExactOut(self,params): 
+        """ Function for Users to Swap their assets for an exact amount of the required Token 
+        
+        Args:
+            tokenAmountOut: exact amount of required tokens the recipient will receive
+            maxTokenIn: maximum amount of tokens the user is willing to swap in
+            recipient: address that will receive the swapped out tokens 
+            requiredTokenAddress: contract address of the token that is expected to be returned after swap
+            requiredTokenId: id of the token that is expected to be returned after swap
+        """
+
+        sp.set_type(params, sp.TRecord(tokenAmountOut = sp.TNat, maxTokenIn = sp.TNat, recipient = sp.TAddress, requiredTokenAddress = sp.TAddress, requiredTokenId = sp.TNat))
+
+        sp.verify( ~self.data.paused,"Plenty_Network_Paused_State")
+
+        sp.verify(params.tokenAmountOut > 0, "Plenty_Network_Zero_Swap")
+
+        sp.verify( ( (params.requiredTokenAddress == self.data.token1Address) & (params.requiredTokenId == self.data.token1Id)) | 
+        ( (params.requiredTokenAddress == self.data.token2Address)  & (params.requiredTokenId == self.data.token2Id)),"Plenty_Network_Invalid_Pair")
+
+        self.updatePriceOracle()
+
+        settlement = sp.local('settlement', self.applySwapExactOut(params.tokenAmountOut, params.maxTokenIn, params.requiredTokenAddress, params.requiredTokenId))
+
+        # Transfer tokens to Exchange
+        ContractLibrary.TransferToken(sp.sender, sp.self_address, settlement.value.tokenAmountIn, settlement.value.tokenInAddress, settlement.value.tokenInId, settlement.value.tokenInCheck)
+
+        # Transfer tokens to the recipient
+        ContractLibrary.TransferToken(sp.self_address, params.recipient, params.tokenAmountOut, params.requiredTokenAddress, params.requiredTokenId, settlement.value.tokenOutCheck)
+
+        self.emitSwap(params.recipient, settlement.value.tokenAmountIn, params.tokenAmountOut, params.requiredTokenAddress, params.requiredTokenId, settlement.value.lpfee)
+
+    @sp.entry_point
+    def FlashSwap(self,params): 
+        """ Optimistic Swap for contracts that pay for the required Token within the same operation
+        
+        The required tokens are sent to the recipient first, then the callback is called and only 
+        afterwards the input owed, as quoted by getAmountIn, is collected from the sender. The pool 
+        is updated upfront, so the whole operation fails if the sender can not pay after the callback
+        
+        Args:
+            tokenAmountOut: amount of required tokens sent to the recipient
+            maxTokenIn: maximum amount of tokens the sender is willing to pay
+            recipient: address that will receive the swapped out tokens 
+            requiredTokenAddress: contract address of the token that is expected to be returned after swap
+            requiredTokenId: id of the token that is expected to be returned after swap
+            callback: contract called after the required tokens are sent, with the amount owed and data
+            data: arbitrary bytes forwarded to the callback
+        """
+
+        sp.set_type(params, sp.TRecord(
+            tokenAmountOut = sp.TNat, maxTokenIn = sp.TNat, recipient = sp.TAddress, 
+            requiredTokenAddress = sp.TAddress, requiredTokenId = sp.TNat,
+            callback = sp.TContract(sp.TRecord(tokenAmountIn = sp.TNat, tokenAmountOut = sp.TNat, requiredTokenAddress = sp.TAddress, requiredTokenId = sp.TNat, data = sp.TBytes)),
+            data = sp.TBytes
+        ))
+
+        sp.verify( ~self.data.paused,"Plenty_Network_Paused_State")
+
+        sp.verify(params.tokenAmountOut > 0, "Plenty_Network_Zero_Swap")
+
+        sp.verify( ( (params.requiredTokenAddress == self.data.token1Address) & (params.requiredTokenId == self.data.token1Id)) | 
+        ( (params.requiredTokenAddress == self.data.token2Address)  & (params.requiredTokenId == self.data.token2Id)),"Plenty_Network_Invalid_Pair")
+
+        self.updatePriceOracle()
+
+        settlement = sp.local('settlement', self.applySwapExactOut(params.tokenAmountOut, params.maxTokenIn, params.requiredTokenAddress, params.requiredTokenId))
+
+        # Transfer tokens to the recipient
+        ContractLibrary.TransferToken(sp.self_address, params.recipient, params.tokenAmountOut, params.requiredTokenAddress, params.requiredTokenId, settlement.value.tokenOutCheck)
+
+        # Call the borrower, its operations are executed before the repayment below
+        sp.transfer(
+            sp.record(
+                tokenAmountIn = settlement.value.tokenAmountIn, 
+                tokenAmountOut = params.tokenAmountOut, 
+                requiredTokenAddress = params.requiredTokenAddress, 
+                requiredTokenId = params.requiredTokenId, 
+                data = params.data
+            ), 
+            sp.mutez(0), 
+            params.callback
+        )
+
+        # Collect the input owed from the sender
+        ContractLibrary.TransferToken(sp.sender, sp.self_address, settlement.value.tokenAmountIn, settlement.value.tokenInAddress, settlement.value.tokenInId, settlement.value.tokenInCheck)
+
+        self.emitSwap(params.recipient, settlement.value.tokenAmountIn, params.tokenAmountOut, params.requiredTokenAddress, params.requiredTokenId, settlement.value.lpfee)
+
     @sp.entry_point 
     def AddLiquidity(self,params): 
         """Allows users to add liquidity to the pool and gain LP tokens
@@ -257,6 +665,10 @@ class AMM(ContractLibrary):
         """
 
         sp.set_type(params, sp.TRecord(token1_max = sp.TNat, token2_max = sp.TNat, recipient = sp.TAddress))
+
+        self.updatePriceOracle()
+
+        self.accrueLazyFee()
         
         token1Amount = sp.local('token1Amount', sp.nat(0))
 
@@ -316,9 +728,8 @@ class AMM(ContractLibrary):
         
         # Transfer Funds to Exchange 
         
-        ContractLibrary.TransferToken(sp.sender, sp.self_address, token1Amount.value, self.data.token1Address, self.data.token1Id, self.data.token1Check)
-
-        ContractLibrary.TransferToken(sp.sender, sp.self_address, token2Amount.value, self.data.token2Address, self.data.token2Id, self.data.token2Check)
+        ContractLibrary.TransferTokenPair(sp.sender, sp.self_address, token1Amount.value, token2Amount.value, 
+            self.data.token1Address, self.data.token1Id, self.data.token1Check, self.data.token2Address, self.data.token2Id, self.data.token2Check)
 
         self.data.token1_pool += token1Amount.value
 
@@ -334,12 +745,164 @@ class AMM(ContractLibrary):
 
         mintHandle = sp.contract(
             sp.TRecord(address = sp.TAddress, value = sp.TNat),
-            self.data.lpTokenAddress,
+            self.data.config[sp.unit].lpTokenAddress,
+            "mint"
+            ).open_some()
+
+        sp.transfer(mintParam, sp.mutez(0), mintHandle)
+
+        self.updateKLast()
+
+        self.emitLiquidity("AddLiquidity", params.recipient, token1Amount.value, token2Amount.value, liquidity.value)
+
+    @sp.entry_point 
+    def AddLiquiditySingle(self,params): 
+        """Allows users to add liquidity to the pool with a single token and gain LP tokens
+        
+        Part of the input is swapped against the pool so that the rest matches the post swap ratio. For a 
+        reserve r, an input a and a fee of 1/lpFee the swapped amount is 
+
+            s = (sqrt(r^2 (2 lpFee - 1)^2 + 4 lpFee (lpFee - 1) a r) - r (2 lpFee - 1)) / (2 (lpFee - 1))
+
+        Args:
+            tokenAddress: contract address of the token supplied to the pool
+            tokenId: id of the token supplied to the pool
+            tokenAmount: amount of tokens supplied to the pool
+            minLqt: minimum amount of LP tokens expected by the user
+            recipient: account address that will be credited with the LP tokens
+        """
+
+        sp.set_type(params, sp.TRecord(tokenAddress = sp.TAddress, tokenId = sp.TNat, tokenAmount = sp.TNat, minLqt = sp.TNat, recipient = sp.TAddress))
+
+        sp.verify( ~self.data.paused,"Plenty_Network_Paused_State")
+
+        sp.verify(self.data.totalSupply != sp.nat(0),"Plenty_Network_Not_Initialized")
+
+        sp.verify(params.tokenAmount > 0, "Plenty_Network_Zero_Swap")
+
+        sp.verify( ( (params.tokenAddress == self.data.token1Address) & (params.tokenId == self.data.token1Id)) | 
+        ( (params.tokenAddress == self.data.token2Address)  & (params.tokenId == self.data.token2Id)),"Plenty_Network_Invalid_Pair")
+
+        self.updatePriceOracle()
+
+        self.accrueLazyFee()
+
+        token1Amount = sp.local('token1Amount', sp.nat(0))
+
+        token2Amount = sp.local('token2Amount', sp.nat(0))
+
+        liquidity = sp.local('liquidity', sp.nat(0))
+
+        feeFactor = sp.local('feeFactor', sp.as_nat(2 * self.data.lpFee - 1))
+
+        sp.if (params.tokenAddress == self.data.token1Address) & (params.tokenId == self.data.token1Id): 
+
+            token1Amount.value = params.tokenAmount
+
+            sqrt = sp.local('sqrt', self.square_root( self.data.token1_pool * self.data.token1_pool * feeFactor.value * feeFactor.value + 4 * self.data.lpFee * sp.as_nat(self.data.lpFee - 1) * params.tokenAmount * self.data.token1_pool ))
+
+            swapAmount = sp.local('swapAmount', sp.as_nat(sqrt.value - self.data.token1_pool * feeFactor.value) / (2 * sp.as_nat(self.data.lpFee - 1)))
+
+            sp.verify(swapAmount.value > 0, "Plenty_Network_Zero_Swap")
+
+            swapResult = self.computeTokenOut(swapAmount.value, self.data.token1_pool, self.data.token2_pool)
+
+            # Bought tokens never leave the pool, only the fee does in Ve System
+            tokenBought = sp.local('tokenBought', swapResult.tokenTransfer)
+
+            self.data.token2_pool = swapResult.newTokenOutPool
+
+            sp.if self.data.state & ~self.data.lazyFee:
+
+                self.data.token1_pool += sp.as_nat(swapAmount.value - swapResult.lpfee)
+                self.data.token1_Fee += swapResult.lpfee
+
+            sp.else:
+
+                self.data.token1_pool += swapAmount.value
+
+            remainingAmount = sp.local('remainingAmount', sp.as_nat(params.tokenAmount - swapAmount.value))
+
+            sp.if ( remainingAmount.value * self.data.totalSupply ) / self.data.token1_pool < ( tokenBought.value * self.data.totalSupply ) / self.data.token2_pool: 
+
+                liquidity.value = ( remainingAmount.value * self.data.totalSupply ) / self.data.token1_pool
+
+            sp.else: 
+
+                liquidity.value = ( tokenBought.value * self.data.totalSupply ) / self.data.token2_pool
+
+            self.data.token1_pool += remainingAmount.value
+
+            self.data.token2_pool += tokenBought.value
+
+            ContractLibrary.TransferToken(sp.sender, sp.self_address, params.tokenAmount, self.data.token1Address, self.data.token1Id, self.data.token1Check)
+
+        sp.else: 
+
+            token2Amount.value = params.tokenAmount
+
+            sqrt = sp.local('sqrt', self.square_root( self.data.token2_pool * self.data.token2_pool * feeFactor.value * feeFactor.value + 4 * self.data.lpFee * sp.as_nat(self.data.lpFee - 1) * params.tokenAmount * self.data.token2_pool ))
+
+            swapAmount = sp.local('swapAmount', sp.as_nat(sqrt.value - self.data.token2_pool * feeFactor.value) / (2 * sp.as_nat(self.data.lpFee - 1)))
+
+            sp.verify(swapAmount.value > 0, "Plenty_Network_Zero_Swap")
+
+            swapResult = self.computeTokenOut(swapAmount.value, self.data.token2_pool, self.data.token1_pool)
+
+            # Bought tokens never leave the pool, only the fee does in Ve System
+            tokenBought = sp.local('tokenBought', swapResult.tokenTransfer)
+
+            self.data.token1_pool = swapResult.newTokenOutPool
+
+            sp.if self.data.state & ~self.data.lazyFee:
+
+                self.data.token2_pool += sp.as_nat(swapAmount.value - swapResult.lpfee)
+                self.data.token2_Fee += swapResult.lpfee
+
+            sp.else:
+
+                self.data.token2_pool += swapAmount.value
+
+            remainingAmount = sp.local('remainingAmount', sp.as_nat(params.tokenAmount - swapAmount.value))
+
+            sp.if ( remainingAmount.value * self.data.totalSupply ) / self.data.token2_pool < ( tokenBought.value * self.data.totalSupply ) / self.data.token1_pool: 
+
+                liquidity.value = ( remainingAmount.value * self.data.totalSupply ) / self.data.token2_pool
+
+            sp.else: 
+
+                liquidity.value = ( tokenBought.value * self.data.totalSupply ) / self.data.token1_pool
+
+            self.data.token2_pool += remainingAmount.value
+
+            self.data.token1_pool += tokenBought.value
+
+            ContractLibrary.TransferToken(sp.sender, sp.self_address, params.tokenAmount, self.data.token2Address, self.data.token2Id, self.data.token2Check)
+
+        sp.verify(liquidity.value > 0 )
+
+        sp.verify(liquidity.value >= params.minLqt,"Plenty_Network_Higher_Slippage")
+
+        # Mint LP Tokens
+        self.data.totalSupply += liquidity.value
+
+        mintParam = sp.record(
+            address = params.recipient, 
+            value = liquidity.value
+        )
+
+        mintHandle = sp.contract(
+            sp.TRecord(address = sp.TAddress, value = sp.TNat),
+            self.data.config[sp.unit].lpTokenAddress,
             "mint"
             ).open_some()
 
         sp.transfer(mintParam, sp.mutez(0), mintHandle)
 
+        self.updateKLast()
+
+        self.emitLiquidity("AddLiquiditySingle", params.recipient, token1Amount.value, token2Amount.value, liquidity.value)
+
     @sp.entry_point 
     def RemoveLiquidity(self,params): 
         """Allows users to remove their liquidity from the pool by burning their LP tokens
@@ -356,6 +919,10 @@ class AMM(ContractLibrary):
         sp.verify(self.data.totalSupply != sp.nat(0),"Plenty_Network_Not_Initialized")
 
         sp.verify(params.lpAmount <= self.data.totalSupply,"Plenty_Network_Insufficient_Balance")
+
+        self.updatePriceOracle()
+
+        self.accrueLazyFee()
         
         token1Amount = sp.local('token1Amount', sp.nat(0))
 
@@ -390,7 +957,7 @@ class AMM(ContractLibrary):
 
         burnHandle = sp.contract(
             sp.TRecord(address = sp.TAddress, value = sp.TNat),
-            self.data.lpTokenAddress,
+            self.data.config[sp.unit].lpTokenAddress,
             "burn"
             ).open_some()
 
@@ -398,9 +965,12 @@ class AMM(ContractLibrary):
 
         # Sending Plenty and Tokens 
 
-        ContractLibrary.TransferToken(sp.self_address, params.recipient, token1Amount.value, self.data.token1Address, self.data.token1Id, self.data.token1Check)
+        ContractLibrary.TransferTokenPair(sp.self_address, params.recipient, token1Amount.value, token2Amount.value, 
+            self.data.token1Address, self.data.token1Id, self.data.token1Check, self.data.token2Address, self.data.token2Id, self.data.token2Check)
 
-        ContractLibrary.TransferToken(sp.self_address, params.recipient, token2Amount.value, self.data.token2Address, self.data.token2Id, self.data.token2Check)
+        self.updateKLast()
+
+        self.emitLiquidity("RemoveLiquidity", params.recipient, token1Amount.value, token2Amount.value, params.lpAmount)
 
     @sp.entry_point 
     def ModifyFee(self,lpFee):
@@ -415,7 +985,7 @@ class AMM(ContractLibrary):
 
         sp.set_type(lpFee, sp.TNat)
 
-        sp.verify(sp.sender == self.data.admin,"Plenty_Network_Not_Admin")
+        sp.verify(sp.sender == self.data.config[sp.unit].admin,"Plenty_Network_Not_Admin")
 
         sp.verify( lpFee > 50)
 
@@ -433,12 +1003,32 @@ class AMM(ContractLibrary):
 
         sp.set_type(newVoterContract, sp.TAddress)
 
-        sp.verify(sp.sender == self.data.admin,"Plenty_Network_Not_Admin")
+        sp.verify(sp.sender == self.data.config[sp.unit].admin,"Plenty_Network_Not_Admin")
 
-        self.data.voterContract = sp.some(newVoterContract)
+        self.data.config[sp.unit].voterContract = sp.some(newVoterContract)
 
         self.data.state = True
 
+        self.updateKLast()
+
+    @sp.entry_point 
+    def ChangeFeeMode(self):
+        """Admin function to toggle lazy accounting of the Ve System fee
+        
+        In lazy mode swaps keep the whole input in the pool and write no fee buckets. The system fee is 
+        realised from the growth of sqrt(token1_pool * token2_pool) since kLast on liquidity events and forwardFee
+
+        """ 
+
+        sp.verify(sp.sender == self.data.config[sp.unit].admin,"Plenty_Network_Not_Admin")
+
+        self.updatePriceOracle()
+
+        self.accrueLazyFee()
+
+        self.data.lazyFee = ~ self.data.lazyFee
+
+        self.updateKLast()
 
     @sp.entry_point 
     def ChangeState(self):
@@ -452,7 +1042,7 @@ class AMM(ContractLibrary):
 
         """ 
 
-        sp.verify(sp.sender == self.data.admin,"Plenty_Network_Not_Admin")
+        sp.verify(sp.sender == self.data.config[sp.unit].admin,"Plenty_Network_Not_Admin")
 
         self.data.paused = ~ self.data.paused
 
@@ -466,9 +1056,9 @@ class AMM(ContractLibrary):
 
         sp.set_type(adminAddress, sp.TAddress)
 
-        sp.verify(sp.sender == self.data.admin,"Plenty_Network_Not_Admin")
+        sp.verify(sp.sender == self.data.config[sp.unit].admin,"Plenty_Network_Not_Admin")
 
-        self.data.admin = adminAddress
+        self.data.config[sp.unit].admin = adminAddress
 
     @sp.entry_point 
     def ModifyMaxSwapAmount(self,amount): 
@@ -479,7 +1069,7 @@ class AMM(ContractLibrary):
         """ 
         sp.set_type(amount,sp.TNat)
 
-        sp.verify(sp.sender == self.data.admin,"Plenty_Network_Not_Admin")
+        sp.verify(sp.sender == self.data.config[sp.unit].admin,"Plenty_Network_Not_Admin")
 
         self.data.maxSwapLimit = amount
 
@@ -494,15 +1084,28 @@ class AMM(ContractLibrary):
 
         sp.verify(self.data.state,"Plenty_Network_Invalid_State")
 
-        sp.verify(sp.sender == self.data.voterContract.open_some(),"Plenty_Network_Not_Voter")
+        sp.verify(sp.sender == self.data.config[sp.unit].voterContract.open_some(),"Plenty_Network_Not_Voter")
 
-        sp.if self.data.token1_Fee != sp.nat(0): 
+        self.updatePriceOracle()
 
-            ContractLibrary.TransferToken(sp.self_address, params.feeDistributor, self.data.token1_Fee, self.data.token1Address, self.data.token1Id, self.data.token1Check )
-            
-        sp.if self.data.token2_Fee != sp.nat(0): 
+        self.accrueLazyFee()
+
+        self.updateKLast()
+
+        sp.if (self.data.token1_Fee != sp.nat(0)) & (self.data.token2_Fee != sp.nat(0)): 
+
+            ContractLibrary.TransferTokenPair(sp.self_address, params.feeDistributor, self.data.token1_Fee, self.data.token2_Fee, 
+                self.data.token1Address, self.data.token1Id, self.data.token1Check, self.data.token2Address, self.data.token2Id, self.data.token2Check)
+
+        sp.else: 
 
-            ContractLibrary.TransferToken(sp.self_address, params.feeDistributor, self.data.token2_Fee, self.data.token2Address, self.data.token2Id, self.data.token2Check )
+            sp.if self.data.token1_Fee != sp.nat(0): 
+
+                ContractLibrary.TransferToken(sp.self_address, params.feeDistributor, self.data.token1_Fee, self.data.token1Address, self.data.token1Id, self.data.token1Check )
+                
+            sp.if self.data.token2_Fee != sp.nat(0): 
+
+                ContractLibrary.TransferToken(sp.self_address, params.feeDistributor, self.data.token2_Fee, self.data.token2Address, self.data.token2Id, self.data.token2Check )
 
         # Call the feeDistributor contract
 
@@ -547,6 +1150,16 @@ class AMM(ContractLibrary):
             c,
         )
 
+        sp.emit(
+            sp.record(
+                feeDistributor = params.feeDistributor,
+                epoch = params.epoch,
+                token1Fee = self.data.token1_Fee,
+                token2Fee = self.data.token2_Fee
+            ),
+            tag = "forwardFee"
+        )
+
         self.data.token1_Fee = sp.nat(0)
 
         self.data.token2_Fee = sp.nat(0)
@@ -603,4 +1216,102 @@ class AMM(ContractLibrary):
 
         sp.result(sp.record(token1Fee = self.data.token1_Fee, token2Fee = self.data.token2_Fee))
 
+    @sp.onchain_view()
+    def getPoolState(self): 
+
+        """View function returning everything needed to quote the amm in one read
+        
+        Returns:
+            sp.TRecord: reserves, lp fee, max swap limit, LP supply and the paused / Ve System flags
+        """
+
+        sp.result(sp.record(
+            token1_pool = self.data.token1_pool, 
+            token2_pool = self.data.token2_pool,
+            lpFee = self.data.lpFee,
+            maxSwapLimit = self.data.maxSwapLimit,
+            totalSupply = self.data.totalSupply,
+            paused = self.data.paused,
+            state = self.data.state
+        ))
+
+    @sp.onchain_view()
+    def getPriceCumulative(self): 
+
+        """View function to get the cumulative prices of the amm for time weighted average price oracles
+        
+            TWAP of token 1 in token 2 = (price1Cumulative_t2 - price1Cumulative_t1) / (blockTimestamp_t2 - blockTimestamp_t1) / PRICE_PRECISION
+
+        Returns:
+            sp.TRecord(price1Cumulative = sp.TNat, price2Cumulative = sp.TNat, blockTimestamp = sp.TTimestamp): price accumulators for token 1 and token 2 as of the current block
+        """
+
+        cumulativePrices = self.currentCumulativePrices()
+
+        sp.result(sp.record(
+            price1Cumulative = cumulativePrices.price1Cumulative, 
+            price2Cumulative = cumulativePrices.price2Cumulative, 
+            blockTimestamp = sp.now
+        ))
+
+    @sp.onchain_view()
+    def getAmountOut(self,params): 
+
+        """View function to quote the amount of tokens Swap returns for an exact input
+        
+        Args:
+            tokenAmountIn: amount of tokens to be swapped
+            requiredTokenAddress: contract address of the token that is expected to be returned after swap
+            requiredTokenId: id of the token that is expected to be returned after swap
+        Returns:
+            sp.TNat: amount of required tokens Swap would transfer
+        """
+
+        sp.set_type(params, sp.TRecord(tokenAmountIn = sp.TNat, requiredTokenAddress = sp.TAddress, requiredTokenId = sp.TNat))
+
+        sp.verify( ( (params.requiredTokenAddress == self.data.token1Address) & (params.requiredTokenId == self.data.token1Id)) | 
+        ( (params.requiredTokenAddress == self.data.token2Address)  & (params.requiredTokenId == self.data.token2Id)),"Plenty_Network_Invalid_Pair")
+
+        tokenTransfer = sp.local('tokenTransfer', sp.nat(0))
+
+        sp.if (params.requiredTokenAddress == self.data.token1Address) & (params.requiredTokenId == self.data.token1Id): 
+
+            tokenTransfer.value = self.computeTokenOut(params.tokenAmountIn, self.data.token2_pool, self.data.token1_pool).tokenTransfer
+
+        sp.else: 
+
+            tokenTransfer.value = self.computeTokenOut(params.tokenAmountIn, self.data.token1_pool, self.data.token2_pool).tokenTransfer
+
+        sp.result(tokenTransfer.value)
+
+    @sp.onchain_view()
+    def getAmountIn(self,params): 
+
+        """View function to quote the smallest input for which Swap returns a desired output
+        
+        Args:
+            tokenAmountOut: amount of required tokens expected after swap
+            requiredTokenAddress: contract address of the token that is expected to be returned after swap
+            requiredTokenId: id of the token that is expected to be returned after swap
+        Returns:
+            sp.TNat: amount of tokens that have to be swapped in
+        """
+
+        sp.set_type(params, sp.TRecord(tokenAmountOut = sp.TNat, requiredTokenAddress = sp.TAddress, requiredTokenId = sp.TNat))
+
+        sp.verify( ( (params.requiredTokenAddress == self.data.token1Address) & (params.requiredTokenId == self.data.token1Id)) | 
+        ( (params.requiredTokenAddress == self.data.token2Address)  & (params.requiredTokenId == self.data.token2Id)),"Plenty_Network_Invalid_Pair")
+
+        sp.verify(params.tokenAmountOut > 0, "Plenty_Network_Zero_Swap")
+
+        tokenAmountIn = sp.local('requiredAmountIn', sp.nat(0))
+
+        sp.if (params.requiredTokenAddress == self.data.token1Address) & (params.requiredTokenId == self.data.token1Id): 
+
+            tokenAmountIn.value = self.computeTokenIn(params.tokenAmountOut, self.data.token2_pool, self.data.token1_pool)
+
+        sp.else: 
+
+            tokenAmountIn.value = self.computeTokenIn(params.tokenAmountOut, self.data.token1_pool, self.data.token2_pool)
 
+        sp.result(tokenAmountIn.value)